@@ -1,6 +1,8 @@
 import time
 import random
 
+from heuristics import clarke_wright
+
 # RCVRP 测试数据
 def get_robust_rcvrp_instance(filename):
     with open(filename, 'r') as f:
@@ -39,91 +41,6 @@ def get_robust_rcvrp_instance(filename):
 
     return n, d_up, d_down, q
 
-def clarke_wright(N, d, q, Q):
-    """
-    Clarke and Wright savings heuristic for CVRP.
-    """
-    # 1. Initial routes
-    routes = {i: [0, i, 0] for i in N}
-    route_demands = {i: q[i] for i in N}
-    customer_to_route_id = {i: i for i in N}
-
-    # 2. Calculate savings
-    savings = []
-    for i_idx, i in enumerate(N):
-        for j in N[i_idx+1:]:
-            # Use .get with a default for cases where an edge might not exist, though d should be complete.
-            d_0i = d.get((0, i), d.get((i, 0), float('inf')))
-            d_0j = d.get((0, j), d.get((j, 0), float('inf')))
-            d_ij = d.get((i, j), d.get((j, i), float('inf')))
-            s_ij = d_0i + d_0j - d_ij
-            if s_ij > 0:
-                savings.append((s_ij, i, j))
-    
-    # 3. Sort savings
-    savings.sort(key=lambda x: x[0], reverse=True)
-
-    # 4. Merge
-    for _, i, j in savings:
-        route_i_id = customer_to_route_id[i]
-        route_j_id = customer_to_route_id[j]
-
-        if route_i_id == route_j_id:
-            continue
-
-        route_i = routes[route_i_id]
-        route_j = routes[route_j_id]
-        
-        if route_demands[route_i_id] + route_demands[route_j_id] > Q:
-            continue
-        
-        merged = False
-        # Case 1: i is end of route_i, j is start of route_j
-        if route_i[-2] == i and route_j[1] == j:
-            new_route = route_i[:-1] + route_j[1:]
-            merged = True
-        # Case 2: j is end of route_j, i is start of route_i
-        elif route_j[-2] == j and route_i[1] == i:
-            new_route = route_j[:-1] + route_i[1:]
-            # swap roles to merge i's route into j's
-            route_i_id, route_j_id = route_j_id, route_i_id
-            route_i, route_j = route_j, route_i
-            merged = True
-        # Case 3: i is end, j is end
-        elif route_i[-2] == i and route_j[-2] == j:
-            new_route = route_i[:-1] + route_j[-2:0:-1] + [0]
-            merged = True
-        # Case 4: i is start, j is start
-        elif route_i[1] == i and route_j[1] == j:
-            new_route = route_j[:-1] + route_i[-2:0:-1] + [0]
-            # swap roles to merge i's route into j's
-            route_i_id, route_j_id = route_j_id, route_i_id
-            route_i, route_j = route_j, route_i
-            merged = True
-
-        if merged:
-            routes[route_i_id] = new_route
-            route_demands[route_i_id] += route_demands[route_j_id]
-            
-            for customer in routes[route_j_id]:
-                if customer != 0:
-                    customer_to_route_id[customer] = route_i_id
-
-            del routes[route_j_id]
-            del route_demands[route_j_id]
-            
-    
-    solution_edges = []
-    final_routes = list(routes.values())
-    for route in final_routes:
-        for k in range(len(route) - 1):
-            u, v = route[k], route[k+1]
-            if u > v:
-                u, v = v, u
-            solution_edges.append((u,v))
-            
-    return solution_edges, final_routes
-
 def generate_random_scenario(d_down, d_up):
     d_rand = {}
     for edge in d_down:
@@ -3,113 +3,467 @@ from gurobipy import GRB
 
 import time
 
+import numpy as np
+
+from cb_trace import CallbackTrace
+from checkpoint import Checkpoint
+from convertSol import read_instance
+from cut_cache import CutCache, edge_key
+from edge_index import EdgeIndex
+from heuristics import local_search, route_edges, sol_routes, solve_cvrp_heuristic
+import preprocess
+from route_pool import RoutePool
+import separation
+import sparse_graph
+from solution_store import append_record, make_record
+
 EPS = 0.0001
+# formulations whose capacity constraints are separated in a callback
+CUT_FORMULATIONS = ('cut', 'undirected')
+
+# d_down/d_up may be given either as (i, j)-keyed dicts or, through ``edges``,
+# as one shared EdgeIndex; the dicts are then not needed.
+def get_wst_scenario(n, sol, d_down, d_up, edges=None):
+    if edges is None:
+        edges = EdgeIndex.from_dicts(n, d_down, d_up)
+    return edges.to_dict(edges.wst(edges.mask(sol)))
+
+
+def get_regret(N, Q, q, d_down, d_up, sol, formulation='mtz', edges=None, sub=None):
+    """Regret of routing ``sol``; ``sub`` is an existing CVRPSubproblem to reuse instead of building one."""
+    if edges is None:
+        edges = EdgeIndex.from_dicts(len(N), d_down, d_up)
+    d_wst = edges.wst(edges.mask(sol))
+    if sub is not None:
+        y_val, y_sol = sub.solve(d_wst)
+    else:
+        y_val, y_sol = solve_cvrp_bigM(N=N, E=edges.directed(), d=d_wst, Q=Q, q=q, formulation=formulation,
+                                       edges=edges)
+    cost_x = edges.cost(sol)
+    regret = cost_x - y_val
 
-def get_wst_scenario(n, sol, d_down, d_up):
-    wst = dict()
-    for i in range(n+1):
-        for j in range(i+1,n+1):
-            if sol[(i,j)]>0.5 or sol[(j,i)]>0.5:
-                wst[(i, j)] = wst[(j, i)] = d_up[(i,j)]
-            else:
-                wst[(i, j)] = wst[(j, i)] = d_down[(i,j)]
+    return regret, cost_x, y_val, y_sol
 
-    return wst
 
+def add_edge_vars(model, E, formulation):
+    """Routing variables over the edge set E.
+
+    The directed formulations ('mtz', 'cut') get a binary per key of E.
+    'undirected' gets one variable per edge (i, j), i < j: binary between
+    customers and in {0, 1, 2} on depot edges, so that a route may serve a
+    single customer.
+    """
+    if formulation != 'undirected':
+        return {e: model.addVar(vtype=GRB.BINARY, name="x[{}]".format(e)) for e in E}
+    pairs = sorted({(min(e), max(e)) for e in E})
+    return {e: model.addVar(vtype=GRB.INTEGER if e[0] == 0 else GRB.BINARY, ub=2 if e[0] == 0 else 1,
+                            name="x[{}]".format(e)) for e in pairs}
+
+
+def add_degree_constrs(model, x, N, formulation):
+    """One arc in and one arc out of every customer, or degree 2 in the undirected model."""
+    if formulation == 'undirected':
+        star = {i: [] for i in N}
+        for (i, j), var in x.items():
+            for k in (i, j):
+                if k != 0:
+                    star[k].append(var)
+        model.addConstrs(gp.quicksum(star[i]) == 2 for i in N)
+        return
+    V = [0] + N
+    # E may be sparse after preprocessing
+    model.addConstrs(gp.quicksum(x[i, j] for j in V if (i, j) in x) == 1 for i in N)
+    model.addConstrs(gp.quicksum(x[i, j] for i in V if (i, j) in x) == 1 for j in N)
 
-def get_regret(N, Q, q, d_down, d_up, sol):
-    d_wst = get_wst_scenario(n=len(N), sol=sol, d_down=d_down, d_up=d_up)
-    y_val, y_sol = solve_cvrp_bigM(N=N, E=d_down.keys(), d=d_wst, Q=Q, q=q)
-    cost_x = sum(d_up[e] * sol[e] for e in sol)
-    regret = sum(d_up[e] * sol[e] for e in sol) - y_val
 
-    return regret, cost_x, y_val, y_sol
+def add_capacity_constrs(model, x, N, Q, q, formulation):
+    """Capacity / subtour elimination for an edge model.
+
+    'mtz' adds the cumulative-load u variables with big-M rows; 'cut' and
+    'undirected' add nothing here and rely on ``separation.separate`` in the
+    callback, which needs the lazyConstraints and preCrush parameters.
+    """
+    V = [0] + N
+    if formulation == 'mtz':
+        # the cumulative service capacity for i
+        u = model.addVars(V, vtype=GRB.CONTINUOUS, name="u")
+        u[0] = 0  # depot
+        # one pair of rows per arc into a customer, so a sparse E gets O(|E|) rows
+        arcs = [(i, j) for i, j in x if j != 0]
+        model.addConstrs(((u[i] + q[j]) <= (u[j] + Q * (1 - x[i, j]))) for i, j in arcs)
+        model.addConstrs(((u[i] + q[j]) >= (u[j] - (Q - q[i] - q[j]) * (1 - x[i, j]))) for i, j in arcs)
+    elif formulation not in CUT_FORMULATIONS:
+        raise ValueError('unknown formulation: {}'.format(formulation))
+    model._x, model._N, model._Q, model._q = x, N, Q, q
+    model._formulation = formulation
 
 
 #---V：include depot node 0  N：all customer node(i..n)  E：all edges
 #   d: cost  q:demand  Q:capacity limitation for the vehicle---#
-def solve_cvrp_bigM(N, E, d, Q, q, time_limit=360):
-    V = [0] + N
-    model = gp.Model("CVRP")
-    ### Variable
-    # x 0-1
-    x = {e: model.addVar(vtype=GRB.BINARY, name="x[{}]".format(e)) for e in E}
-    # x = {(i, j): model.addVar(vtype=GRB.BINARY) for i in V for j in V if i != j}
-    # the cumulative service capacity for i
-    u = model.addVars(V,vtype=GRB.CONTINUOUS)
-    u[0] = 0  # depot
-    model.update()
+class CVRPSubproblem:
+    """Inner CVRP model built once per instance.
+
+    Only the objective coefficients change between calls to ``solve``, so the
+    O(n^2) binaries and the capacity rows are created a single time.  The
+    previous optimal route and any routes passed by the caller are loaded as
+    MIP starts.
+    """
 
-    ### Objective
-    model.setObjective(gp.quicksum(d[e] * x[e] for e in E), GRB.MINIMIZE)
-    # model.setObjective(gp.quicksum(d[i, j] * x[i, j] for i, j in E), GRB.MINIMIZE)
+    def __init__(self, N, E, Q, q, time_limit=360, threads=1, formulation='mtz', edges=None):
+        t_start = time.time()
+        model = gp.Model("CVRP")
+        ### Variable
+        # x 0-1 (0-1-2 on depot edges of the undirected model)
+        x = add_edge_vars(model, E, formulation)
+        model.update()
+
+        ### Objective: coefficients are filled in by solve()
+        model.ModelSense = GRB.MINIMIZE
+
+        ### Constraints
+        add_degree_constrs(model, x, N, formulation)
+        add_capacity_constrs(model, x, N, Q, q, formulation)
+
+        model.Params.outputFlag = False
+        model.Params.threads = threads
+        model.Params.MIPGap = 0.0
+        if formulation in CUT_FORMULATIONS:
+            model.Params.lazyConstraints = 1
+            model.Params.preCrush = 1
+        if time_limit is not None:
+            model.Params.timeLimit = time_limit
+        model.update()
+
+        self.model, self.x = model, x
+        self._edges = list(x.keys())
+        self._vars = [x[e] for e in self._edges]
+        # position of each variable in an EdgeIndex cost vector
+        self._eid = edges.ids(self._edges) if edges is not None else None
+        self._last = None
+        self.status = None
+        self.bound = None
+        self.build_time = time.time() - t_start
+        self.solve_time = 0.0
+        self.num_solves = 0
+        # split of the most recent solve: objective/start update vs. optimize
+        self.last_setup_time = 0.0
+        self.last_solve_time = 0.0
+
+    def saved_time(self):
+        """Model construction time avoided by reusing this object."""
+        return self.build_time * max(self.num_solves - 1, 0)
+
+    def solve(self, d, starts=(), threshold=None):
+        """Solve under edge costs ``d``; ``starts`` are extra edge dicts to warm start from.
+
+        ``d`` is an (i, j)-keyed dict or, when built with ``edges``, an EdgeIndex cost vector.
+        An undirected model counts both orientations of a start's edges.
+        With a ``threshold`` the solve only decides whether a routing cheaper
+        than ``threshold - EPS`` exists: it stops at the first such routing or
+        once its bound reaches ``threshold - EPS`` (status USER_OBJ_LIMIT), and
+        ``self.bound`` holds the bound reached.  Without one it is exact.
+        """
+        model = self.model
+        if threshold is None:
+            model.Params.BestObjStop = -GRB.INFINITY
+            model.Params.BestBdStop = GRB.INFINITY
+        else:
+            # strictly below threshold - EPS, so that the caller's test y_val + EPS < threshold holds
+            model.Params.BestObjStop = threshold - 2 * EPS
+            model.Params.BestBdStop = threshold - EPS
+        t_setup = time.time()
+        if self._eid is not None and not isinstance(d, dict):
+            model.setAttr("Obj", self._vars, d[self._eid].tolist())
+        else:
+            model.setAttr("Obj", self._vars, [d[e] for e in self._edges])
+
+        starts = [s for s in ([self._last] + list(starts)) if s]
+        model.NumStart = len(starts)
+        for k, start in enumerate(starts):
+            model.Params.StartNumber = k
+            if model._formulation == 'undirected':
+                values = [float(round(start.get(e, 0) + start.get(e[::-1], 0))) for e in self._edges]
+            else:
+                values = [1.0 if start.get(e, 0) > 0.5 else 0.0 for e in self._edges]
+            model.setAttr("Start", self._vars, values)
 
-    ### Constraints
-    model.addConstrs(gp.quicksum(x[i,j] for j in V if i != j) == 1 for i in N)
-    model.addConstrs(gp.quicksum(x[i,j] for i in V if i != j) == 1 for j in N)
-    model.addConstrs( ( (u[i] + q[j]) <= (u[j] + Q*(1-x[i,j])) ) for i in V for j in N if i!=j)
-    model.addConstrs( ( (u[i] + q[j])
-                      >= ( u[j] - (Q - q[i] - q[j])*(1-x[i,j]) ) ) for i in V for j in N if i!=j)
+        t_start = time.time()
+        self.last_setup_time = t_start - t_setup
+        if model._formulation in CUT_FORMULATIONS:
+            model.optimize(separation.separate)
+        else:
+            model.optimize()
+        self.last_solve_time = time.time() - t_start
+        self.solve_time += self.last_solve_time
+        self.num_solves += 1
+        self.status = model.Status
+        self.bound = model.ObjBound
+
+        if model.SolCount <= 0:
+            return None, None
+        x_sol = dict(zip(self._edges, (round(v) for v in model.getAttr("X", self._vars))))
+        self._last = x_sol
+        return (model.ObjVal), x_sol
+
+    def pool(self, limit):
+        """Up to ``limit`` sub-optimal solutions of the last solve, best first, as edge dicts like ``solve``'s."""
+        model = self.model
+        out = []
+        for k in range(1, min(model.SolCount, limit + 1)):
+            model.Params.SolutionNumber = k
+            out.append(dict(zip(self._edges, (round(v) for v in model.getAttr("Xn", self._vars)))))
+        return out
+
+
+def solve_cvrp_bigM(N, E, d, Q, q, time_limit=360, formulation='mtz', edges=None):
+    return CVRPSubproblem(N, E, Q, q, time_limit=time_limit, formulation=formulation, edges=edges).solve(d)
+
+
+def benders_expr(model, y_sol):
+    """Cost of route set ``y_sol`` under the worst case of the master's x: sum d_down + delta * [e used by x].
+
+    ``y_sol`` lists the edges of the routes, an edge travelled twice appearing twice.
+    As in EdgeIndex.mask, an edge is used by x when either direction is
+    (set_bd_model's ``_cut_x``), so a route is credited the same whichever way
+    it is driven.  Edges removed by preprocessing have x = 0 and only contribute d_down.
+    """
+    edges = model._edges
+    ids = edges.ids(y_sol)
+    cut_x = model._cut_x
+    terms = [(c, v) for c, e in zip(edges.delta[ids].tolist(), y_sol) if e in cut_x for v in cut_x[e]]
+    return gp.LinExpr([c for c, _ in terms], [v for _, v in terms]) + float(edges.d_down[ids].sum())
+
+
+def conclusive(entry, r_sol):
+    """Whether a cached subproblem result settles the cut question for ``r_sol``.
+
+    An exact result always does; one stopped early does when its routing cuts
+    off ``r_sol`` or its bound shows that no routing can.
+    """
+    y_val, _, status, bound = entry
+    return status == GRB.OPTIMAL or y_val + EPS < r_sol or bound + EPS >= r_sol
+
+
+def select_cuts(edges, d_wst, r_sol, candidates, limit, overlap=0.8):
+    """Route sets of ``candidates`` whose cuts are violated at the incumbent, for one callback.
+
+    Candidates are edge lists like benders_expr's; their cut value at the
+    incumbent is their cost under ``d_wst``.  The most violated come first.  A
+    candidate sharing more than ``overlap`` of its edges (Jaccard) with an
+    already chosen one gives an almost parallel cut and is skipped.
+    """
+    scored = []
+    for y in candidates:
+        ids = edges.ids(y)
+        scored.append((r_sol - float(d_wst[ids].sum()), frozenset(ids.tolist()), y))
+    scored.sort(key=lambda c: -c[0])
+    chosen = []
+    for violation, support, y in scored:
+        if len(chosen) >= limit or violation <= EPS:
+            break
+        if all(len(support & s) <= overlap * len(support | s) for _, s, _ in chosen):
+            chosen.append((violation, support, y))
+    return [y for _, _, y in chosen]
 
-    # model.addConstr(gp.quicksum(x[j, 0] for j in N) >= 1)
 
-    model.Params.outputFlag = False
-    model.Params.threads = 1
-    model.Params.MIPGap = 0.0
-    # model.Params.lazyConstraints = 1
-    if time_limit is not None:
-        model.Params.timeLimit = time_limit
-    model.optimize()
-    if model.SolCount <= 0:
-        return None, None
-    x_sol = {e: round(x[e].x) for e in x}
-    return (model.ObjVal), x_sol
+def pool_candidates(mod, d_wst):
+    """Route sets from the subproblem's solution pool and their local-search improvements."""
+    d = mod._edges.to_dict(d_wst)
+    out = []
+    for x_sol in mod._sub.pool(mod._multi_cut):
+        routes = sol_routes(x_sol)
+        out.append(route_edges(routes))
+        out.append(route_edges(local_search(routes, d, mod._q, mod._Q)))
+    return out
 
 
-def set_bd_model(N, E, Q, q, d_down, d_up):
-    V = [0] + N
+def set_bd_model(N, E, Q, q, d_down, d_up, threads=1, formulation='mtz', sub_formulation='mtz', edges=None):
+    if edges is None:
+        edges = EdgeIndex.from_dicts(len(N), d_down, d_up)
     model = gp.Model("BD")
     # x: 决策变量 表示边x是否被选择
-    x = {e: model.addVar(vtype=GRB.BINARY, name="x[{}]".format(e)) for e in E}
+    x = add_edge_vars(model, E, formulation)
     # r: 内部TSP值 r<=sum(yl+sum y(u-l)x
-    r = model.addVar(vtype=GRB.CONTINUOUS, ub=sum(d_up.values())  , name="r")
-    u = model.addVars(V, vtype=GRB.CONTINUOUS, name="u")
-    u[0] = 0  # 在仓库节点的已服务量为 0
+    r = model.addVar(vtype=GRB.CONTINUOUS, ub=2 * float(edges.d_up.sum()), name="r")
+    # Benders割中的x: 割按无向边计价 (最坏情景中边 e 被选择即取 d_up)
+    # 有向模型: 顾客边 x[i,j] + x[j,i]; 仓库边可往返 (0-i-0), 用 z = [x[0,i] + x[i,0] >= 1]
+    # 无向模型: 仓库边 x in {0,1,2}, 用 z = [x >= 1]
+    cut_x = dict()
+    for (i, j), var in x.items():
+        if (i, j) in cut_x:
+            continue
+        arcs = [var] if formulation == 'undirected' else [x[e] for e in ((i, j), (j, i)) if e in x]
+        if i == 0 or j == 0:
+            z = model.addVar(vtype=GRB.BINARY, name="z[{}]".format((min(i, j), max(i, j))))
+            model.addConstr(z <= gp.quicksum(arcs))
+            model.addConstr(2 * z >= gp.quicksum(arcs))
+            arcs = [z]
+        cut_x[i, j] = cut_x[j, i] = arcs
     model.update()
 
-    model.setObjective(gp.quicksum(d_up[e] * x[e] for e in x) - r, GRB.MINIMIZE)
+    model.setObjective(gp.LinExpr(edges.d_up[edges.ids(x)].tolist(), list(x.values())) - r, GRB.MINIMIZE)
     # flow cut
-    # 流量约束：每个顾客节点进一次 出一次
-    model.addConstrs(gp.quicksum(x[i, j] for j in V if j != i) == 1 for i in N)
-    model.addConstrs(gp.quicksum(x[i, j] for i in V if i != j) == 1 for j in N)
+    # 流量约束：每个顾客节点进一次 出一次（无向模型：度为2）
+    add_degree_constrs(model, x, N, formulation)
 
     # 容量限制：车到达节点i时的剩余容量，不超过车容量限制同时要大于节点i的需求
-    model.addConstrs(((u[i] + q[j]) <= (u[j] + Q * (1 - x[i, j]))) for i in V for j in N if i != j)
-    model.addConstrs(((u[i] + q[j])
-                      >= (u[j] - (Q - q[i] - q[j]) * (1 - x[i, j]))) for i in V for j in N if i != j)
+    add_capacity_constrs(model, x, N, Q, q, formulation)
 
     model.Params.outputFlag = False
-    model.Params.threads = 1
+    model.Params.threads = threads
     model.Params.MIPGap = 0.0
 
-    model._x, model._r = x, r
-    model._N = N
-    model._Q = Q
-    model._q = q
-    model._d_down, model._d_up = d_down, d_up
+    model._r = r
+    model._cut_x = cut_x
+    model._edges = edges
+    # inner CVRP, built once and re-solved with new objective coefficients
+    model._sub = CVRPSubproblem(N, E, Q, q, threads=threads, formulation=sub_formulation, edges=edges)
+    model._cache = CutCache()
+    # 'tiered': try a heuristic route before the exact subproblem; 'exact': always solve the MIP
+    model._oracle = 'tiered'
+    model._log_cuts = False
+    model._cut_tiers = {'cache': 0, 'pool': 0, 'heuristic': 0, 'exact': 0}
+    # every routing seen (subproblem, heuristics, incumbents), re-scored against each new scenario
+    model._route_pool = RoutePool(edges)
+    # cuts per exact callback taken from the subproblem's solution pool (1: the optimal route set only)
+    model._multi_cut = 1
+    model._pool_cuts = 0
+    # stop the exact subproblem once it decides y_val < r_sol - EPS either way
+    model._early_stop = False
+    # Checkpoint written from the callback (None: no checkpointing)
+    model._checkpoint = None
+    # wall-clock start of the run, for the checkpoint's elapsed time
+    model._t_run = time.time()
+    model._trace = None
+    model._ttb = None
+    # MIPNODE primal heuristic: run every _heur_freq nodes (0: never), once per distinct route set
+    model._heur_freq = 0
+    model._heur_next = 0
+    model._heur_seen = set()
+    model._heur_solutions = 0
+    # incumbents whose subproblem found no routing before its time limit
+    model._undecided = 0
     # lazyconstraints callback
     model.Params.lazyConstraints = 1
+    if formulation in CUT_FORMULATIONS:
+        model.Params.preCrush = 1
     model.update()
 
     return model, x, r
 
 
+def route_start(model, routes):
+    """Values of the master's x for a set of routes, in the model's edge encoding.
+
+    Edges the model does not have (removed by preprocessing) are dropped, and
+    Gurobi then rejects the start.
+    """
+    values = dict.fromkeys(model._x, 0.0)
+    for i, j in route_edges(routes):
+        e = (min(i, j), max(i, j)) if model._formulation == 'undirected' else (i, j)
+        if e in values:
+            values[e] += 1.0
+    return values
+
+
+def warm_start(model, N, Q, q):
+    """Heuristic incumbent and Benders cuts before the branch-and-cut starts.
+
+    Clarke-Wright with local search is run on the d_up, d_down and midpoint
+    scenarios.  Each distinct routing gets its exact regret from get_regret on
+    the master's subproblem.  The inner optimum and the routing itself are
+    added as Benders cuts, and the result is cached for the incumbent callback.
+    The best routing becomes the MIP start.  Returns (regret, routes) of that
+    routing.
+    """
+    edges = model._edges
+    best_regret, best_routes = None, None
+    seen = set()
+    for d in (edges.d_up, edges.d_down, (edges.d_up + edges.d_down) / 2):
+        _, routes = solve_cvrp_heuristic(N, edges.to_dict(d), q, Q)
+        x_e = dict.fromkeys(route_edges(routes), 1)
+        key = edge_key(len(N), x_e)
+        if key in seen:
+            continue
+        seen.add(key)
+        model._route_pool.add(x_e)
+        regret, cost_x, y_val, y_sol = get_regret(N, Q, q, None, None, x_e, edges=edges, sub=model._sub)
+        if y_sol is None:
+            continue
+        y_sol = [e for e in y_sol for _ in range(round(y_sol[e]))]
+        model._route_pool.add(y_sol)
+        model._cache.put(key, y_val, y_sol, model._sub.status)
+        for support in (y_sol, list(x_e)):
+            model.addConstr(benders_expr(model, support) >= model._r)
+            if model._checkpoint is not None:
+                model._checkpoint.add_cut(support)
+        if best_regret is None or regret < best_regret:
+            best_regret, best_routes = regret, routes
+    if best_routes is not None:
+        # r (and the MTZ loads) are left to Gurobi, which completes the start with the largest r the cuts allow
+        values = route_start(model, best_routes)
+        for e, var in model._x.items():
+            var.Start = values[e]
+    return best_regret, best_routes
+
+
+def node_heuristic(mod):
+    """Round the node relaxation into routes and pass them to Gurobi as a new solution.
+
+    The midpoint costs are discounted by the relaxation values, so edges the
+    LP uses are favoured by Clarke-Wright and local search.  Runs at most once
+    every ``_heur_freq`` nodes and skips route sets it has already proposed;
+    Gurobi fills in r and the incumbent callback checks the solution.
+    """
+    if not mod._heur_freq or mod.cbGet(GRB.Callback.MIPNODE_STATUS) != GRB.OPTIMAL:
+        return
+    nodes = mod.cbGet(GRB.Callback.MIPNODE_NODCNT)
+    if nodes < mod._heur_next:
+        return
+    mod._heur_next = nodes + mod._heur_freq
+    x_rel = mod.cbGetNodeRel(mod._x)
+    edges = mod._edges
+    used = np.zeros(len(edges))
+    np.add.at(used, edges.ids(x_rel), list(x_rel.values()))
+    d = (edges.d_up + edges.d_down) / 2 * (1 - np.clip(used, 0, 1))
+    _, routes = solve_cvrp_heuristic(mod._N, edges.to_dict(d), mod._q, mod._Q)
+    mod._route_pool.add(route_edges(routes))
+    key = edge_key(len(mod._N), dict.fromkeys(route_edges(routes), 1))
+    if key in mod._heur_seen:
+        return
+    mod._heur_seen.add(key)
+    values = route_start(mod, routes)
+    mod.cbSetSolution(list(mod._x.values()), [values[e] for e in mod._x])
+    mod._heur_solutions += 1
+
+
+def checkpoint_tick(mod, where):
+    """Record the master bound in the checkpoint and write it when it is due."""
+    bound = {GRB.Callback.MIP: GRB.Callback.MIP_OBJBND, GRB.Callback.MIPSOL: GRB.Callback.MIPSOL_OBJBND,
+             GRB.Callback.MIPNODE: GRB.Callback.MIPNODE_OBJBND}.get(where)
+    if bound is None:
+        return
+    ckpt = mod._checkpoint
+    ckpt.update(mod.cbGet(GRB.Callback.RUNTIME), bound=mod.cbGet(bound))
+    if ckpt.due():
+        ckpt.save()
+
+
 # BC call back
 def gen_cut(mod, where):
     """Callback to add a cut for branch-and-cut framework for benders mod"""
+    if mod._checkpoint is not None:
+        checkpoint_tick(mod, where)
+    # capacity cuts first: an incumbent that breaks capacity gets no Benders cut
+    if mod._formulation in CUT_FORMULATIONS and separation.separate(mod, where):
+        return
+    if where == GRB.Callback.MIPNODE:
+        node_heuristic(mod)
+        return
     # Execute the function when an incumbent is found
     if where != GRB.Callback.MIPSOL:
         return
+    t_start = time.time()
 
     x_sol = mod.cbGetSolution(mod._x)
 
@@ -118,85 +472,292 @@ def gen_cut(mod, where):
 
     # Obtain the incumbent solution
     r_sol = mod.cbGetSolution(mod._r)
-    d_up, d_down = mod._d_up, mod._d_down
-
-    # x_sol_2 = {e:1 if x_sol[e]>0.5 else 0 for e in x_sol}
-    # Prepare worst-case scenario
-    d_wst = get_wst_scenario(n=len(mod._N), sol=x_sol, d_down=d_down, d_up=d_up)
-
-    y_val, y_sol = solve_cvrp_bigM(N=mod._N, E=d_down.keys(), d=d_wst, Q=mod._Q, q=mod._q)
-    # print('y_va;:{} r_sol:{}'.format(y_val, r_sol))
-    y_sol = {e for e in d_down if y_sol[e] > 0.5}
-    if y_val + EPS < r_sol:
+    edges = mod._edges
+
+    # Prepare worst-case scenario, updated from the previous incumbent's vector
+    d_wst = edges.wst(edges.mask(x_sol))
+
+    # the incumbent is itself a feasible routing
+    pool = mod._route_pool
+    incumbent = route_edges(sol_routes(x_sol))
+    pool.add(incumbent)
+
+    # an incumbent with the same edge set gives the same scenario and the same cut
+    key = edge_key(len(mod._N), x_sol)
+    entry = mod._cache.get(key)
+    heur_time = sub_setup = sub_optimize = 0.0
+    if entry is not None and conclusive(entry, r_sol):
+        y_val, y_sol = entry[:2]
+        tier = 'cache'
+    else:
+        # the incumbent as routes, so that directed and undirected models can start from it
+        starts = [dict.fromkeys(incumbent, 1) if mod._formulation == 'undirected' else x_sol]
+        y_val = None
+        if mod._oracle == 'tiered':
+            # any feasible route set gives a valid cut, so try the cheapest pooled one, then a new heuristic one
+            t_heur = time.time()
+            p_val, p_sol = pool.best(d_wst)
+            if p_val is not None and p_val + EPS < r_sol:
+                y_val, y_sol, tier = p_val, p_sol, 'pool'
+            else:
+                h_val, routes = solve_cvrp_heuristic(mod._N, edges.to_dict(d_wst), mod._q, mod._Q)
+                pool.add(route_edges(routes))
+                starts.append(dict.fromkeys(route_edges(routes), 1))
+                if p_sol is not None:
+                    starts.append(dict.fromkeys(p_sol, 1))
+                if h_val + EPS < r_sol:
+                    y_val, y_sol, tier = h_val, set(route_edges(routes)), 'heuristic'
+            heur_time = time.time() - t_heur
+        if y_val is None:
+            # warm start from the previous optimal route, the incumbent and the heuristic route;
+            # with early_stop the solve ends as soon as the cut question for r_sol is settled
+            y_val, y_sol = mod._sub.solve(d_wst, starts=starts, threshold=r_sol if mod._early_stop else None)
+            # print('y_va;:{} r_sol:{}'.format(y_val, r_sol))
+            if y_sol is None:
+                # stopped (bound reached or time limit) before any routing was found: nothing to cache,
+                # and a cut needs a routing, so the cheapest pooled one stands in if it is violated
+                y_val, y_sol = mod._sub.bound, []
+                p_val, p_sol = pool.best(d_wst)
+                if p_val is not None and p_val + EPS < r_sol:
+                    y_val, y_sol = p_val, p_sol
+            else:
+                y_sol = [e for e in y_sol for _ in range(round(y_sol[e]))]
+                mod._cache.put(key, y_val, y_sol, mod._sub.status, mod._sub.bound)
+                pool.add(y_sol)
+            sub_setup, sub_optimize = mod._sub.last_setup_time, mod._sub.last_solve_time
+            tier = 'exact'
+    # no routing and a bound below r_sol: the incumbent can be neither cut off nor shown valid
+    undecided = not y_sol and y_val + EPS < r_sol
+    cut = bool(y_sol) and y_val + EPS < r_sol
+    supports = [y_sol]
+    if cut and tier == 'exact' and mod._multi_cut > 1:
+        # every feasible route set gives a valid cut: add the violated, mutually different ones
+        candidates = pool_candidates(mod, d_wst)
+        for y in candidates:
+            pool.add(y)
+        supports = select_cuts(edges, d_wst, r_sol, [y_sol] + candidates, mod._multi_cut)
+    if cut:
         # Add bd cuts
         # bd
-        # print('y_va;:{} r_sol:{}'.format(y_val, r_sol))
-        mod.cbLazy(gp.quicksum(d_down[e] + (d_up[e] - d_down[e]) * mod._x[e] for e in y_sol) >= mod._r)
+        for y in supports:
+            mod.cbLazy(benders_expr(mod, y) >= mod._r)
+            if mod._checkpoint is not None:
+                mod._checkpoint.add_cut(y)
+        mod._pool_cuts += len(supports) - 1
         # mod.cbLazy(gp.quicksum(d_wst[e] for e in y_sol) >= mod._r)  # 上下这两个约束解还不一样
-        return
-    mod._ttb = ttb
+        mod._cut_tiers[tier] += 1
+        if mod._log_cuts:
+            print('cut tier:{} y_val:{:.4f} r_sol:{:.4f}'.format(tier, y_val, r_sol))
+    elif undecided:
+        # Gurobi keeps the incumbent; it is not reported as accepted, and get_regret checks the final routing
+        mod._undecided += 1
+    else:
+        mod._ttb = ttb
+        if mod._checkpoint is not None:
+            # an incumbent without a cut is accepted by Gurobi
+            mod._checkpoint.update(time.time() - mod._t_run, obj=mod.cbGet(GRB.Callback.MIPSOL_OBJ),
+                                   incumbent=incumbent, r=r_sol)
+    if mod._trace is not None:
+        mod._trace.record('benders', runtime=ttb, wall=time.time() - t_start, tier=tier,
+                          heur_time=heur_time, sub_setup=sub_setup, sub_optimize=sub_optimize,
+                          y_val=y_val, r_sol=r_sol, violation=r_sol - y_val, cut=cut, undecided=undecided,
+                          sub_status=mod._sub.status if tier == 'exact' else None,
+                          pool_cuts=len(supports) - 1,
+                          bound=mod.cbGet(GRB.Callback.MIPSOL_OBJBND),
+                          incumbent=mod.cbGet(GRB.Callback.MIPSOL_OBJBST),
+                          nodes=mod.cbGet(GRB.Callback.MIPSOL_NODCNT))
     return
 
 
-def solve_bc(n, Q, q, d_down, d_up, time_limit):
+def solve_bc(n, Q, q, d_down, d_up, time_limit, cache=None, threads=1, formulation='mtz', sub_formulation='mtz',
+             oracle='tiered', log_cuts=False, edges=None, trace=None, seed=0, warm=True, heur_freq=500,
+             reduce=preprocess.EXACT_RULES, multi_cut=1, route_pool=None, early_stop=True, checkpoint=None,
+             checkpoint_every=60.0, candidates=None):
+    """Branch-and-cut for the min-max-regret CVRP.
+
+    ``trace`` is a CallbackTrace or a JSONL file name that receives one record per
+    Benders callback and a final summary.  ``warm`` runs ``warm_start`` first;
+    ``heur_freq`` is the node interval of the MIPNODE heuristic (0 disables it).
+    ``reduce`` lists the preprocess rules whose edges are left out of the master
+    and the subproblem (empty: the complete edge set).  ``multi_cut`` is the
+    largest number of cuts an exact subproblem solve adds, taken from its
+    solution pool by select_cuts.  ``route_pool`` is a RoutePool kept from an
+    earlier run of the same instance, as ``cache`` is.  ``early_stop`` lets
+    the callback's subproblem solves stop at r_sol (CVRPSubproblem.solve's
+    threshold); get_regret still solves exactly.  ``checkpoint`` is a Checkpoint
+    or a JSON file name: the run resumes from it when it exists and writes it
+    every ``checkpoint_every`` seconds and at the end.  ``candidates`` is a keep
+    mask over the edges (sparse_graph.knn_mask) that restricts both models
+    further; see solve_sparse.  When some incumbent was left undecided (no
+    routing and no conclusive bound from the subproblem) the result is
+    unproven: the returned bound is None, and the checkpoint and the trace
+    summary get status SUBOPTIMAL instead of OPTIMAL.
+    """
+    t_run = time.time()
     N = [i for i in range(1,n+1)]
-    model, x, _ = set_bd_model(N, d_down.keys(), Q, q, d_down, d_up)
+    if edges is None:
+        edges = EdgeIndex.from_dicts(n, d_down, d_up)
+    E = d_down.keys() if d_down is not None else edges.directed()
+    if reduce:
+        keep, counts = preprocess.reduce_edges(edges, q, Q, reduce)
+        E = preprocess.reduced_edges(edges, keep, E)
+        print('preprocess {}'.format(preprocess.summary(keep, counts)))
+    if candidates is not None:
+        E = preprocess.reduced_edges(edges, candidates, E)
+    model, x, r = set_bd_model(N, E, Q, q, d_down, d_up, threads=threads,
+                               formulation=formulation, sub_formulation=sub_formulation, edges=edges)
     model.Params.timeLimit = time_limit
+    model.Params.seed = seed
+    model._t_run = t_run
+    model._sub.model.Params.seed = seed
+    model._oracle, model._log_cuts = oracle, log_cuts
+    model._multi_cut = multi_cut
+    model._early_stop = early_stop
+    own_trace = isinstance(trace, str)
+    if own_trace:
+        trace = CallbackTrace(trace)
+    model._trace = trace
+    if trace is not None and reduce:
+        trace.record('preprocess', edges=len(edges), kept=int(keep.sum()), removed=counts)
+    # cuts remembered from an earlier run are valid for any incumbent
+    if cache is not None:
+        model._cache = cache
+    for y_sol in model._cache.supports():
+        model.addConstr(benders_expr(model, y_sol) >= r)
+    if route_pool is not None:
+        model._route_pool = route_pool
+    if isinstance(checkpoint, str):
+        checkpoint = Checkpoint.load(checkpoint, checkpoint_every)
+    if checkpoint is not None:
+        # cuts of the earlier runs become regular constraints
+        for y_sol in checkpoint.supports():
+            model.addConstr(benders_expr(model, y_sol) >= r)
+        print('checkpoint runs:{} elapsed:{:.1f} cuts:{} obj:{}'.format(
+            checkpoint.runs, checkpoint.elapsed, len(checkpoint.cuts), checkpoint.obj))
+        model._checkpoint = checkpoint
+    model._heur_freq = heur_freq
+    if warm:
+        t_warm = time.time()
+        warm_regret, _ = warm_start(model, N, Q, q)
+        print('warm_start regret:{} time:{:.2f}'.format(warm_regret, time.time() - t_warm))
+        if trace is not None:
+            trace.record('warm_start', regret=warm_regret, time=time.time() - t_warm)
+    if checkpoint is not None and checkpoint.incumbent is not None:
+        # the incumbent of the earlier runs replaces the warm start; with its r the cuts accept it as it is
+        values = route_start(model, sol_routes(dict.fromkeys(checkpoint.incumbent, 1)))
+        for e, var in x.items():
+            var.Start = values[e]
+        r.Start = checkpoint.r
     ## debug help
     model.optimize(gen_cut)
+    sub = model._sub
+    print('sub_solves:{} sub_time:{:.2f} build_time:{:.4f} saved:{:.2f}'.format(
+        sub.num_solves, sub.solve_time, sub.build_time, sub.saved_time()))
+    print('cache_hits:{} cache_misses:{} cache_size:{}'.format(
+        model._cache.hits, model._cache.misses, len(model._cache)))
+    print('cuts cache:{cache} pool:{pool} heuristic:{heuristic} exact:{exact}'.format(**model._cut_tiers))
+    print('route_pool size:{}'.format(len(model._route_pool)))
+    if multi_cut > 1:
+        print('pool cuts:{}'.format(model._pool_cuts))
+    print('node_heuristic solutions:{}'.format(model._heur_solutions))
+    status, bound = model.Status, model.objBound
+    if model._undecided:
+        # incumbents were kept without a subproblem answer: neither the optimum nor the bound is proven
+        print('undecided incumbents:{} (result unproven)'.format(model._undecided))
+        if status == GRB.OPTIMAL:
+            status = GRB.SUBOPTIMAL
+        bound = None
+    if checkpoint is not None:
+        checkpoint.runs += 1
+        checkpoint.status = status
+        checkpoint.update(time.time() - t_run, bound=bound)
+        if bound is None:
+            # drop the bound the callback recorded during the run
+            checkpoint.bound = None
+        checkpoint.save()
+        # a later call with the same object continues the elapsed time
+        checkpoint.base = checkpoint.elapsed
+    if trace is not None:
+        trace.record('summary', runtime=model.Runtime, status=status, nodes=model.NodeCount,
+                     obj=model.objVal if model.SolCount > 0 else None, bound=bound,
+                     sub_solves=sub.num_solves, sub_time=sub.solve_time, cut_tiers=model._cut_tiers,
+                     pool_cuts=model._pool_cuts, undecided=model._undecided)
+        if own_trace:
+            trace.close()
 
     if model.SolCount <= 0:
         return None, None, None
     sol = [e for e in x if x[e].x > 0.5]
+    if formulation == 'undirected':
+        # report directed route edges, as the other formulations do
+        sol = route_edges(sol_routes({e: x[e].x for e in sol}))
     x_e = dict()
     for i in range(n + 1):
         for j in range(n + 1):
             if i != j:
                 x_e[(i, j)] = 0
 
-    for i in range(n + 1):
-        for j in range(n + 1):
-            if (i, j) in sol:
-                x_e[(i, j)] = 1
+    for e in sol:
+        x_e[e] = 1
 
     obj = (model.objVal)
-    bound = (model.objBound + 1 - EPS)
+    if bound is not None:
+        bound = (bound + 1 - EPS)
     return (obj, bound, sol, model._ttb, x_e)
 
 
-# RCVRP 测试数据
-def get_robust_rcvrp_instance(filename):
-    with open(filename, 'r') as f:
-        lines = [line.rstrip() for line in f.readlines()]
-    n = int(lines.pop(0))
-
-    #  标记矩阵和需求的分割点
-    marker_index = 0
-    for i, line in enumerate(lines):
-        if line.startswith('node_demand'):
-            marker_index = i
+def solve_sparse(n, Q, q, d_down, d_up, time_limit, k=10, price_rounds=3, price_limit=None, edges=None,
+                 reduce=preprocess.EXACT_RULES, warm=True, **kwargs):
+    """solve_bc on the k-nearest-neighbour candidate graph, adding edges back by pricing.
+
+    Both models are restricted to sparse_graph.knn_mask(k).  After each solve
+    the Benders cuts found so far price the master's LP relaxation
+    (sparse_graph.price_edges, at most ``price_limit`` edges per LP round);
+    the edges with a negative reduced cost join the graph and the instance is
+    solved again, at most ``price_rounds`` times, within ``time_limit`` in
+    total.  Cuts and incumbent are carried over in an in-memory Checkpoint.
+    The returned obj is that of the restricted models and the bound is None:
+    neither holds on the complete graph, where get_regret gives the regret of
+    the routing.
+    """
+    if edges is None:
+        edges = EdgeIndex.from_dicts(n, d_down, d_up)
+    allowed = preprocess.reduce_edges(edges, q, Q, reduce)[0] if reduce else np.ones(len(edges), dtype=bool)
+    keep = sparse_graph.knn_mask(edges, k) & allowed
+    checkpoint = Checkpoint(None)
+    for round_idx in range(price_rounds + 1):
+        print('sparse round:{} {}'.format(round_idx, sparse_graph.summary(keep)))
+        res = solve_bc(n, Q, q, d_down, d_up, max(time_limit - checkpoint.elapsed, 0.0), edges=edges, reduce=reduce,
+                       warm=warm and round_idx == 0, checkpoint=checkpoint, candidates=keep, **kwargs)
+        if round_idx == price_rounds or checkpoint.elapsed >= time_limit:
             break
+        added = sparse_graph.price_edges(edges, keep, q, Q, checkpoint.supports(), allowed=allowed,
+                                         limit=price_limit)
+        print('pricing added:{}'.format(int(added.sum())))
+        if not added.any():
+            break
+        keep |= added
+        # a bound of the smaller graph does not hold on the larger one
+        checkpoint.bound = None
+    if res[0] is None:
+        return res
+    obj, _, sol, ttb, x_e = res
+    return obj, None, sol, ttb, x_e
 
-    matrix = lines[:marker_index]
-    demand = lines[marker_index+1:]
-    # d = [[0] * (n+1) for i in range(n+1)]
-    d_up, d_down = dict(),dict()
-
-    for data in matrix:
-        dataList = data.split()
-        i, j = int(dataList[0]), int(dataList[1])
-        d_up[i,j],d_down[i,j] = float(dataList[2]),float(dataList[3])
-        d_up[j,i] = d_up[i,j]
-        d_down[j,i] = d_down[i,j]
 
-    q = [0 for _ in range(n+1)]
-    q[0] = 0
-    idx = 1
-    for data in demand:
-        q[idx] = float(data)
-        idx+=1
+# RCVRP 测试数据：已转换为 .npy store 时读其内存映射，否则解析文本
+def get_robust_rcvrp_instance(filename):
+    up, down, q = read_instance(filename)
+    n = len(q) - 1
+    up, down = up.tolist(), down.tolist()
+    d_up, d_down = dict(), dict()
+    # 与文本文件相同的键顺序：(i,j) 按行，i<j，随后是 (j,i)
+    for i in range(n + 1):
+        for j in range(i + 1, n + 1):
+            d_up[i, j], d_down[i, j] = up[i][j], down[i][j]
+            d_up[j, i], d_down[j, i] = d_up[i, j], d_down[i, j]
 
-    return n, d_up,d_down, q
+    return n, d_up, d_down, [float(v) for v in q]
 
 
 if __name__ == '__main__':
@@ -211,13 +772,24 @@ if __name__ == '__main__':
         #########
         n, d_up, d_down, q = get_robust_rcvrp_instance(ins_name)
 
+        cache_file = 'cache/R-{}-{}-{}.json'.format(n, int_max, idx)
+        solution_file = 'solution/R-{}-{}.jsonl'.format(n, int_max)
+        cache = CutCache.load(cache_file)
+        pool_file = 'cache/R-{}-{}-{}-routes.npz'.format(n, int_max, idx)
+        edges = EdgeIndex.from_dicts(n, d_down, d_up)
+        route_pool = RoutePool.load(pool_file, edges)
+
         t_start = time.time()
-        obj, bound, sol, ttb, x_e = solve_bc(n=n, Q=Q, q=q, d_down=d_down, d_up=d_up, time_limit=time_limit)
+        obj, bound, sol, ttb, x_e = solve_bc(n=n, Q=Q, q=q, d_down=d_down, d_up=d_up, time_limit=time_limit,
+                                             cache=cache, edges=edges, route_pool=route_pool)
         t_end = time.time()
+        cache.save(cache_file)
+        route_pool.save(pool_file)
 
         regret, cost_x, y_val, y_sol = get_regret(N, Q, q, d_down, d_up, x_e)
 
         print('obj:{}'.format(obj))
         print('regret:{}'.format(regret))
         print('sol:{}'.format(sol))
-
+        append_record(solution_file, make_record('R-{}-{}-{}'.format(n, int_max, idx), obj, regret, sol,
+                                                 bound=bound, ttb=ttb, runtime=t_end - t_start))
@@ -0,0 +1,413 @@
+"""Thin MIP solver layer: model construction, parameters and lazy constraints.
+
+Variables are integer handles, linear expressions are lists of (coef, var)
+pairs and a constraint is a tuple (terms, sense, rhs) with sense '<', '>' or
+'='.  ``optimize(lazy)`` calls ``lazy(values)`` on integer solutions, where
+``values`` is the list of variable values.  The callback returns constraints
+the solution violates:
+- GurobiBackend adds them with cbLazy inside the branch-and-cut;
+- HighsBackend, whose Python API has no lazy-constraint callback, adds them as
+  rows and re-solves until an optimal solution violates nothing (row generation);
+- PulpBackend runs CBC through PuLP, one CBC process per solve, with the same
+  row generation.
+The optional ``user_cuts(values)`` separates fractional points.  Gurobi applies it
+at every optimal node relaxation (cbCut); HiGHS and CBC run it as a
+cutting-plane loop on the root LP before the first MIP solve.
+
+Statuses are reported with Gurobi's codes for every backend, so traces and
+benchmarks of different backends compare directly.
+
+    model = get_backend('highs', name='master')
+
+highspy (pip install highspy) and PuLP (pip install pulp, which ships a CBC
+binary) are imported only when their backend is created.
+"""
+import time
+
+import numpy as np
+
+OPTIMAL = 2
+INFEASIBLE = 3
+TIME_LIMIT = 9
+OTHER = 0
+
+BINARY, INTEGER, CONTINUOUS = 'B', 'I', 'C'
+
+
+class GurobiBackend:
+    def __init__(self, name='model'):
+        import gurobipy as gp
+        from gurobipy import GRB
+        self._gp, self._GRB = gp, GRB
+        self.model = gp.Model(name)
+        self.model.Params.outputFlag = False
+        self._vars = []
+        self.status = None
+        self.callbacks = 0
+
+    def add_var(self, vtype=BINARY, lb=0.0, ub=1.0, obj=0.0, name=''):
+        vtype = {BINARY: self._GRB.BINARY, INTEGER: self._GRB.INTEGER, CONTINUOUS: self._GRB.CONTINUOUS}[vtype]
+        self._vars.append(self.model.addVar(vtype=vtype, lb=lb, ub=ub, obj=obj, name=name))
+        return len(self._vars) - 1
+
+    def _expr(self, terms):
+        return self._gp.LinExpr([c for c, _ in terms], [self._vars[v] for _, v in terms])
+
+    def _constr(self, terms, sense, rhs):
+        expr = self._expr(terms)
+        return expr <= rhs if sense == '<' else expr >= rhs if sense == '>' else expr == rhs
+
+    def add_constr(self, terms, sense, rhs):
+        self.model.addConstr(self._constr(terms, sense, rhs))
+
+    def set_objective(self, costs, constant=0.0):
+        """Minimize sum costs[v] * v + constant; ``costs`` is {var: coef} and replaces the previous costs."""
+        self.model.setAttr('Obj', self._vars, [costs.get(v, 0.0) for v in range(len(self._vars))])
+        self.model.ObjCon = constant
+
+    def set_params(self, time_limit=None, threads=None, mip_gap=None, seed=None):
+        params = self.model.Params
+        if time_limit is not None:
+            params.timeLimit = time_limit
+        if threads is not None:
+            params.threads = threads
+        if mip_gap is not None:
+            params.MIPGap = mip_gap
+        if seed is not None:
+            params.seed = seed
+
+    def set_start(self, values):
+        """MIP start {var: value}; variables left out are completed by the solver."""
+        self.model.NumStart = 1
+        for v, val in values.items():
+            self._vars[v].Start = val
+
+    def optimize(self, lazy=None, user_cuts=None):
+        model, GRB = self.model, self._GRB
+
+        def callback(m, where):
+            if where == GRB.Callback.MIPSOL and lazy is not None:
+                self.callbacks += 1
+                for c in lazy(m.cbGetSolution(self._vars)):
+                    m.cbLazy(self._constr(*c))
+            elif (where == GRB.Callback.MIPNODE and user_cuts is not None
+                  and m.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL):
+                for c in user_cuts(m.cbGetNodeRel(self._vars)):
+                    m.cbCut(self._constr(*c))
+
+        if lazy is not None or user_cuts is not None:
+            model.Params.lazyConstraints = 1 if lazy is not None else 0
+            model.Params.preCrush = 1 if user_cuts is not None else 0
+            model.optimize(callback)
+        else:
+            model.optimize()
+        self.status = {GRB.OPTIMAL: OPTIMAL, GRB.INFEASIBLE: INFEASIBLE,
+                       GRB.TIME_LIMIT: TIME_LIMIT}.get(model.Status, OTHER)
+        return self.status
+
+    def has_solution(self):
+        return self.model.SolCount > 0
+
+    def values(self):
+        return self.model.getAttr('X', self._vars)
+
+    def obj_val(self):
+        return self.model.ObjVal
+
+    def obj_bound(self):
+        return self.model.ObjBound
+
+    def runtime(self):
+        return self.model.Runtime
+
+    def node_count(self):
+        return self.model.NodeCount
+
+
+class HighsBackend:
+    def __init__(self, name='model'):
+        try:
+            import highspy
+        except ImportError as err:
+            raise ImportError("the 'highs' backend needs the highspy package (pip install highspy)") from err
+        self._hs = highspy
+        self.h = highspy.Highs()
+        self.h.setOptionValue('output_flag', False)
+        self._integrality = []
+        self._time_limit = None
+        self._start = None
+        self._feasible = False
+        self._runtime = 0.0
+        self._nodes = 0
+        self.status = None
+        self.callbacks = 0
+        self.rounds = 0
+
+    def add_var(self, vtype=BINARY, lb=0.0, ub=1.0, obj=0.0, name=''):
+        inf = self._hs.kHighsInf
+        self.h.addVar(lb, ub if ub is not None else inf)
+        v = len(self._integrality)
+        self._integrality.append(vtype != CONTINUOUS)
+        if obj:
+            self.h.changeColCost(v, obj)
+        if vtype != CONTINUOUS:
+            self.h.changeColIntegrality(v, self._hs.HighsVarType.kInteger)
+        return v
+
+    def add_constr(self, terms, sense, rhs):
+        inf = self._hs.kHighsInf
+        lower = rhs if sense in '>=' else -inf
+        upper = rhs if sense in '<=' else inf
+        # HiGHS rejects a row that lists a column twice
+        coefs = dict()
+        for c, v in terms:
+            coefs[v] = coefs.get(v, 0.0) + c
+        idx = np.array(list(coefs), dtype=np.int32)
+        val = np.array(list(coefs.values()), dtype=np.double)
+        self.h.addRow(lower, upper, len(idx), idx, val)
+
+    def set_objective(self, costs, constant=0.0):
+        n = len(self._integrality)
+        self.h.changeColsCost(n, np.arange(n, dtype=np.int32),
+                              np.array([costs.get(v, 0.0) for v in range(n)], dtype=np.double))
+        self.h.changeObjectiveOffset(constant)
+
+    def set_params(self, time_limit=None, threads=None, mip_gap=None, seed=None):
+        if time_limit is not None:
+            self._time_limit = time_limit
+        if threads is not None:
+            self.h.setOptionValue('threads', int(threads))
+        if mip_gap is not None:
+            self.h.setOptionValue('mip_rel_gap', float(mip_gap))
+        if seed is not None:
+            self.h.setOptionValue('random_seed', int(seed))
+
+    def set_start(self, values):
+        self._start = dict(values)
+
+    def _load_start(self):
+        if not self._start:
+            return
+        sol = self._hs.HighsSolution()
+        sol.col_value = [float(self._start.get(v, 0.0)) for v in range(len(self._integrality))]
+        self.h.setSolution(sol)
+
+    def _root_cuts(self, user_cuts, max_rounds=50):
+        """Cutting-plane loop on the LP relaxation; the rows it adds stay in the model."""
+        hs, kinds = self.h, self._hs.HighsVarType
+        integer = [v for v, is_int in enumerate(self._integrality) if is_int]
+        for v in integer:
+            hs.changeColIntegrality(v, kinds.kContinuous)
+        for _ in range(max_rounds):
+            hs.run()
+            if hs.getModelStatus() != self._hs.HighsModelStatus.kOptimal:
+                break
+            cuts = user_cuts(self.values())
+            if not cuts:
+                break
+            for c in cuts:
+                self.add_constr(*c)
+        for v in integer:
+            hs.changeColIntegrality(v, kinds.kInteger)
+
+    def optimize(self, lazy=None, user_cuts=None):
+        hs = self.h
+        t_start = time.time()
+        self._nodes = 0
+        self._feasible = False
+        if user_cuts is not None:
+            self._root_cuts(user_cuts)
+        while True:
+            if self._time_limit is not None:
+                hs.setOptionValue('time_limit', max(self._time_limit - (time.time() - t_start), 0.0))
+            self._load_start()
+            hs.run()
+            self.rounds += 1
+            self._nodes += hs.getInfo().mip_node_count
+            status = hs.getModelStatus()
+            if hs.getInfo().primal_solution_status != 2:
+                break
+            if lazy is None:
+                self._feasible = True
+                break
+            self.callbacks += 1
+            cuts = lazy(self.values())
+            if not cuts:
+                self._feasible = True
+                break
+            for c in cuts:
+                self.add_constr(*c)
+            if status != self._hs.HighsModelStatus.kOptimal:
+                # out of time with a point the new rows cut off: no valid solution
+                break
+        self._runtime = time.time() - t_start
+        model_status = self._hs.HighsModelStatus
+        self.status = {model_status.kOptimal: OPTIMAL, model_status.kInfeasible: INFEASIBLE,
+                       model_status.kTimeLimit: TIME_LIMIT}.get(status, OTHER)
+        return self.status
+
+    def has_solution(self):
+        return self._feasible
+
+    def values(self):
+        return list(self.h.getSolution().col_value)
+
+    def obj_val(self):
+        return self.h.getInfo().objective_function_value
+
+    def obj_bound(self):
+        return self.h.getInfo().mip_dual_bound
+
+    def runtime(self):
+        return self._runtime
+
+    def node_count(self):
+        return self._nodes
+
+
+class PulpBackend:
+    """CBC through PuLP.  PuLP reports no MIP bound, so ``obj_bound`` is the objective of an optimal solve."""
+
+    def __init__(self, name='model'):
+        try:
+            import pulp
+        except ImportError as err:
+            raise ImportError("the 'cbc' backend needs the pulp package (pip install pulp)") from err
+        self._pulp = pulp
+        # PuLP 3 deprecates its bundled CBC (PULP_CBC_CMD) for COIN_CMD with pip install pulp[cbc]
+        self._solver = pulp.COIN_CMD if pulp.COIN_CMD(msg=False).available() else pulp.PULP_CBC_CMD
+        self.prob = pulp.LpProblem(name.replace(' ', '_'), pulp.LpMinimize)
+        self._vars = []
+        self._costs = dict()
+        self._constant = 0.0
+        self._options = {'msg': False}
+        self._time_limit = None
+        self._start = None
+        self._feasible = False
+        self._runtime = 0.0
+        self.status = None
+        self.callbacks = 0
+        self.rounds = 0
+
+    def add_var(self, vtype=BINARY, lb=0.0, ub=1.0, obj=0.0, name=''):
+        cat = {BINARY: 'Binary', INTEGER: 'Integer', CONTINUOUS: 'Continuous'}[vtype]
+        # generated names: PuLP rejects characters such as '[' and ','
+        self._vars.append(self._pulp.LpVariable('v{}'.format(len(self._vars)), lowBound=lb, upBound=ub, cat=cat))
+        v = len(self._vars) - 1
+        if obj:
+            self._costs[v] = obj
+            self._set_objective()
+        return v
+
+    def _expr(self, terms):
+        return self._pulp.lpSum(c * self._vars[v] for c, v in terms)
+
+    def add_constr(self, terms, sense, rhs):
+        expr = self._expr(terms)
+        self.prob += expr <= rhs if sense == '<' else expr >= rhs if sense == '>' else expr == rhs
+
+    def _set_objective(self):
+        self.prob.setObjective(self._expr((c, v) for v, c in self._costs.items()) + self._constant)
+
+    def set_objective(self, costs, constant=0.0):
+        self._costs, self._constant = dict(costs), constant
+        self._set_objective()
+
+    def set_params(self, time_limit=None, threads=None, mip_gap=None, seed=None):
+        """``seed`` is not passed on: PuLP has no portable option for CBC's seed."""
+        if time_limit is not None:
+            self._time_limit = time_limit
+        if threads is not None:
+            self._options['threads'] = int(threads)
+        if mip_gap is not None:
+            self._options['gapRel'] = float(mip_gap)
+
+    def set_start(self, values):
+        self._start = dict(values)
+
+    def _run(self, mip=True, time_limit=None):
+        options = dict(self._options)
+        if time_limit is not None:
+            options['timeLimit'] = time_limit
+        if mip and self._start:
+            for v, val in self._start.items():
+                self._vars[v].setInitialValue(val)
+            options['warmStart'] = True
+        self.prob.solve(self._solver(mip=mip, **options))
+        return self.prob.sol_status
+
+    def _root_cuts(self, user_cuts, max_rounds=50):
+        """Cutting-plane loop on the LP relaxation; the rows it adds stay in the model."""
+        for _ in range(max_rounds):
+            if self._run(mip=False) != self._pulp.LpSolutionOptimal:
+                break
+            cuts = user_cuts(self.values())
+            if not cuts:
+                break
+            for c in cuts:
+                self.add_constr(*c)
+
+    def optimize(self, lazy=None, user_cuts=None):
+        pulp = self._pulp
+        t_start = time.time()
+        self._feasible = False
+        sol_status = pulp.LpSolutionNoSolutionFound
+        if user_cuts is not None:
+            self._root_cuts(user_cuts)
+        while True:
+            limit = None
+            if self._time_limit is not None:
+                limit = self._time_limit - (time.time() - t_start)
+                if limit <= 0:
+                    break
+            sol_status = self._run(time_limit=limit)
+            self.rounds += 1
+            if sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+                break
+            if lazy is None:
+                self._feasible = True
+                break
+            self.callbacks += 1
+            cuts = lazy(self.values())
+            if not cuts:
+                self._feasible = True
+                break
+            for c in cuts:
+                self.add_constr(*c)
+            if sol_status != pulp.LpSolutionOptimal:
+                # out of time with a point the new rows cut off: no valid solution
+                break
+        self._runtime = time.time() - t_start
+        out_of_time = self._time_limit is not None and self._runtime >= self._time_limit
+        self.status = {pulp.LpSolutionOptimal: OPTIMAL, pulp.LpSolutionInfeasible: INFEASIBLE,
+                       pulp.LpSolutionIntegerFeasible: TIME_LIMIT}.get(
+            sol_status, TIME_LIMIT if out_of_time else OTHER)
+        return self.status
+
+    def has_solution(self):
+        return self._feasible
+
+    def values(self):
+        return [var.varValue or 0.0 for var in self._vars]
+
+    def obj_val(self):
+        return self._pulp.value(self.prob.objective)
+
+    def obj_bound(self):
+        return self.obj_val() if self.status == OPTIMAL else -float('inf')
+
+    def runtime(self):
+        return self._runtime
+
+    def node_count(self):
+        return 0
+
+
+BACKENDS = {'gurobi': GurobiBackend, 'highs': HighsBackend, 'cbc': PulpBackend}
+
+
+def get_backend(backend, name='model'):
+    """A new empty model called ``name`` on ``backend`` ('gurobi', 'highs' or 'cbc')."""
+    if backend not in BACKENDS:
+        raise ValueError('unknown backend: {}'.format(backend))
+    return BACKENDS[backend](name)
@@ -0,0 +1,198 @@
+"""Benchmark tiers over the four dataset families with regression tracking.
+
+    python benchmark.py smoke                      # < 1 minute, run on every change
+    python benchmark.py standard --save-baseline   # refresh bench/baseline-standard.json
+    python benchmark.py standard                   # compare against the stored baseline
+    python benchmark.py smoke --backend highs      # same tier through portable_bc on HiGHS
+
+Each run records runtime, time-to-best, final gap, node count and callback
+count per instance from the solve_bc trace.  The exit status is 1 when any
+instance regresses against the baseline and 2 when the baseline was run with
+other settings (time limit, formulations, backend or seed).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from backends import OPTIMAL
+from cb_trace import read_trace
+from convertSol import read_instance
+from edge_index import EdgeIndex
+
+Q = 1.0
+FAMILIES = ['R-20-100', 'R-20-1000', 'R-50-100', 'R-50-1000']
+
+# (family, index, customers): customers=None keeps the whole instance; 'portable_customers'
+# replaces it under --backend, whose row generation re-solves the master after every round
+TIERS = {
+    # the smoke tier solves its prefixes to optimality in a few seconds; n=20 does not close in 20s
+    'smoke': {'instances': [('R-20-100', 1, 8), ('R-20-1000', 1, 8)], 'portable_customers': 6, 'time_limit': 20,
+              'formulation': 'cut'},
+    'standard': {'instances': [(f, idx, None) for f in FAMILIES for idx in (1, 2, 3)], 'time_limit': 300,
+                 'formulation': 'mtz'},
+    'full': {'instances': [(f, idx, None) for f in FAMILIES for idx in range(1, 21)], 'time_limit': 3600,
+             'formulation': 'mtz'},
+}
+
+# run settings that must match the baseline for the comparison to mean anything
+SETTINGS = ['time_limit', 'formulation', 'sub_formulation', 'backend', 'seed']
+
+# a run regresses when it is this much slower (both solved, beyond TIME_SLACK seconds), finds another
+# optimum than the baseline (OBJ_TOL relative) or its gap grows by more than GAP_TOL
+TIME_TOL = 0.25
+TIME_SLACK = 1.0
+OBJ_TOL = 1e-6
+GAP_TOL = 0.01
+
+
+def instance_file(family, idx, data_dir='Data'):
+    return os.path.join(data_dir, family, 'rcvrp-{}-{}.txt'.format(family[2:], idx))
+
+
+def instance_name(family, idx, customers=None):
+    name = '{}-{}'.format(family, idx)
+    return name if customers is None else '{}-n{}'.format(name, customers)
+
+
+def run_one(family, idx, time_limit, seed, formulation, sub_formulation, data_dir='Data', backend=None,
+            customers=None):
+    """One benchmark run on the depot and the first ``customers`` customers (all when None).
+
+    ``backend`` ('gurobi', 'highs' or 'cbc') runs portable_bc instead of BC.solve_bc.
+    """
+    d_up, d_down, q = read_instance(instance_file(family, idx, data_dir))
+    n = len(q) - 1 if customers is None else customers
+    edges = EdgeIndex.from_matrices(d_down[:n + 1, :n + 1], d_up[:n + 1, :n + 1])
+    q = q[:n + 1].tolist()
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = os.path.join(tmp, 'trace.jsonl')
+        t_start = time.time()
+        if backend is None:
+            import BC
+            res = BC.solve_bc(n=n, Q=Q, q=q, d_down=edges.to_dict(edges.d_down), d_up=edges.to_dict(edges.d_up),
+                              time_limit=time_limit, trace=trace, seed=seed, formulation=formulation,
+                              sub_formulation=sub_formulation)
+        else:
+            import portable_bc
+            res = portable_bc.solve_bc_portable(n, Q, q, None, None, time_limit, backend=backend, trace=trace,
+                                                seed=seed, formulation=formulation, sub_formulation=sub_formulation,
+                                                edges=edges)
+        wall = time.time() - t_start
+        records = read_trace(trace)
+
+    summary = [r for r in records if r['event'] == 'summary'][-1]
+    obj, bound = summary['obj'], summary['bound']
+    return {
+        'instance': instance_name(family, idx, customers),
+        'runtime': wall,
+        'ttb': res[3] if res[0] is not None else None,
+        'obj': obj,
+        'bound': bound,
+        'gap': abs(obj - bound) / max(abs(obj), 1e-10) if obj is not None and bound is not None else None,
+        'optimal': summary['status'] == OPTIMAL,
+        'nodes': summary['nodes'],
+        'callbacks': sum(1 for r in records if r['event'] == 'benders'),
+    }
+
+
+def compare(results, baseline):
+    """Regression messages for results that got slower or looser than the baseline."""
+    base = {r['instance']: r for r in baseline['results']}
+    messages = []
+    for r in results:
+        b = base.get(r['instance'])
+        if b is None:
+            continue
+        if r['obj'] is None and b['obj'] is not None:
+            messages.append('{}: no solution (baseline obj {:.4f})'.format(r['instance'], b['obj']))
+            continue
+        if b['optimal'] and not r['optimal']:
+            messages.append('{}: not solved to optimality (baseline {:.1f}s)'.format(r['instance'], b['runtime']))
+        elif r['optimal'] and b['optimal']:
+            if abs(r['obj'] - b['obj']) > OBJ_TOL * max(abs(b['obj']), 1.0):
+                messages.append('{}: optimum {:.6f} vs baseline {:.6f}'.format(r['instance'], r['obj'], b['obj']))
+            if r['runtime'] > b['runtime'] * (1 + TIME_TOL) + TIME_SLACK:
+                messages.append('{}: runtime {:.1f}s vs baseline {:.1f}s'.format(
+                    r['instance'], r['runtime'], b['runtime']))
+        if r['gap'] is not None and b['gap'] is not None and r['gap'] > b['gap'] + GAP_TOL:
+            messages.append('{}: gap {:.4f} vs baseline {:.4f}'.format(r['instance'], r['gap'], b['gap']))
+    return messages
+
+
+def mismatched_settings(run, baseline):
+    """Settings of ``run`` that differ from those of ``baseline``, as messages."""
+    return ['{}: {} vs baseline {}'.format(k, run[k], baseline.get(k)) for k in SETTINGS
+            if run[k] != baseline.get(k)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a benchmark tier and check it against a baseline.')
+    parser.add_argument('tier', choices=sorted(TIERS))
+    parser.add_argument('--time-limit', type=float, default=None, help='override the tier time limit')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--formulation', choices=['mtz', 'cut', 'undirected'], default=None,
+                        help='default: the tier setting')
+    parser.add_argument('--sub-formulation', choices=['mtz', 'cut', 'undirected'], default=None,
+                        help='default: the tier setting')
+    parser.add_argument('--backend', choices=['gurobi', 'highs', 'cbc'], default=None,
+                        help='run portable_bc on this solver instead of BC')
+    parser.add_argument('--data-dir', default='Data')
+    parser.add_argument('--bench-dir', default='bench')
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    tier = TIERS[args.tier]
+    time_limit = args.time_limit if args.time_limit is not None else tier['time_limit']
+    formulation = args.formulation or tier['formulation']
+    sub_formulation = args.sub_formulation or tier['formulation']
+    run = {'tier': args.tier, 'time_limit': time_limit, 'seed': args.seed, 'backend': args.backend,
+           'formulation': formulation, 'sub_formulation': sub_formulation}
+
+    baseline_file = os.path.join(args.bench_dir, 'baseline-{}.json'.format(args.tier))
+    baseline = None
+    if not args.save_baseline and os.path.exists(baseline_file):
+        with open(baseline_file, 'r') as f:
+            baseline = json.load(f)
+        # refuse before solving anything: runs with other settings are not comparable
+        mismatches = mismatched_settings(run, baseline)
+        if mismatches:
+            for m in mismatches:
+                print('SETTINGS ' + m)
+            print('{} was run with other settings; rerun with them or use --save-baseline'.format(baseline_file))
+            sys.exit(2)
+
+    results = []
+    for family, idx, customers in tier['instances']:
+        if args.backend is not None:
+            customers = tier.get('portable_customers', customers)
+        r = run_one(family, idx, time_limit, args.seed, formulation, sub_formulation, args.data_dir, args.backend,
+                    customers)
+        results.append(r)
+        print('{instance} runtime:{runtime:.1f} nodes:{nodes:.0f} callbacks:{callbacks} obj:{obj} gap:{gap}'.format(**r))
+
+    run.update(date=time.strftime('%Y-%m-%d %H:%M:%S'), results=results)
+    os.makedirs(args.bench_dir, exist_ok=True)
+    with open(os.path.join(args.bench_dir, 'last-{}.json'.format(args.tier)), 'w') as f:
+        json.dump(run, f, indent=1)
+
+    if args.save_baseline:
+        with open(baseline_file, 'w') as f:
+            json.dump(run, f, indent=1)
+        print('baseline saved to {}'.format(baseline_file))
+        return
+    if baseline is None:
+        print('no baseline at {}; run with --save-baseline'.format(baseline_file))
+        return
+    regressions = compare(results, baseline)
+    for m in regressions:
+        print('REGRESSION ' + m)
+    if regressions:
+        sys.exit(1)
+    print('no regressions against {}'.format(baseline_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import json
+import os
+
+
+class CallbackTrace:
+    """Per-callback records of a branch-and-cut run, appended to a JSON Lines file.
+
+    Every record carries the ``instance`` label and an ``event`` name:
+    'preprocess' for the edge reductions, 'warm_start' for the heuristic start
+    of solve_bc, 'benders' for each MIPSOL
+    callback of gen_cut and 'summary' once at the end.
+    """
+
+    def __init__(self, filename, instance=None):
+        dirname = os.path.dirname(filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.filename = filename
+        self.instance = instance if instance is not None else os.path.splitext(os.path.basename(filename))[0]
+        self._f = open(filename, 'a')
+
+    def record(self, event, **fields):
+        fields['instance'] = self.instance
+        fields['event'] = event
+        self._f.write(json.dumps(fields) + '\n')
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def read_trace(filename):
+    """All records of a trace file as a list of dicts."""
+    with open(filename, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def columns(records, event='benders'):
+    """Column-oriented view {field: [values]} of the records of one event type."""
+    rows = [r for r in records if r['event'] == event]
+    keys = []
+    for r in rows:
+        keys += [k for k in r if k not in keys]
+    return {k: [r.get(k) for r in rows] for k in keys}
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+
+class Checkpoint:
+    """Progress of a solve_bc run that can be resumed after it is stopped.
+
+    Holds the best accepted incumbent (directed route edges, master objective
+    and the r the cuts accepted with it), every Benders cut support generated
+    so far, the best master bound and the wall-clock time of all runs
+    (preprocessing, model building and warm start included).  solve_bc writes it
+    from the callback at most every ``every`` seconds and once at the end; a
+    run given the same file adds the cuts back as constraints and starts from
+    the incumbent.  With ``filename`` None the checkpoint is kept in memory
+    only, to carry cuts and incumbent from one solve_bc call to the next.
+    """
+
+    def __init__(self, filename, every=60.0):
+        self.filename = filename
+        self.every = every
+        self.elapsed = 0.0
+        self.runs = 0
+        self.obj = None
+        self.r = None
+        self.bound = None
+        self.incumbent = None
+        self.status = None
+        self.cuts = dict()
+        # wall-clock time of earlier runs; elapsed = base + runtime of the current one
+        self.base = 0.0
+        self._last_write = time.time()
+
+    def add_cut(self, y_sol):
+        """Remember a cut support (edge list, an edge travelled twice appearing twice)."""
+        y_sol = [tuple(e) for e in y_sol]
+        self.cuts.setdefault(tuple(sorted(y_sol)), y_sol)
+
+    def supports(self):
+        return list(self.cuts.values())
+
+    def update(self, runtime, bound=None, obj=None, incumbent=None, r=None):
+        """Record the progress ``runtime`` seconds into the current run.
+
+        The stored bound only grows (a resumed run starts below the bound it
+        stopped at); ``incumbent`` replaces the stored one when ``obj`` improves on it.
+        """
+        self.elapsed = self.base + runtime
+        if bound is not None:
+            self.bound = bound if self.bound is None else max(self.bound, bound)
+        if incumbent is not None and (self.obj is None or obj < self.obj):
+            self.obj, self.r, self.incumbent = obj, r, [tuple(e) for e in incumbent]
+
+    def due(self):
+        return time.time() - self._last_write >= self.every
+
+    def save(self):
+        if self.filename is None:
+            return
+        dirname = os.path.dirname(self.filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        data = {'elapsed': self.elapsed, 'runs': self.runs, 'obj': self.obj, 'r': self.r, 'bound': self.bound,
+                'status': self.status,
+                'incumbent': [list(e) for e in self.incumbent] if self.incumbent is not None else None,
+                'cuts': [[list(e) for e in y] for y in self.cuts.values()]}
+        # written through a temporary file, so a run killed while saving keeps the previous checkpoint
+        tmp_file = self.filename + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.filename)
+        self._last_write = time.time()
+
+    @classmethod
+    def load(cls, filename, every=60.0):
+        """Read a checkpoint written by ``save``; a missing file gives an empty one."""
+        ckpt = cls(filename, every)
+        if not os.path.exists(filename):
+            return ckpt
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        ckpt.elapsed = ckpt.base = data['elapsed']
+        ckpt.runs = data['runs']
+        ckpt.obj, ckpt.r, ckpt.bound, ckpt.status = data['obj'], data['r'], data['bound'], data['status']
+        if data['incumbent'] is not None:
+            ckpt.incumbent = [tuple(e) for e in data['incumbent']]
+        for y in data['cuts']:
+            ckpt.add_cut(y)
+        return ckpt
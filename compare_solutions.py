@@ -0,0 +1,193 @@
+"""Compare several methods' solutions on the sample groups of one or more datasets.
+
+    python compare_solutions.py sample-data/R-20-100-sample sample-data/R-50-1000-sample \\
+        --method bc solution/R-20-100.jsonl solution/R-50-1000.jsonl \\
+        --method cw cw/R-20-100.jsonl cw/R-50-1000.jsonl --workers 8
+
+A method is a name and its solution files; records are matched to a sample
+dataset through their instance id (convertSol.group_instances maps group_k to
+its instance).  The work is
+fanned out over a process pool in two rounds:
+- each text group file is parsed by a worker into shared-memory blocks, whose
+  ownership passes to this process (a convertSol store directory with
+  dist.npy/demand.npy is memory-mapped instead and needs no parsing);
+- every (group, method) pair is evaluated by a worker that maps the blocks
+  without copying them.
+
+The report has one row per method and dataset: mean and std of the distance
+cost, mean total cost (distance + detour-to-depot recourse) and overload
+probability, then the total cost minus that of the first method on the same
+(instance, sample) pairs: mean, std, 95% half-width and the share of samples
+where the method is cheaper.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from convertSol import group_instances, load_sample_store, numbered_files, parse_sample_group, sample_store
+from eval_engine import RouteIndex, demand_rounding, path_costs
+from solution_store import dataset_name, instance_number, load_solutions
+
+# per-worker cache of mapped blocks {name: (SharedMemory, array)}
+_blocks = dict()
+
+
+def _untrack(shm):
+    # Python < 3.13 registers every block a process creates or attaches with the
+    # resource tracker, which unlinks it when that process exits; the parent owns
+    # and unlinks every block instead
+    resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+def to_shared(array):
+    """Copy ``array`` into a new shared-memory block; returns its descriptor (name, shape, dtype)."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    _untrack(shm)
+    shm.close()
+    return shm.name, array.shape, array.dtype.str
+
+
+def from_shared(desc):
+    """Array view of a shared-memory descriptor, mapped once per process."""
+    name, shape, dtype = desc
+    if name not in _blocks:
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        _blocks[name] = (shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+    return _blocks[name][1]
+
+
+def load_group(source):
+    """Worker: descriptors {'dist', 'demand'} of one group.
+
+    ``source`` is a text group file, or (store_dir, g) for slot g of a convertSol store.
+    """
+    if isinstance(source, tuple):
+        return {'store': source}
+    _, _, dist, demand = parse_sample_group(source)
+    desc = {'dist': to_shared(dist)}
+    try:
+        desc['demand'] = to_shared(demand)
+    except BaseException:
+        release([desc])
+        raise
+    return desc
+
+
+def group_arrays(desc):
+    if 'store' in desc:
+        store_dir, g = desc['store']
+        return tuple(a[g] for a in load_sample_store(store_dir))
+    return from_shared(desc['dist']), from_shared(desc['demand'])
+
+
+def evaluate(desc, edges, Q):
+    """Worker: per-sample arrays {'distance', 'total', 'overloaded'} of one solution on one group."""
+    dist, demand = group_arrays(desc)
+    distance = path_costs(dist, edges)
+    figures = RouteIndex.from_edges(edges).capacity(dist, demand, Q, rounding=demand_rounding(demand))
+    return {'distance': distance, 'total': distance + figures['recourse'], 'overloaded': figures['overloaded']}
+
+
+def group_sources(sample_dir):
+    """[(instance number, source)] of a sample dataset directory, slots of its convertSol store when up to date."""
+    numbers = group_instances(sample_dir)
+    store = sample_store(sample_dir)
+    if store is not None:
+        return [(numbers[g], (store, g)) for g in sorted(numbers)]
+    return [(numbers[g], f) for g, f in enumerate(numbered_files(sample_dir))]
+
+
+def release(descs):
+    for desc in descs:
+        for key in ('dist', 'demand'):
+            if key in desc:
+                shm = shared_memory.SharedMemory(name=desc[key][0])
+                shm.close()
+                shm.unlink()
+
+
+def paired(diff):
+    """(mean, std, 95% half-width, share of negative entries) of paired differences."""
+    if len(diff) == 0:
+        return (float('nan'),) * 4
+    std = float(diff.std())
+    return float(diff.mean()), std, 1.96 * std / np.sqrt(len(diff)), float((diff < 0).mean())
+
+
+def compare(sample_dirs, methods, Q=1.0, workers=None):
+    """{(method, dataset): {instance number: per-sample arrays}} for every solution that has a sample group.
+
+    ``methods`` is a list of (name, [solution files]).
+    """
+    records = {name: {(dataset_name(r['instance']), instance_number(r['instance'])): r
+                      for f in files for r in load_solutions(f)}
+               for name, files in methods}
+    groups = [(dataset_name(d), number, source) for d in sample_dirs for number, source in group_sources(d)]
+    # only groups some method has a solution for are parsed
+    groups = [g for g in groups if any(g[:2] in recs for recs in records.values())]
+
+    results = dict()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        loads = [pool.submit(load_group, source) for _, _, source in groups]
+        try:
+            descs = [future.result() for future in loads]
+            futures = {(name, dataset, number): pool.submit(evaluate, desc, records[name][dataset, number]['edges'], Q)
+                       for (dataset, number, _), desc in zip(groups, descs)
+                       for name, _ in methods if (dataset, number) in records[name]}
+            for (name, dataset, number), future in futures.items():
+                results.setdefault((name, dataset), dict())[number] = future.result()
+        finally:
+            # every block created so far, also when parsing a later group failed
+            for future in loads:
+                future.cancel()
+            release([future.result() for future in loads if not future.cancelled() and future.exception() is None])
+    return results
+
+
+def report(results, methods):
+    baseline = methods[0][0]
+    lines = ['方法\t数据集\t实例数\t样本数\t平均成本\t标准差\t平均总成本\t超载概率\t'
+             '差值均值\t差值标准差\t95%置信半宽\t胜率']
+    for name, _ in methods:
+        for (method, dataset), by_instance in sorted(results.items(), key=lambda kv: kv[0][1]):
+            if method != name:
+                continue
+            figures = {k: np.concatenate([v[k] for v in by_instance.values()]) for k in ['distance', 'total', 'overloaded']}
+            base = results.get((baseline, dataset), dict())
+            common = sorted(set(by_instance) & set(base))
+            diff = np.concatenate([by_instance[k]['total'] - base[k]['total'] for k in common] or [np.zeros(0)])
+            lines.append('{}\t{}\t{}\t{}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t'.format(
+                name, dataset, len(by_instance), len(figures['distance']), figures['distance'].mean(),
+                figures['distance'].std(), figures['total'].mean(), figures['overloaded'].mean())
+                + ('{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}'.format(*paired(diff)) if name != baseline else '-\t-\t-\t-'))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare methods on sample groups with a process pool.')
+    parser.add_argument('sample_dirs', nargs='+', help='sample datasets, e.g. sample-data/R-20-100-sample')
+    parser.add_argument('--method', nargs='+', action='append', required=True, metavar=('NAME', 'FILE'),
+                        help='method name and its solution files; the first method is the baseline')
+    parser.add_argument('--Q', type=float, default=1.0, help='vehicle capacity')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', default=None, help='report file (default: print only)')
+    args = parser.parse_args()
+    methods = [(m[0], m[1:]) for m in args.method]
+    for name, files in methods:
+        if not files:
+            parser.error('--method {} has no solution files'.format(name))
+
+    lines = report(compare(args.sample_dirs, methods, args.Q, args.workers), methods)
+    print('\n'.join(lines))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+if __name__ == '__main__':
+    main()
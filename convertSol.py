@@ -0,0 +1,231 @@
+"""Convert Data/ and sample-data/ text files into a memory-mappable NumPy store.
+
+Layout of the store (one directory per dataset)::
+
+    store/R-20-100/d_up.npy           (I, n+1, n+1)  instance idx-1 at row idx-1
+    store/R-20-100/d_down.npy         (I, n+1, n+1)
+    store/R-20-100/q.npy              (I, n+1)
+    store/R-20-100-sample/dist.npy    (G, S, n+1, n+1)  group k, sample s
+    store/R-20-100-sample/demand.npy  (G, S, n+1)
+    store/R-20-100-sample/min_dist.npy, max_dist.npy  (G, n+1, n+1)
+
+Loaders open the arrays with ``mmap_mode='r'`` so nothing is copied until used.
+The readers (``read_instance``, ``read_samples``, ``sample_store``) look for the
+store of a dataset in store/ next to its Data/ or sample-data/ directory and
+fall back to the text files when it is missing or older than them.
+"""
+import argparse
+import os
+import re
+
+import numpy as np
+
+from eval_engine import read_matrix
+
+
+def numbered_files(dirname):
+    """Text files of a directory ordered by their trailing index."""
+    files = [f for f in os.listdir(dirname) if f.endswith('.txt')]
+    files.sort(key=lambda f: int(re.findall(r'(\d+)\.txt$', f)[0]))
+    return [os.path.join(dirname, f) for f in files]
+
+
+def parse_instance(filename):
+    """Read a Data/ instance into dense arrays (d_up, d_down, q)."""
+    with open(filename, 'r') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    n = int(lines[0])
+    marker = lines.index('node_demand')
+
+    rows = np.array(' '.join(lines[1:marker]).split(), dtype=float).reshape(-1, 4)
+    i, j = rows[:, 0].astype(np.intp), rows[:, 1].astype(np.intp)
+    d_up = np.zeros((n + 1, n + 1))
+    d_down = np.zeros((n + 1, n + 1))
+    d_up[i, j] = d_up[j, i] = rows[:, 2]
+    d_down[i, j] = d_down[j, i] = rows[:, 3]
+
+    q = np.zeros(n + 1)
+    q[1:] = np.array(lines[marker + 1:marker + 1 + n], dtype=float)
+    return d_up, d_down, q
+
+
+def parse_sample_group(filename):
+    """Read a sample-data group file into (min_dist, max_dist, dist (S, n+1, n+1), demand (S, n+1))."""
+    with open(filename, 'r') as f:
+        lines = f.read().split('\n')
+
+    min_dist = max_dist = None
+    dist, demand = [], []
+    for k, line in enumerate(lines):
+        if line.startswith('min_dist:'):
+            min_dist = read_matrix(lines, k)
+        elif line.startswith('max_dist:'):
+            max_dist = read_matrix(lines, k)
+        elif line.startswith('node_demand:'):
+            demand.append(np.concatenate([[0.0], read_matrix(lines, k).ravel()]))
+        elif line.startswith('dist_matrix:'):
+            dist.append(read_matrix(lines, k))
+    return min_dist, max_dist, np.stack(dist), np.stack(demand)
+
+
+def read_group_header(filename):
+    """(min_dist, max_dist) of a sample-data group file, read without parsing its samples."""
+    lines = []
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.startswith('---') or line.startswith('dist_matrix:'):
+                break
+            lines.append(line.rstrip('\n'))
+    blocks = {line[:-1]: read_matrix(lines, k) for k, line in enumerate(lines) if line in ('min_dist:', 'max_dist:')}
+    return blocks.get('min_dist'), blocks.get('max_dist')
+
+
+def group_instances(sample_dir, data_dir=None, tol=5e-4):
+    """{group index: instance number} of a sample dataset (text groups or a convertSol store).
+
+    sample-data group_k is the k-th instance in lexicographic file order
+    (1, 10, 11, ..., 19, 2, 20, 3, ...), not instance k+1.  Each group's
+    min_dist/max_dist header is matched against d_down/d_up of the instances
+    in ``data_dir`` (default: Data/<dataset> next to this module), so groups
+    written in any order are found; a group that matches no instance raises
+    ValueError.  Without the Data/ directory the lexicographic order is assumed.
+    """
+    from solution_store import dataset_name
+
+    if os.path.exists(os.path.join(sample_dir, 'dist.npy')):
+        mins, maxs = (np.load(os.path.join(sample_dir, name + '.npy'), mmap_mode='r')
+                      for name in ['min_dist', 'max_dist'])
+        headers = list(zip(mins, maxs))
+    else:
+        headers = [read_group_header(f) for f in numbered_files(sample_dir)]
+    if data_dir is None:
+        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data', dataset_name(sample_dir))
+    if not os.path.isdir(data_dir):
+        numbers = sorted(range(1, len(headers) + 1), key=str)
+        return dict(enumerate(numbers))
+
+    files = sorted(f for f in os.listdir(data_dir) if f.endswith('.txt'))
+    numbers = [int(re.findall(r'(\d+)\.txt$', f)[0]) for f in files]
+    instances = [read_instance(os.path.join(data_dir, f)) for f in files]
+    mapping = dict()
+    for g, (min_dist, max_dist) in enumerate(headers):
+        # the lexicographic candidate first, then every other instance
+        order = ([g] if g < len(files) else []) + [k for k in range(len(files)) if k != g]
+        for k in order:
+            d_up, d_down, _ = instances[k]
+            if (min_dist is not None and np.shape(min_dist) == d_down.shape
+                    and np.allclose(min_dist, d_down, atol=tol) and np.allclose(max_dist, d_up, atol=tol)):
+                mapping[g] = numbers[k]
+                break
+        else:
+            raise ValueError('{}: group {} matches no instance of {}'.format(sample_dir, g, data_dir))
+    return mapping
+
+
+def convert_instances(data_dir, out_dir):
+    parsed = [parse_instance(f) for f in numbered_files(data_dir)]
+    os.makedirs(out_dir, exist_ok=True)
+    for k, name in enumerate(['d_up', 'd_down', 'q']):
+        np.save(os.path.join(out_dir, name + '.npy'), np.stack([p[k] for p in parsed]))
+    return len(parsed)
+
+
+def convert_samples(sample_dir, out_dir):
+    parsed = [parse_sample_group(f) for f in numbered_files(sample_dir)]
+    sizes = {p[2].shape for p in parsed}
+    if len(sizes) != 1:
+        raise ValueError('{}: groups have different sample shapes {}'.format(sample_dir, sorted(sizes)))
+    os.makedirs(out_dir, exist_ok=True)
+    for k, name in enumerate(['min_dist', 'max_dist', 'dist', 'demand']):
+        np.save(os.path.join(out_dir, name + '.npy'), np.stack([p[k] for p in parsed]))
+    return len(parsed)
+
+
+def load_instances(store_dir):
+    """Memory-mapped (d_up, d_down, q) arrays of a converted dataset."""
+    return tuple(np.load(os.path.join(store_dir, name + '.npy'), mmap_mode='r')
+                 for name in ['d_up', 'd_down', 'q'])
+
+
+def load_instance(store_dir, idx):
+    """Instance ``idx`` (1-based, as in the Data/ file names) as (n, d_up, d_down, q) array views."""
+    d_up, d_down, q = load_instances(store_dir)
+    return q.shape[1] - 1, d_up[idx - 1], d_down[idx - 1], q[idx - 1]
+
+
+def load_sample_store(store_dir):
+    """Memory-mapped (dist, demand) sample tensors of a converted sample dataset."""
+    return tuple(np.load(os.path.join(store_dir, name + '.npy'), mmap_mode='r')
+                 for name in ['dist', 'demand'])
+
+
+def store_dir(dataset_dir, root=None):
+    """Store directory of a Data/ or sample-data/ dataset: <root>/<dataset>, root defaulting to store/ beside them."""
+    dataset_dir = os.path.abspath(dataset_dir)
+    if root is None:
+        root = os.path.join(os.path.dirname(os.path.dirname(dataset_dir)), 'store')
+    return os.path.join(root, os.path.basename(dataset_dir))
+
+
+def _fresh(store, names, sources):
+    """True when ``store`` holds every array of ``names``, none older than the text files ``sources``."""
+    paths = [os.path.join(store, name + '.npy') for name in names]
+    if not sources or not all(os.path.exists(p) for p in paths):
+        return False
+    if min(os.path.getmtime(p) for p in paths) < max(os.path.getmtime(f) for f in sources):
+        return False
+    # one slot per text file
+    return np.load(paths[0], mmap_mode='r').shape[0] == len(sources)
+
+
+def read_instance(filename, root=None):
+    """(d_up, d_down, q) of a Data/ instance: views of its store when converted, else parsed from the text."""
+    dirname, base = os.path.split(os.path.abspath(filename))
+    store = store_dir(dirname, root)
+    files = numbered_files(dirname)
+    if not _fresh(store, ['d_up', 'd_down', 'q'], files):
+        return parse_instance(filename)
+    slot = [os.path.basename(f) for f in files].index(base)
+    return tuple(a[slot] for a in load_instances(store))
+
+
+def sample_store(sample_dir, root=None):
+    """Store directory of a sample dataset when it is converted and up to date, else None."""
+    if os.path.exists(os.path.join(sample_dir, 'dist.npy')):
+        return sample_dir
+    store = store_dir(sample_dir, root)
+    return store if _fresh(store, ['dist', 'demand'], numbered_files(sample_dir)) else None
+
+
+def read_samples(filename, root=None):
+    """(dist (S, n+1, n+1), demand (S, n+1)) of a group file: views of its store when converted, else parsed."""
+    dirname, base = os.path.split(os.path.abspath(filename))
+    store = sample_store(dirname, root)
+    if store is None:
+        _, _, dist, demand = parse_sample_group(filename)
+        return dist, demand
+    slot = [os.path.basename(f) for f in numbered_files(dirname)].index(base)
+    return tuple(a[slot] for a in load_sample_store(store))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert Data/ and sample-data/ into .npy stores.')
+    parser.add_argument('--data', default='Data')
+    parser.add_argument('--samples', default='sample-data')
+    parser.add_argument('--out', default='store')
+    args = parser.parse_args()
+
+    for root in [args.data, args.samples]:
+        if not os.path.isdir(root):
+            continue
+        for name in sorted(os.listdir(root)):
+            src = os.path.join(root, name)
+            if not os.path.isdir(src):
+                continue
+            convert = convert_samples if root == args.samples else convert_instances
+            count = convert(src, os.path.join(args.out, name))
+            print('{} -> {}: {} files'.format(src, os.path.join(args.out, name), count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import json
+import os
+from collections import OrderedDict
+
+
+def edge_key(n, sol):
+    """Canonical bitset of the undirected edges selected in ``sol`` ((i, j) -> 0/1)."""
+    key = 0
+    for (i, j), v in sol.items():
+        if v > 0.5:
+            if i > j:
+                i, j = j, i
+            key |= 1 << (i * (n + 1) + j)
+    return key
+
+
+class CutCache:
+    """LRU memo of inner CVRP results keyed by the master incumbent's edge set.
+
+    Each entry holds ``(y_val, y_sol, status, bound)`` where ``y_sol`` is the
+    cut support (a list of edges), ``status`` the Gurobi status of the solve
+    and ``bound`` its lower bound on the inner optimum (``y_val`` when the
+    solve was not stopped early).
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._table = OrderedDict()
+
+    def __len__(self):
+        return len(self._table)
+
+    def get(self, key):
+        entry = self._table.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._table.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, y_val, y_sol, status, bound=None):
+        self._table[key] = (y_val, list(y_sol), status, y_val if bound is None else bound)
+        self._table.move_to_end(key)
+        while len(self._table) > self.max_size:
+            self._table.popitem(last=False)
+
+    def supports(self):
+        """Every stored cut support, oldest first."""
+        return [entry[1] for entry in self._table.values()]
+
+    def save(self, filename):
+        dirname = os.path.dirname(filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        entries = [[format(key, 'x'), y_val, [list(e) for e in y_sol], status, bound]
+                   for key, (y_val, y_sol, status, bound) in self._table.items()]
+        with open(filename, 'w') as f:
+            json.dump({'max_size': self.max_size, 'entries': entries}, f)
+
+    @classmethod
+    def load(cls, filename, max_size=None):
+        """Read a cache written by ``save``; a missing file gives an empty cache."""
+        if not os.path.exists(filename):
+            return cls(max_size or 10000)
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        cache = cls(max_size or data['max_size'])
+        # files written before bounds were stored have four fields per entry
+        for key, y_val, y_sol, status, *bound in data['entries']:
+            cache.put(int(key, 16), y_val, [tuple(e) for e in y_sol], status, *bound)
+        return cache
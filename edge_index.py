@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class EdgeIndex:
+    """Undirected edge numbering shared by the master, the subproblem and the scenario code.
+
+    Edge k joins ``pairs[k] = (i, j)`` with i < j; both (i, j) and (j, i) map to
+    k in ``id_of``.  ``d_down``, ``d_up`` and ``delta`` are float arrays over k.
+    ``wst`` keeps the previous incumbent's mask so consecutive worst-case
+    vectors only touch the edges whose selection changed.
+    """
+
+    def __init__(self, n, d_down, d_up):
+        self.n = n
+        self.pairs = np.array([(i, j) for i in range(n + 1) for j in range(i + 1, n + 1)], dtype=np.intp)
+        self.id_of = dict()
+        for k, (i, j) in enumerate(self.pairs.tolist()):
+            self.id_of[i, j] = self.id_of[j, i] = k
+        self.d_down = np.asarray(d_down, dtype=float)
+        self.d_up = np.asarray(d_up, dtype=float)
+        self.delta = self.d_up - self.d_down
+        self._mask = np.zeros(len(self.pairs), dtype=bool)
+        self._wst = self.d_down.copy()
+
+    @classmethod
+    def from_dicts(cls, n, d_down, d_up):
+        pairs = [(i, j) for i in range(n + 1) for j in range(i + 1, n + 1)]
+        return cls(n, [d_down[e] for e in pairs], [d_up[e] for e in pairs])
+
+    @classmethod
+    def from_matrices(cls, d_down, d_up):
+        """Build from dense (n+1, n+1) arrays such as those of the convertSol store."""
+        iu = np.triu_indices(len(d_down), k=1)
+        return cls(len(d_down) - 1, np.asarray(d_down)[iu], np.asarray(d_up)[iu])
+
+    def directed(self):
+        """Both orientations of every edge, the key set of a complete directed model."""
+        return [e for i, j in self.pairs.tolist() for e in ((i, j), (j, i))]
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def ids(self, edges):
+        """Edge ids of an iterable of (i, j) keys, duplicates kept."""
+        return np.fromiter((self.id_of[e] for e in edges), dtype=np.intp)
+
+    def selected(self, sol):
+        """Ids of the directed entries of ``sol`` ((i, j) -> value) that are set, duplicates kept."""
+        return self.ids(e for e, v in sol.items() if v > 0.5)
+
+    def mask(self, sol):
+        mask = np.zeros(len(self.pairs), dtype=bool)
+        mask[self.selected(sol)] = True
+        return mask
+
+    def wst(self, mask):
+        """Worst-case cost vector: d_up on selected edges, d_down elsewhere."""
+        changed = np.flatnonzero(mask != self._mask)
+        self._wst[changed] = np.where(mask[changed], self.d_up[changed], self.d_down[changed])
+        self._mask = mask.copy()
+        return self._wst.copy()
+
+    def cost(self, sol):
+        """Sum of d_up over the directed entries set in ``sol``."""
+        return float(self.d_up[self.selected(sol)].sum())
+
+    def to_dict(self, vec):
+        """Symmetric (i, j)-keyed dict of an edge vector."""
+        out = dict()
+        for (i, j), v in zip(self.pairs.tolist(), vec.tolist()):
+            out[i, j] = out[j, i] = v
+        return out
@@ -0,0 +1,177 @@
+import numpy as np
+
+# sample-data text files write node_demand with 4 decimals
+DEMAND_DECIMALS = 4
+
+
+def read_matrix(lines, start):
+    """Numeric rows following ``lines[start]`` up to the first blank or non-numeric line."""
+    rows = []
+    for line in lines[start + 1:]:
+        if not line.strip() or line.startswith('---'):
+            break
+        try:
+            rows.append(np.array(line.split(), dtype=float))
+        except ValueError:
+            break
+    return np.array(rows)
+
+
+def load_samples(filepath):
+    """All ``dist_matrix`` blocks of a sample-data group file as one (S, n+1, n+1) array."""
+    with open(filepath, 'r') as f:
+        lines = f.read().split('\n')
+
+    matrices = [read_matrix(lines, k) for k, line in enumerate(lines) if line.startswith('dist_matrix:')]
+    matrices = [m for m in matrices if m.size]
+    if not matrices:
+        return np.zeros((0, 0, 0))
+    return np.stack(matrices)
+
+
+def iter_samples(filepath, chunk=256, demand=False):
+    """Stream the ``dist_matrix`` blocks of a group file as (k, n+1, n+1) arrays, k <= chunk.
+
+    The file is read line by line, so memory stays bounded by one chunk however
+    many samples the file holds.  With ``demand=True`` each chunk is a pair
+    (dist, demand) where demand is (k, n+1) with the depot at column 0.
+    """
+    dists, demands, rows, block = [], [], [], None
+    with open(filepath, 'r') as f:
+        for line in f:
+            if block is not None:
+                if line.strip() and not line.startswith('---'):
+                    try:
+                        rows.append(np.array(line.split(), dtype=float))
+                        continue
+                    except ValueError:
+                        pass
+                if rows:
+                    if block == 'dist':
+                        dists.append(np.array(rows))
+                    else:
+                        demands.append(np.concatenate([[0.0], np.concatenate(rows)]))
+                rows, block = [], None
+                if len(dists) == chunk:
+                    yield (np.stack(dists), np.stack(demands[:chunk])) if demand else np.stack(dists)
+                    dists, demands = [], demands[chunk:]
+            if line.startswith('dist_matrix:'):
+                block = 'dist'
+            elif demand and line.startswith('node_demand:'):
+                block = 'demand'
+    if rows and block == 'dist':
+        dists.append(np.array(rows))
+    if dists:
+        yield (np.stack(dists), np.stack(demands[:len(dists)])) if demand else np.stack(dists)
+
+
+def edge_arrays(edges):
+    """Row and column index arrays of an edge list [(i, j), ...]."""
+    arr = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+    return arr[:, 0], arr[:, 1]
+
+
+def path_costs(samples, edges):
+    """Cost of one solution under every sample: shape (S,)."""
+    rows, cols = edge_arrays(edges)
+    return samples[:, rows, cols].sum(axis=1)
+
+
+def incidence(edge_lists, size):
+    """(M, size*size) edge-count matrix of M solutions on a size x size distance matrix."""
+    inc = np.zeros((len(edge_lists), size * size))
+    for m, edges in enumerate(edge_lists):
+        rows, cols = edge_arrays(edges)
+        np.add.at(inc[m], rows * size + cols, 1.0)
+    return inc
+
+
+def batch_path_costs(samples, edge_lists):
+    """Cost of many solutions under many samples: shape (M, S)."""
+    size = samples.shape[1]
+    return incidence(edge_lists, size) @ samples.reshape(len(samples), -1).T
+
+
+def routes_from_edges(edges):
+    """Customer sequences of a directed solution edge list, one list per depot departure."""
+    succ = {}
+    starts = []
+    for i, j in edges:
+        if i == 0:
+            starts.append(j)
+        else:
+            succ[i] = j
+    routes = []
+    for v in starts:
+        route = []
+        while v != 0:
+            if v in route:
+                raise ValueError('edge list has a cycle that does not visit the depot')
+            route.append(v)
+            v = succ[v]
+        routes.append(route)
+    return routes
+
+
+def demand_rounding(demand, decimals=DEMAND_DECIMALS):
+    """Largest rounding error of one demand: half a unit of the ``decimals``-th decimal.
+
+    Only when every demand lies on that grid, as text rounded to ``decimals``
+    does; exact demands (k / capacity in a generated store) get 0.
+    """
+    scaled = np.asarray(demand) * 10 ** decimals
+    return 0.5 * 10 ** -decimals if np.allclose(scaled, np.round(scaled), rtol=0, atol=1e-6) else 0.0
+
+
+class RouteIndex:
+    """Padded customer-index arrays of a solution's routes, built once per solution.
+
+    ``idx`` is (R, L) with the visiting order of each route, padded with the
+    depot; ``mask`` marks the real positions.  Demands gathered through it are
+    (S, R, L), so loads and recourse of every route under every sample are a
+    few array operations.
+    """
+
+    def __init__(self, routes):
+        self.routes = [list(r) for r in routes]
+        length = max((len(r) for r in self.routes), default=0)
+        self.idx = np.zeros((len(self.routes), length), dtype=np.intp)
+        self.mask = np.zeros((len(self.routes), length), dtype=bool)
+        for k, r in enumerate(self.routes):
+            self.idx[k, :len(r)] = r
+            self.mask[k, :len(r)] = True
+
+    @classmethod
+    def from_edges(cls, edges):
+        return cls(routes_from_edges(edges))
+
+    def loads(self, demand):
+        """(S, R) route loads under (S, n+1) sample demands."""
+        return (demand[:, self.idx] * self.mask).sum(axis=2)
+
+    def capacity(self, dist, demand, Q, rtol=1e-6, rounding=0.0):
+        """Per-sample capacity figures under (S, n+1, n+1) distances and (S, n+1) demands.
+
+        Returns a dict of (S,) arrays: ``overloaded`` (some route exceeds Q),
+        ``overflow`` (total load above Q over all routes) and ``recourse``, the
+        cost of the detour-to-depot policy: the vehicle drives the planned
+        route and, at each customer where the cumulative load passes another
+        multiple of Q, returns to the depot to unload and comes back.
+        A load fits when it exceeds Q by at most ``rtol * Q`` plus ``rounding``
+        per customer served so far, the largest error of demands read back
+        rounded (see demand_rounding).
+        """
+        load = demand[:, self.idx] * self.mask
+        cum = np.cumsum(load, axis=2)
+        slack = rtol * Q + rounding * np.cumsum(self.mask, axis=1)
+        trips = np.maximum(np.ceil((cum - slack) / Q), 1)
+        failures = np.diff(trips, axis=2, prepend=1) * self.mask
+        detour = dist[:, self.idx, 0] + dist[:, 0, self.idx]
+        total = cum[:, :, -1] if cum.shape[2] else np.zeros(cum.shape[:2])
+        route_slack = slack[:, -1] if slack.shape[1] else np.zeros(slack.shape[0])
+        excess = np.where(total - Q > route_slack, total - Q, 0)
+        return {
+            'overloaded': (excess > 0).any(axis=1),
+            'overflow': excess.sum(axis=1),
+            'recourse': (failures * detour).sum(axis=(1, 2)),
+        }
@@ -1,75 +1,20 @@
-import re
 import os
 
+from convertSol import group_instances, read_samples
+from eval_engine import path_costs
+from solution_store import instance_number, load_solutions
+
 def parse_solution_file(filepath):
-    """解析solution文件，提取所有解"""
-    solutions = []
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if line.startswith('obj:'):
-            obj = float(line.split(':')[1])
-            regret = float(lines[i+1].split(':')[1])
-            sol_str = lines[i+2].split(':', 1)[1]
-            # 解析边列表
-            edges = eval(sol_str)
-            solutions.append({
-                'obj': obj,
-                'regret': regret,
-                'edges': edges
-            })
-            i += 3
-        else:
-            i += 1
-    
-    return solutions
+    """解析solution文件（.jsonl 或旧的 obj/regret/sol 文本），返回按实例编号索引的解 {实例编号: 解}"""
+    return {instance_number(s['instance']): s for s in load_solutions(filepath)}
 
 def parse_sample_file(filepath):
-    """解析sample文件，提取所有距离矩阵样本"""
-    samples = []
-    with open(filepath, 'r') as f:
-        content = f.read()
-    
-    # 分割不同的样本
-    sample_sections = content.split('--- Sample')
-    
-    for i, section in enumerate(sample_sections):
-        if i == 0:  # 跳过第一个部分（min_dist和max_dist）
-            continue
-            
-        # 查找距离矩阵
-        dist_start = section.find('dist_matrix:')
-        if dist_start == -1:
-            continue
-            
-        dist_section = section[dist_start:]
-        lines = dist_section.split('\n')[1:]  # 跳过'dist_matrix:'行
-        
-        matrix = []
-        for line in lines:
-            if line.strip() and not line.startswith('---'):
-                try:
-                    row = [float(x) for x in line.split()]
-                    if len(row) > 0:  # 确保行不为空
-                        matrix.append(row)
-                except ValueError:
-                    break  # 遇到非数字行，停止解析
-        
-        if matrix:
-            samples.append(matrix)
-    
-    return samples
+    """解析sample文件，提取所有距离矩阵样本，返回 (S, n+1, n+1) 数组（已转换为 store 时直接用其内存映射）"""
+    return read_samples(filepath)[0]
 
-def calculate_path_cost(edges, distance_matrix):
-    """根据边列表和距离矩阵计算路径成本"""
-    total_cost = 0.0
-    for edge in edges:
-        i, j = edge
-        total_cost += distance_matrix[i][j]
-    return total_cost
+def calculate_path_cost(edges, samples):
+    """根据边列表计算每个样本的路径成本，返回长度为 S 的数组"""
+    return path_costs(samples, edges)
 
 def calculate_mean(values):
     """计算平均值"""
@@ -79,7 +24,7 @@ def calculate_mean(values):
 
 def main():
     # 读取solution文件
-    solution_file = 'solution/R-50-1000.txt'
+    solution_file = 'solution/R-50-1000.jsonl'
     solutions = parse_solution_file(solution_file)
     print(f"读取到 {len(solutions)} 个解")
     
@@ -89,40 +34,40 @@ def main():
     all_costs = []  # 存储所有实例的所有样本成本
     instance_averages = []  # 存储每个实例的平均成本
     
-    for instance_idx in range(20):  # 20个实例
+    # group_k 对应按文件名字典序排列的第 k 个实例 (1, 10, 11, ..., 19, 2, 20, 3, ...)
+    groups = group_instances(sample_base_dir)
+    for instance_idx, number in sorted(groups.items()):
         sample_file = f'{sample_base_dir}/group_{instance_idx}.txt'
         
         if not os.path.exists(sample_file):
             print(f"文件不存在: {sample_file}")
             continue
             
-        print(f"\n处理实例 {instance_idx}...")
+        print(f"\n处理实例 {number} (group_{instance_idx})...")
         
         # 读取该实例的所有样本
         samples = parse_sample_file(sample_file)
         print(f"  读取到 {len(samples)} 个样本")
         
-        if instance_idx >= len(solutions):
+        if number not in solutions:
             print(f"  没有对应的解，跳过")
             continue
             
         # 获取对应的解
-        solution = solutions[instance_idx]
+        solution = solutions[number]
         edges = solution['edges']
         
         # 计算每个样本的成本
-        sample_costs = []
-        for sample_idx, distance_matrix in enumerate(samples):
-            cost = calculate_path_cost(edges, distance_matrix)
-            sample_costs.append(cost)
-            all_costs.append(cost)
+        sample_costs = calculate_path_cost(edges, samples).tolist() if len(samples) else []
+        all_costs.extend(sample_costs)
+        for sample_idx, cost in enumerate(sample_costs):
             print(f"    样本 {sample_idx + 1}: {cost:.4f}")
         
         # 计算该实例的平均成本
         if sample_costs:
             instance_avg = calculate_mean(sample_costs)
             instance_averages.append(instance_avg)
-            print(f"  实例 {instance_idx} 平均成本: {instance_avg:.4f}")
+            print(f"  实例 {number} 平均成本: {instance_avg:.4f}")
     
     # 计算总平均值
     if all_costs:
@@ -0,0 +1,71 @@
+"""Generate robust CVRP instances in the Data/ text format, for families beyond n=50.
+
+Customers and the depot are uniform points of the unit square.  d_up is the
+Euclidean distance and d_down is d_up times a uniform factor in [low, high];
+both are rounded to 1 / int_max (2 decimals for int_max=100, 3 for 1000, as
+in Data/R-20-100 and Data/R-50-1000).  Demands are integers in 1..9 over a
+vehicle of ``capacity`` units (30 in R-20, 40 in R-50), stored as float64
+k / capacity and written with repr so they read back exactly (float32 values
+such as 0.22499999403953552 put full routes ~1e-8 over Q).  Instance idx has
+its own seed, derived from the global seed and idx.
+
+    python generate_instances.py 100 --int-max 1000 --count 20
+    python generate_instances.py 200 --int-max 1000 --count 5 --out Data
+"""
+import argparse
+import os
+
+import numpy as np
+
+
+def instance_rng(seed, n, idx):
+    return np.random.default_rng(np.random.SeedSequence([seed, n, idx]))
+
+
+def make_instance(n, int_max, rng, capacity=40, low=0.05, high=0.8):
+    """(d_up, d_down, q) as dense (n+1, n+1) arrays and an (n+1,) demand vector, q[0] = 0."""
+    pts = rng.random((n + 1, 2))
+    d_up = np.sqrt(((pts[:, None, :] - pts[None, :, :]) ** 2).sum(axis=2))
+    d_up = np.maximum(np.round(d_up * int_max), 1) / int_max
+    factor = rng.uniform(low, high, size=(n + 1, n + 1))
+    factor = np.triu(factor, 1) + np.triu(factor, 1).T
+    d_down = np.maximum(np.round(d_up * factor * int_max), 1) / int_max
+    np.fill_diagonal(d_up, 0)
+    np.fill_diagonal(d_down, 0)
+    q = np.zeros(n + 1)
+    q[1:] = rng.integers(1, 10, size=n) / capacity
+    return d_up, d_down, q
+
+
+def write_instance(filename, d_up, d_down, q):
+    n = len(q) - 1
+    iu, ju = np.triu_indices(n + 1, k=1)
+    with open(filename, 'w') as f:
+        f.write('{}\n'.format(n))
+        for i, j, up, down in zip(iu.tolist(), ju.tolist(), d_up[iu, ju].tolist(), d_down[iu, ju].tolist()):
+            f.write('{} {} {} {}\n'.format(i, j, up, down))
+        f.write('node_demand\n')
+        f.write(''.join('{!r}\n'.format(v) for v in q[1:].tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a family of random instances in the Data/ format.')
+    parser.add_argument('n', type=int, help='number of customers, e.g. 100')
+    parser.add_argument('--int-max', type=int, default=1000, help='distances are multiples of 1 / int_max')
+    parser.add_argument('--count', type=int, default=20, help='instances in the family')
+    parser.add_argument('--capacity', type=int, default=40, help='vehicle capacity in demand units')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='Data', help='parent of the R-<n>-<int_max> family directory')
+    args = parser.parse_args()
+
+    out_dir = os.path.join(args.out, 'R-{}-{}'.format(args.n, args.int_max))
+    os.makedirs(out_dir, exist_ok=True)
+    for idx in range(1, args.count + 1):
+        d_up, d_down, q = make_instance(args.n, args.int_max, instance_rng(args.seed, args.n, idx), args.capacity)
+        filename = os.path.join(out_dir, 'rcvrp-{}-{}-{}.txt'.format(args.n, args.int_max, idx))
+        write_instance(filename, d_up, d_down, q)
+    print('written {} instances to {}'.format(args.count, out_dir))
+
+
+if __name__ == '__main__':
+    main()
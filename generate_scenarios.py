@@ -0,0 +1,124 @@
+"""Generate large sample sets for the instances of a Data/ family.
+
+Every directed entry of a sample distance matrix is drawn uniformly from
+[d_down, d_up] (as in the existing sample-data files, which are not symmetric),
+and demands are the instance demands, optionally scaled by a uniform factor in
+[1 - spread, 1 + spread].  Each instance has its own seed, derived from the
+global seed and the instance number, so any single group can be regenerated.
+
+    python generate_scenarios.py Data/R-50-1000 --samples 10000 --workers 8
+    python generate_scenarios.py Data/R-50-1000 --samples 10000 --format npy --out store/R-50-1000-sample-10k
+
+The text format is the sample-data layout (group_<k>.txt holds the k-th
+instance in lexicographic file order: 1, 10, 11, ..., 19, 2, 20, 3, ...; see
+convertSol.group_instances); the npy format writes the convertSol store layout (dist.npy / demand.npy ...).
+"""
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from convertSol import read_instance
+
+
+def instance_rng(seed, idx):
+    return np.random.default_rng(np.random.SeedSequence([seed, idx]))
+
+
+def sample_chunks(d_up, d_down, q, num_samples, rng, spread=0.0, chunk=1000):
+    """Yield (dist (k, n+1, n+1), demand (k, n+1)) chunks of vectorized draws."""
+    size = len(q)
+    off_diag = ~np.eye(size, dtype=bool)
+    for start in range(0, num_samples, chunk):
+        k = min(chunk, num_samples - start)
+        dist = d_down + rng.random((k, size, size)) * (d_up - d_down)
+        dist *= off_diag
+        demand = np.broadcast_to(q, (k, size)).copy()
+        if spread > 0:
+            demand *= rng.uniform(1 - spread, 1 + spread, size=(k, size))
+        yield dist, demand
+
+
+def _rows(matrix):
+    return '\n'.join(' '.join('{:.4f}'.format(v) for v in row) for row in matrix.tolist())
+
+
+def write_text_group(filename, d_up, d_down, q, num_samples, rng, spread=0.0):
+    with open(filename, 'w') as f:
+        f.write('min_dist:\n{}\n\nmax_dist:\n{}\n\n'.format(_rows(d_down), _rows(d_up)))
+        f.write('--- Contains {} samples ---\n'.format(num_samples))
+        s = 0
+        for dist, demand in sample_chunks(d_up, d_down, q, num_samples, rng, spread):
+            for k in range(len(dist)):
+                s += 1
+                f.write('\n--- Sample {} ---\nnode_demand:\n'.format(s))
+                f.write('\n'.join('{:.4f}'.format(v) for v in demand[k, 1:].tolist()))
+                f.write('\n\ndist_matrix:\n{}\n'.format(_rows(dist[k])))
+
+
+def write_npy_group(out_dir, g, d_up, d_down, q, num_samples, rng, spread=0.0):
+    """Fill slot ``g`` of the pre-allocated store arrays created by ``allocate_store``."""
+    dist_out = np.load(os.path.join(out_dir, 'dist.npy'), mmap_mode='r+')
+    demand_out = np.load(os.path.join(out_dir, 'demand.npy'), mmap_mode='r+')
+    s = 0
+    for dist, demand in sample_chunks(d_up, d_down, q, num_samples, rng, spread):
+        dist_out[g, s:s + len(dist)] = dist
+        demand_out[g, s:s + len(dist)] = demand
+        s += len(dist)
+    dist_out.flush()
+    demand_out.flush()
+
+
+def allocate_store(out_dir, instances, num_samples, size):
+    os.makedirs(out_dir, exist_ok=True)
+    shapes = {'dist': (len(instances), num_samples, size, size), 'demand': (len(instances), num_samples, size)}
+    for name, shape in shapes.items():
+        np.lib.format.open_memmap(os.path.join(out_dir, name + '.npy'), mode='w+', shape=shape)
+    parsed = [read_instance(f) for f in instances]
+    np.save(os.path.join(out_dir, 'min_dist.npy'), np.stack([p[1] for p in parsed]))
+    np.save(os.path.join(out_dir, 'max_dist.npy'), np.stack([p[0] for p in parsed]))
+
+
+def generate_group(ins_file, g, out, fmt, num_samples, seed, spread):
+    d_up, d_down, q = read_instance(ins_file)
+    rng = instance_rng(seed, int(re.findall(r'(\d+)\.txt$', ins_file)[0]))
+    if fmt == 'text':
+        write_text_group(os.path.join(out, 'group_{}.txt'.format(g)), d_up, d_down, q, num_samples, rng, spread)
+    else:
+        write_npy_group(out, g, d_up, d_down, q, num_samples, rng, spread)
+    return ins_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate sample-data groups for every instance of a family.')
+    parser.add_argument('data_dir', help='instance family, e.g. Data/R-50-1000')
+    parser.add_argument('--samples', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--demand-spread', type=float, default=0.0,
+                        help='scale demands by U(1-s, 1+s); 0 keeps the instance demands')
+    parser.add_argument('--format', choices=['text', 'npy'], default='text')
+    parser.add_argument('--out', default=None)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    name = os.path.basename(os.path.normpath(args.data_dir))
+    out = args.out or os.path.join('sample-data', '{}-sample-{}'.format(name, args.samples))
+    # slot g is the g-th instance in lexicographic order, as in sample-data
+    instances = [os.path.join(args.data_dir, f) for f in sorted(os.listdir(args.data_dir)) if f.endswith('.txt')]
+    os.makedirs(out, exist_ok=True)
+    if args.format == 'npy':
+        size = len(read_instance(instances[0])[2])
+        allocate_store(out, instances, args.samples, size)
+
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(instances)))) as pool:
+        futures = [pool.submit(generate_group, f, g, out, args.format, args.samples, args.seed, args.demand_spread)
+                   for g, f in enumerate(instances)]
+        for future in futures:
+            print('{} done'.format(os.path.basename(future.result())))
+    print('written {}'.format(out))
+
+
+if __name__ == '__main__':
+    main()
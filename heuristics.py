@@ -0,0 +1,211 @@
+"""Construction and local-search heuristics for the (inner) CVRP.
+
+Routes are lists that start and end at the depot, e.g. [0, 3, 5, 0]; ``d`` is
+an (i, j)-keyed cost dict with both orientations present.
+"""
+
+IMPROVE = 1e-9
+
+
+def clarke_wright(N, d, q, Q):
+    """
+    Clarke and Wright savings heuristic for CVRP.
+    """
+    # 1. Initial routes
+    routes = {i: [0, i, 0] for i in N}
+    route_demands = {i: q[i] for i in N}
+    customer_to_route_id = {i: i for i in N}
+
+    # 2. Calculate savings
+    savings = []
+    for i_idx, i in enumerate(N):
+        for j in N[i_idx+1:]:
+            # Use .get with a default for cases where an edge might not exist, though d should be complete.
+            d_0i = d.get((0, i), d.get((i, 0), float('inf')))
+            d_0j = d.get((0, j), d.get((j, 0), float('inf')))
+            d_ij = d.get((i, j), d.get((j, i), float('inf')))
+            s_ij = d_0i + d_0j - d_ij
+            if s_ij > 0:
+                savings.append((s_ij, i, j))
+    
+    # 3. Sort savings
+    savings.sort(key=lambda x: x[0], reverse=True)
+
+    # 4. Merge
+    for _, i, j in savings:
+        route_i_id = customer_to_route_id[i]
+        route_j_id = customer_to_route_id[j]
+
+        if route_i_id == route_j_id:
+            continue
+
+        route_i = routes[route_i_id]
+        route_j = routes[route_j_id]
+        
+        if route_demands[route_i_id] + route_demands[route_j_id] > Q:
+            continue
+        
+        merged = False
+        # Case 1: i is end of route_i, j is start of route_j
+        if route_i[-2] == i and route_j[1] == j:
+            new_route = route_i[:-1] + route_j[1:]
+            merged = True
+        # Case 2: j is end of route_j, i is start of route_i
+        elif route_j[-2] == j and route_i[1] == i:
+            new_route = route_j[:-1] + route_i[1:]
+            # swap roles to merge i's route into j's
+            route_i_id, route_j_id = route_j_id, route_i_id
+            route_i, route_j = route_j, route_i
+            merged = True
+        # Case 3: i is end, j is end
+        elif route_i[-2] == i and route_j[-2] == j:
+            new_route = route_i[:-1] + route_j[-2:0:-1] + [0]
+            merged = True
+        # Case 4: i is start, j is start
+        elif route_i[1] == i and route_j[1] == j:
+            new_route = route_j[:-1] + route_i[-2:0:-1] + [0]
+            # swap roles to merge i's route into j's
+            route_i_id, route_j_id = route_j_id, route_i_id
+            route_i, route_j = route_j, route_i
+            merged = True
+
+        if merged:
+            routes[route_i_id] = new_route
+            route_demands[route_i_id] += route_demands[route_j_id]
+            
+            for customer in routes[route_j_id]:
+                if customer != 0:
+                    customer_to_route_id[customer] = route_i_id
+
+            del routes[route_j_id]
+            del route_demands[route_j_id]
+            
+    
+    solution_edges = []
+    final_routes = list(routes.values())
+    for route in final_routes:
+        for k in range(len(route) - 1):
+            u, v = route[k], route[k+1]
+            if u > v:
+                u, v = v, u
+            solution_edges.append((u,v))
+            
+    return solution_edges, final_routes
+
+
+def _dist(d, i, j):
+    # an emptied route is [0, 0]; d has no diagonal
+    return 0.0 if i == j else d[i, j]
+
+
+def route_edges(routes):
+    """Directed edges [(i, j), ...] travelled by ``routes``."""
+    return [(route[k], route[k + 1]) for route in routes for k in range(len(route) - 1)]
+
+
+def sol_routes(sol):
+    """Routes [0, ..., 0] of an edge solution ((i, j) -> value) in which every customer has degree 2.
+
+    Orientation is ignored, so directed and undirected solutions both work; an
+    undirected depot edge of value 2 is an out-and-back route.
+    """
+    adj = dict()
+    for (i, j), v in sol.items():
+        for _ in range(int(round(v))):
+            adj.setdefault(i, []).append(j)
+            adj.setdefault(j, []).append(i)
+    routes = []
+    while adj.get(0):
+        route, v = [0], adj[0].pop()
+        adj[v].remove(0)
+        while v != 0:
+            route.append(v)
+            w = adj[v].pop()
+            adj[w].remove(v)
+            v = w
+        routes.append(route + [0])
+    return routes
+
+
+def routes_cost(routes, d):
+    return sum(d[e] for e in route_edges(routes))
+
+
+def two_opt(route, d):
+    """Reverse segments of a single route while that shortens it."""
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(route) - 2):
+            for j in range(i + 1, len(route) - 1):
+                a, b, c, e = route[i - 1], route[i], route[j], route[j + 1]
+                if _dist(d, a, c) + _dist(d, b, e) - _dist(d, a, b) - _dist(d, c, e) < -IMPROVE:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    improved = True
+    return route
+
+
+def _relocate(routes, loads, d, q, Q):
+    """Move one customer to its best position in any route; True if a move was made."""
+    for a, route_a in enumerate(routes):
+        for i in range(1, len(route_a) - 1):
+            v = route_a[i]
+            prev, nxt = route_a[i - 1], route_a[i + 1]
+            gain = _dist(d, prev, v) + _dist(d, v, nxt) - _dist(d, prev, nxt)
+            for b, route_b in enumerate(routes):
+                if b != a and loads[b] + q[v] > Q:
+                    continue
+                for k in range(len(route_b) - 1):
+                    s, t = route_b[k], route_b[k + 1]
+                    if b == a and v in (s, t):
+                        continue
+                    if _dist(d, s, v) + _dist(d, v, t) - _dist(d, s, t) - gain < -IMPROVE:
+                        del route_a[i]
+                        if b == a and k >= i:
+                            k -= 1
+                        route_b.insert(k + 1, v)
+                        loads[a] -= q[v]
+                        loads[b] += q[v]
+                        return True
+    return False
+
+
+def _swap(routes, loads, d, q, Q):
+    """Exchange two customers of different routes; True if a move was made."""
+    for a in range(len(routes)):
+        for b in range(a + 1, len(routes)):
+            route_a, route_b = routes[a], routes[b]
+            for i in range(1, len(route_a) - 1):
+                v = route_a[i]
+                for j in range(1, len(route_b) - 1):
+                    w = route_b[j]
+                    if loads[a] - q[v] + q[w] > Q or loads[b] - q[w] + q[v] > Q:
+                        continue
+                    pa, na, pb, nb = route_a[i - 1], route_a[i + 1], route_b[j - 1], route_b[j + 1]
+                    delta = (_dist(d, pa, w) + _dist(d, w, na) - _dist(d, pa, v) - _dist(d, v, na)
+                             + _dist(d, pb, v) + _dist(d, v, nb) - _dist(d, pb, w) - _dist(d, w, nb))
+                    if delta < -IMPROVE:
+                        route_a[i], route_b[j] = w, v
+                        loads[a] += q[w] - q[v]
+                        loads[b] += q[v] - q[w]
+                        return True
+    return False
+
+
+def local_search(routes, d, q, Q):
+    """2-opt, relocate and swap until no move improves; empty routes are dropped."""
+    routes = [list(route) for route in routes]
+    loads = [sum(q[v] for v in route) for route in routes]
+    while True:
+        for route in routes:
+            two_opt(route, d)
+        if not (_relocate(routes, loads, d, q, Q) or _swap(routes, loads, d, q, Q)):
+            break
+    return [route for route in routes if len(route) > 2]
+
+
+def solve_cvrp_heuristic(N, d, q, Q):
+    """Clarke-Wright savings followed by local search; returns (cost, routes)."""
+    _, routes = clarke_wright(N, d, q, Q)
+    routes = local_search(routes, d, q, Q)
+    return routes_cost(routes, d), routes
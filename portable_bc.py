@@ -0,0 +1,323 @@
+"""Benders branch-and-cut for the min-max-regret CVRP on any backend of backends.py.
+
+The algorithm is that of BC.solve_bc:
+- a directed master (MTZ rows, or capacity cuts separated on integer points),
+- tiered Benders cuts (cache, heuristic route, exact inner CVRP),
+- a heuristic warm start.
+It needs no Gurobi license when run with the 'highs' or 'cbc' backend:
+
+    python portable_bc.py Data/R-20-100/rcvrp-20-100-1.txt --backend highs --time-limit 600
+    python portable_bc.py Data/R-20-100/rcvrp-20-100-1.txt --backend cbc --time-limit 600
+
+Instances are read with convertSol.read_instance (from the .npy store when it
+is converted), so gurobipy is never imported on that path.
+"""
+import argparse
+import time
+
+from backends import BINARY, CONTINUOUS, OPTIMAL, OTHER, get_backend
+from cb_trace import CallbackTrace
+from convertSol import read_instance
+from cut_cache import CutCache, edge_key
+from edge_index import EdgeIndex
+from heuristics import route_edges, solve_cvrp_heuristic
+import preprocess
+from separation import capacity_cuts
+
+# same tolerance as BC.EPS
+EPS = 0.0001
+
+
+def build_routing(model, N, E, Q, q, formulation):
+    """Directed routing variables over E with degree rows and, for 'mtz', load rows; returns {edge: var}."""
+    V = [0] + N
+    x = {e: model.add_var(BINARY, name='x[{}]'.format(e)) for e in E}
+    for i in N:
+        model.add_constr([(1.0, x[i, j]) for j in V if (i, j) in x], '=', 1.0)
+        model.add_constr([(1.0, x[j, i]) for j in V if (j, i) in x], '=', 1.0)
+    if formulation == 'mtz':
+        # u_i: load on arrival at i, u_0 = 0
+        u = {i: model.add_var(CONTINUOUS, lb=0.0, ub=Q, name='u[{}]'.format(i)) for i in N}
+        for (i, j), var in x.items():
+            if j == 0:
+                continue
+            big_m = Q - q[i] - q[j]
+            load = [(-1.0, u[j])] + ([(1.0, u[i])] if i != 0 else [])
+            # u_i + q_j <= u_j + Q (1 - x_ij)  and  u_i + q_j >= u_j - (Q - q_i - q_j)(1 - x_ij)
+            model.add_constr(load + [(Q, var)], '<', Q - q[j])
+            model.add_constr(load + [(-big_m, var)], '>', -big_m - q[j])
+    elif formulation != 'cut':
+        raise ValueError('unknown formulation for the portable models: {}'.format(formulation))
+    return x
+
+
+def add_cut_vars(model, x):
+    """{edge: [vars]} whose sum says whether the undirected edge is used by x, as BC.set_bd_model's ``_cut_x``.
+
+    A customer edge is used when either arc is (x_ij + x_ji <= 1 on routings); a
+    depot edge may be driven both ways (route 0-i-0), so it gets a binary
+    z = [x_0i + x_i0 >= 1].  Both orientations map to the same list.
+    """
+    cut_x = dict()
+    for i, j in x:
+        if (i, j) in cut_x:
+            continue
+        arcs = [x[e] for e in ((i, j), (j, i)) if e in x]
+        if i == 0 or j == 0:
+            z = model.add_var(BINARY, name='z[{}]'.format((min(i, j), max(i, j))))
+            model.add_constr([(1.0, z)] + [(-1.0, a) for a in arcs], '<', 0.0)
+            model.add_constr([(2.0, z)] + [(-1.0, a) for a in arcs], '>', 0.0)
+            arcs = [z]
+        cut_x[i, j] = cut_x[j, i] = arcs
+    return cut_x
+
+
+def capacity_rows(x, N, Q, q, values, fractional=False):
+    """Rounded capacity inequalities violated by ``values``, as backend constraints."""
+    x_val = {e: values[v] for e, v in x.items()}
+    return [([(1.0, x[i, j]) for (i, j) in x if i in S and j not in S], '>', rhs)
+            for S, rhs in capacity_cuts(N, Q, q, x_val, fractional=fractional)]
+
+
+class PortableSubproblem:
+    """Inner CVRP on a backend, built once and re-solved with new edge costs (cf. BC.CVRPSubproblem)."""
+
+    def __init__(self, backend, N, E, Q, q, edges, time_limit=360, threads=1, formulation='cut'):
+        t_start = time.time()
+        self.model = get_backend(backend, name='CVRP')
+        self.x = build_routing(self.model, N, E, Q, q, formulation)
+        self.model.set_params(time_limit=time_limit, threads=threads, mip_gap=0.0)
+        self._eid = edges.ids(self.x)
+        self._lazy = self._user_cuts = None
+        if formulation == 'cut':
+            self._lazy = lambda values: capacity_rows(self.x, N, Q, q, values)
+            self._user_cuts = lambda values: capacity_rows(self.x, N, Q, q, values, fractional=True)
+        self.status = None
+        self.build_time = time.time() - t_start
+        self.solve_time = 0.0
+        self.num_solves = 0
+
+    def solve(self, d, start=None):
+        """(cost, route edges) under the EdgeIndex cost vector ``d``; ``start`` is an edge list to start from."""
+        model = self.model
+        model.set_objective(dict(zip(self.x.values(), d[self._eid].tolist())))
+        if start:
+            start = set(start)
+            model.set_start({v: 1.0 if e in start else 0.0 for e, v in self.x.items()})
+        t_start = time.time()
+        self.status = model.optimize(self._lazy, self._user_cuts)
+        self.solve_time += time.time() - t_start
+        self.num_solves += 1
+        if not model.has_solution():
+            return None, None
+        values = model.values()
+        return model.obj_val(), [e for e, v in self.x.items() if values[v] > 0.5]
+
+
+def portable_regret(edges, sub, sol):
+    """(regret, cost, y_val, y_sol) of the directed routing ``sol`` ((i, j) -> 0/1), as BC.get_regret.
+
+    regret, y_val and y_sol are None when the subproblem finds no routing within its time limit.
+    """
+    y_val, y_sol = sub.solve(edges.wst(edges.mask(sol)))
+    cost_x = edges.cost(sol)
+    if y_sol is None:
+        return None, cost_x, None, None
+    return cost_x - y_val, cost_x, y_val, y_sol
+
+
+def solve_bc_portable(n, Q, q, d_down, d_up, time_limit, backend='highs', threads=1, formulation='cut',
+                      sub_formulation='cut', edges=None, trace=None, seed=0, warm=True,
+                      reduce=preprocess.EXACT_RULES):
+    """BC.solve_bc on a backend of backends.py; returns the same (obj, bound, sol, ttb, x_e) tuple.
+
+    When the subproblem left some integer point undecided (no routing in time)
+    the backend's status is reported as OTHER and ``bound`` is None.
+
+    ``d_down``/``d_up`` are (i, j)-keyed dicts, or None when ``edges`` is given.
+    """
+    t_begin = time.time()
+    N = [i for i in range(1, n + 1)]
+    if edges is None:
+        edges = EdgeIndex.from_dicts(n, d_down, d_up)
+    E = edges.directed()
+    if reduce:
+        keep, counts = preprocess.reduce_edges(edges, q, Q, reduce)
+        E = preprocess.reduced_edges(edges, keep, E)
+        print('preprocess {}'.format(preprocess.summary(keep, counts)))
+    master = get_backend(backend, name='BD')
+    x = build_routing(master, N, E, Q, q, formulation)
+    cut_x = add_cut_vars(master, x)
+    r = master.add_var(CONTINUOUS, lb=0.0, ub=2 * float(edges.d_up.sum()), name='r')
+    costs = dict(zip(x.values(), edges.d_up[edges.ids(x)].tolist()))
+    costs[r] = -1.0
+    master.set_objective(costs)
+    master.set_params(time_limit=time_limit, threads=threads, mip_gap=0.0, seed=seed)
+    sub = PortableSubproblem(backend, N, E, Q, q, edges, threads=threads, formulation=sub_formulation)
+    cache = CutCache()
+    tiers = {'cache': 0, 'heuristic': 0, 'exact': 0}
+    ttb = [None]
+    # integer points whose subproblem found no routing in time
+    undecided = [0]
+    own_trace = isinstance(trace, str)
+    if own_trace:
+        trace = CallbackTrace(trace)
+    if trace is not None and reduce:
+        trace.record('preprocess', edges=len(edges), kept=int(keep.sum()), removed=counts)
+
+    def benders_row(y_sol):
+        # an edge is credited delta when x uses it in either direction, as in BC.benders_expr;
+        # edges removed by preprocessing are fixed to 0 and only contribute d_down
+        ids = edges.ids(y_sol)
+        terms = [(float(c), v) for c, e in zip(edges.delta[ids], y_sol) if e in cut_x for v in cut_x[e]]
+        terms.append((-1.0, r))
+        return terms, '>', -float(edges.d_down[ids].sum())
+
+    def lazy(values):
+        t_start = time.time()
+        x_val = {e: values[v] for e, v in x.items()}
+        if formulation == 'cut':
+            rows = capacity_rows(x, N, Q, q, values)
+            if rows:
+                return rows
+        r_sol = values[r]
+        d_wst = edges.wst(edges.mask(x_val))
+        key = edge_key(n, x_val)
+        entry = cache.get(key)
+        heur_time = sub_time = 0.0
+        if entry is not None and entry[2] == OPTIMAL:
+            y_val, y_sol = entry[:2]
+            tier = 'cache'
+        else:
+            h_val, routes = solve_cvrp_heuristic(N, edges.to_dict(d_wst), q, Q)
+            heur_time = time.time() - t_start
+            if h_val + EPS < r_sol:
+                y_val, y_sol, tier = h_val, route_edges(routes), 'heuristic'
+            else:
+                t_sub = time.time()
+                y_val, y_sol = sub.solve(d_wst, start=route_edges(routes))
+                sub_time = time.time() - t_sub
+                tier = 'exact'
+                if y_sol is None:
+                    # out of time before any routing: no cut (it needs a routing) and nothing to cache;
+                    # the heuristic routing did not cut off r_sol, so the point is left undecided
+                    y_val = None
+                else:
+                    cache.put(key, y_val, y_sol, sub.status)
+        if y_val is None:
+            undecided[0] += 1
+            if trace is not None:
+                trace.record('benders', runtime=time.time() - t_begin, wall=time.time() - t_start, tier=tier,
+                             heur_time=heur_time, sub_setup=0.0, sub_optimize=sub_time, y_val=None, r_sol=r_sol,
+                             violation=None, cut=False, undecided=True, bound=None, incumbent=None, nodes=None)
+            return []
+        cut = y_val + EPS < r_sol
+        if cut:
+            tiers[tier] += 1
+        else:
+            ttb[0] = time.time() - t_begin
+        if trace is not None:
+            # the backends do not expose the incumbent and bound inside the callback
+            trace.record('benders', runtime=time.time() - t_begin, wall=time.time() - t_start, tier=tier,
+                         heur_time=heur_time, sub_setup=0.0, sub_optimize=sub_time, y_val=y_val, r_sol=r_sol,
+                         violation=r_sol - y_val, cut=cut, bound=None, incumbent=None, nodes=None)
+        return [benders_row(y_sol)] if cut else []
+
+    best = None
+    if warm:
+        # Clarke-Wright + local search on d_up, d_down and the midpoint; cuts for every candidate
+        for d in (edges.d_up, edges.d_down, (edges.d_up + edges.d_down) / 2):
+            _, routes = solve_cvrp_heuristic(N, edges.to_dict(d), q, Q)
+            x_e = dict.fromkeys(route_edges(routes), 1)
+            regret, _, y_val, y_sol = portable_regret(edges, sub, x_e)
+            if y_sol is None:
+                continue
+            cache.put(edge_key(n, x_e), y_val, y_sol, sub.status)
+            for support in (y_sol, list(x_e)):
+                master.add_constr(*benders_row(support))
+            if best is None or regret < best[0]:
+                best = (regret, x_e)
+        if best is not None:
+            start = {v: 1.0 if e in best[1] else 0.0 for e, v in x.items()}
+            for e, used in cut_x.items():
+                if len(used) == 1 and used[0] not in start:
+                    # depot edge flag
+                    start[used[0]] = 1.0 if e in best[1] or e[::-1] in best[1] else 0.0
+            master.set_start(start)
+            print('warm_start regret:{}'.format(best[0]))
+
+    user_cuts = None
+    if formulation == 'cut':
+        user_cuts = lambda values: capacity_rows(x, N, Q, q, values, fractional=True)
+    master.set_params(time_limit=max(time_limit - (time.time() - t_begin), 0.0))
+    status = master.optimize(lazy, user_cuts)
+    print('backend:{} sub_solves:{} sub_time:{:.2f}'.format(backend, sub.num_solves, sub.solve_time))
+    print('cuts cache:{cache} heuristic:{heuristic} exact:{exact}'.format(**tiers))
+    if undecided[0]:
+        # points were accepted without a subproblem answer: the backend's optimum and bound are not proven
+        print('undecided points:{} (result unproven)'.format(undecided[0]))
+        if status == OPTIMAL:
+            status = OTHER
+    has_solution = master.has_solution()
+    if has_solution:
+        values = master.values()
+        obj = master.obj_val()
+        sol = [e for e, v in x.items() if values[v] > 0.5]
+    elif best is not None:
+        # row generation out of time on a cut-off point: fall back to the warm-start routing
+        obj, sol = best[0], list(best[1])
+    else:
+        obj = sol = None
+    if trace is not None:
+        trace.record('summary', runtime=time.time() - t_begin, status=status, nodes=master.node_count(),
+                     obj=obj, bound=master.obj_bound() if not undecided[0] else None, undecided=undecided[0],
+                     sub_solves=sub.num_solves, sub_time=sub.solve_time, cut_tiers=tiers, backend=backend)
+        if own_trace:
+            trace.close()
+
+    if sol is None:
+        return None, None, None
+    x_e = {(i, j): 0 for i in range(n + 1) for j in range(n + 1) if i != j}
+    for e in sol:
+        x_e[e] = 1
+    # same bound convention as BC.solve_bc; None when undecided points leave it unproven
+    bound = master.obj_bound() + 1 - EPS if not undecided[0] else None
+    return obj, bound, sol, ttb[0], x_e
+
+
+def load_instance(ins_file):
+    """(n, q, EdgeIndex) of a Data/ instance without going through gurobipy."""
+    d_up, d_down, q = read_instance(ins_file)
+    return len(q) - 1, q.tolist(), EdgeIndex.from_matrices(d_down, d_up)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve one instance with the portable branch-and-cut.')
+    parser.add_argument('instance')
+    parser.add_argument('--backend', choices=['gurobi', 'highs', 'cbc'], default='highs')
+    parser.add_argument('--time-limit', type=float, default=3600)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--formulation', choices=['mtz', 'cut'], default='cut')
+    parser.add_argument('--Q', type=float, default=1.0)
+    parser.add_argument('--reduce', nargs='*', choices=preprocess.RULES, default=list(preprocess.EXACT_RULES),
+                        help='preprocess rules applied before the models are built (none: complete edge set)')
+    args = parser.parse_args()
+
+    n, q, edges = load_instance(args.instance)
+    res = solve_bc_portable(n, args.Q, q, None, None, args.time_limit, backend=args.backend, threads=args.threads,
+                            formulation=args.formulation, sub_formulation=args.formulation, edges=edges,
+                            reduce=args.reduce)
+    if res[0] is None:
+        print('no solution')
+        return
+    obj, bound, sol, ttb, x_e = res
+    sub = PortableSubproblem(args.backend, list(range(1, n + 1)), edges.directed(), args.Q, q, edges,
+                             formulation=args.formulation)
+    print('obj:{}'.format(obj))
+    regret = portable_regret(edges, sub, x_e)[0]
+    print('regret:{}'.format(regret if regret is not None else 'unknown (subproblem out of time)'))
+    print('sol:{}'.format(sol))
+
+
+if __name__ == '__main__':
+    main()
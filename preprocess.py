@@ -0,0 +1,108 @@
+"""Edge reductions applied before the master and the inner CVRP are built.
+
+Rules, each a boolean mask over the edges of an EdgeIndex (True: remove):
+- 'capacity': customers i, j with q_i + q_j > Q never share a route;
+- 'depot': d_down_ij > d_up_i0 + d_up_0j.  In every scenario, ending the route
+  at i and starting a new one at j is cheaper and keeps both loads feasible.
+  The fleet size is free in these models, so any routing (robust or inner)
+  that uses the edge is dominated;
+- 'customer': d_down_ij > min_k d_up_ik + d_up_kj over customers k.  The
+  detour visits k a second time, so this rule is a heuristic reduction that
+  can cut off the optimum; it is not applied by default.
+
+    python preprocess.py Data/R-50-1000 --rules capacity depot customer
+"""
+import argparse
+import os
+
+import numpy as np
+
+from convertSol import numbered_files, read_instance
+from edge_index import EdgeIndex
+
+EXACT_RULES = ('capacity', 'depot')
+RULES = ('capacity', 'depot', 'customer')
+# the slack of separation.capacity_rhs: demands are rounded floats, and loads
+# such as 0.26666668 + 0.13333334 count as fitting into Q = 0.4
+TOL = 1e-6
+
+
+def dense(edges, vec):
+    """Symmetric (n+1, n+1) matrix of an edge vector."""
+    m = np.zeros((edges.n + 1, edges.n + 1))
+    i, j = edges.pairs.T
+    m[i, j] = m[j, i] = vec
+    return m
+
+
+def capacity_mask(edges, q, Q):
+    q = np.asarray(q, dtype=float)
+    i, j = edges.pairs.T
+    return (i > 0) & ((q[i] + q[j]) / Q - TOL > 1)
+
+
+def depot_mask(edges):
+    d_up = dense(edges, edges.d_up)
+    i, j = edges.pairs.T
+    return (i > 0) & (edges.d_down > d_up[i, 0] + d_up[0, j] + TOL)
+
+
+def customer_mask(edges, chunk=64):
+    """Two-hop rule through customers; the (rows, n+1, n+1) detour tensor is built ``chunk`` rows at a time."""
+    d_up = dense(edges, edges.d_up)
+    size = edges.n + 1
+    via = np.empty((size, size))
+    for s in range(0, size, chunk):
+        rows = np.arange(s, min(s + chunk, size))
+        hop = d_up[rows, :, None] + d_up[None, :, :]  # (i, k, j): i -> k -> j
+        hop[:, 0, :] = np.inf
+        hop[np.arange(len(rows)), rows, :] = np.inf
+        diag = np.arange(size)
+        hop[:, diag, diag] = np.inf
+        via[rows] = hop.min(axis=1)
+    i, j = edges.pairs.T
+    return (i > 0) & (edges.d_down > via[i, j] + TOL)
+
+
+def reduce_edges(edges, q, Q, rules=EXACT_RULES):
+    """(keep mask over the edges, {rule: edges it removes}); an edge is counted under the first rule that removes it."""
+    masks = {'capacity': lambda: capacity_mask(edges, q, Q), 'depot': lambda: depot_mask(edges),
+             'customer': lambda: customer_mask(edges)}
+    keep = np.ones(len(edges), dtype=bool)
+    counts = dict()
+    for rule in rules:
+        if rule not in masks:
+            raise ValueError('unknown reduction rule: {}'.format(rule))
+        removed = masks[rule]() & keep
+        counts[rule] = int(removed.sum())
+        keep &= ~removed
+    return keep, counts
+
+
+def reduced_edges(edges, keep, E=None):
+    """The keys of E (default: both orientations of every edge) whose edge is kept."""
+    if E is None:
+        E = edges.directed()
+    return [e for e in E if keep[edges.id_of[e]]]
+
+
+def summary(keep, counts):
+    return 'edges:{}/{} '.format(int(keep.sum()), len(keep)) + ' '.join(
+        '{}:{}'.format(rule, c) for rule, c in counts.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the edge reductions of every instance of a family.')
+    parser.add_argument('data_dir', help='instance family, e.g. Data/R-50-1000')
+    parser.add_argument('--rules', nargs='+', choices=RULES, default=list(EXACT_RULES))
+    parser.add_argument('--Q', type=float, default=1.0)
+    args = parser.parse_args()
+
+    for ins_file in numbered_files(args.data_dir):
+        d_up, d_down, q = read_instance(ins_file)
+        keep, counts = reduce_edges(EdgeIndex.from_matrices(d_down, d_up), q, args.Q, args.rules)
+        print('{} {}'.format(os.path.basename(ins_file), summary(keep, counts)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""Per-sample empirical regret of one or more methods' solutions on sample groups.
+
+The regret of a solution under a sample is its distance cost under the
+sample's ``dist_matrix`` minus the optimal CVRP cost under that
+``dist_matrix`` and ``node_demand``.  The optimum comes from an oracle:
+- 'heuristic' (default): Clarke-Wright with local search on the symmetric
+  part (d + d.T) / 2 of the sample matrix, which is not symmetric and on
+  which 2-opt would not terminate; each route is then costed in its cheaper
+  direction.  The cost is an upper bound on the optimum, so the regret is a
+  lower bound;
+- 'exact': BC.solve_cvrp_bigM on the directed MTZ model, at most
+  ``--time-limit`` seconds per sample.
+
+The samples of every group are keyed first.  The ones not cached yet are then
+all submitted to a process pool together, in batches of at most ``--batch``
+samples, and collected as the workers finish.  Costs are cached by a hash of the
+sample (and Q and the oracle), so a sample scored against several methods is
+solved once; with ``--cache`` the table is kept on disk for later runs.
+
+    python regret_evaluate.py sample-data/R-20-100-sample --method bc solution/R-20-100.jsonl \\
+        --method cw cw/R-20-100.jsonl --workers 8
+    python regret_evaluate.py sample-data/R-20-100-sample --method bc solution/R-20-100.jsonl \\
+        --oracle exact --cache cache/R-20-100-exact.json --per-sample regret/R-20-100.jsonl
+
+The report has one row per method and dataset: mean distance cost, mean
+oracle cost, and the mean, std, 95% quantile and maximum of the regret.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from compare_solutions import group_sources
+from convertSol import load_sample_store, parse_sample_group
+from eval_engine import path_costs
+from heuristics import routes_cost, solve_cvrp_heuristic
+from solution_store import dataset_name, instance_number, load_solutions
+
+ORACLES = ('heuristic', 'exact')
+
+
+def sample_key(dist, demand, Q, oracle):
+    """Hex digest of one sample's distances and demands, for the oracle ``oracle`` at capacity Q."""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(dist, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(demand, dtype=np.float64).tobytes())
+    h.update('{!r} {}'.format(float(Q), oracle).encode())
+    return h.hexdigest()
+
+
+class OracleCache:
+    """Oracle costs keyed by sample_key; NaN marks a sample the oracle found no routing for."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._table = dict()
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, key):
+        return key in self._table
+
+    def get(self, key):
+        return self._table[key]
+
+    def put(self, key, cost):
+        self._table[key] = cost
+
+    def save(self, filename):
+        dirname = os.path.dirname(filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        # written through a temporary file, so a killed run keeps the previous table
+        tmp_file = filename + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({key: (None if np.isnan(c) else c) for key, c in self._table.items()}, f)
+        os.replace(tmp_file, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """Read a cache written by ``save``; a missing file gives an empty cache."""
+        cache = cls()
+        if filename is None or not os.path.exists(filename):
+            return cache
+        with open(filename, 'r') as f:
+            for key, c in json.load(f).items():
+                cache.put(key, float('nan') if c is None else c)
+        return cache
+
+
+def solve_sample(dist, demand, Q, oracle='heuristic', time_limit=60):
+    """Worker: oracle CVRP cost of one sample (dist (n+1, n+1), demand (n+1,) with the depot at 0)."""
+    size = len(demand)
+    N = list(range(1, size))
+    rows = dist.tolist()
+    d = {(i, j): rows[i][j] for i in range(size) for j in range(size) if i != j}
+    q = [float(v) for v in demand]
+    if oracle == 'exact':
+        import BC
+
+        y_val, _ = BC.solve_cvrp_bigM(N, list(d), d, Q, q, time_limit=time_limit)
+        return float('nan') if y_val is None else y_val
+    # the heuristics assume d[i, j] == d[j, i]
+    sym = ((dist + dist.T) / 2).tolist()
+    _, routes = solve_cvrp_heuristic(N, {(i, j): sym[i][j] for i, j in d}, q, Q)
+    return float(sum(min(routes_cost([r], d), routes_cost([r[::-1]], d)) for r in routes))
+
+
+def solve_batch(samples, Q, oracle='heuristic', time_limit=60):
+    """Worker: solve_sample over a list of (dist, demand) samples."""
+    return [solve_sample(dist, demand, Q, oracle, time_limit) for dist, demand in samples]
+
+
+def oracle_costs(groups, Q, cache, pool=None, oracle='heuristic', time_limit=60, batch=16, workers=1):
+    """[(S,) oracle costs] of several groups [(dist, demand)]; only samples missing from ``cache`` are solved.
+
+    The missing samples of all groups are submitted at once, in batches small
+    enough to give each of ``workers`` processes some, so small groups do not
+    leave the pool idle.
+    """
+    keys = [[sample_key(dist[s], demand[s], Q, oracle) for s in range(len(dist))] for dist, demand in groups]
+    todo = dict()
+    for (dist, demand), group_keys in zip(groups, keys):
+        for s, key in enumerate(group_keys):
+            if key in cache or key in todo:
+                cache.hits += 1
+            else:
+                cache.misses += 1
+                todo[key] = (np.asarray(dist[s]), np.asarray(demand[s]))
+    todo = list(todo.items())
+    size = max(1, min(batch, -(-len(todo) // max(workers, 1))))
+    chunks = [todo[k:k + size] for k in range(0, len(todo), size)]
+    if pool is None:
+        for chunk in chunks:
+            for (key, _), cost in zip(chunk, solve_batch([sample for _, sample in chunk], Q, oracle, time_limit)):
+                cache.put(key, cost)
+    else:
+        futures = {pool.submit(solve_batch, [sample for _, sample in chunk], Q, oracle, time_limit): chunk
+                   for chunk in chunks}
+        for future in as_completed(futures):
+            for (key, _), cost in zip(futures[future], future.result()):
+                cache.put(key, cost)
+    return [np.array([cache.get(key) for key in group_keys]) for group_keys in keys]
+
+
+def load_arrays(source):
+    """(dist, demand) of a group: a text group file, or (store_dir, g) for slot g of a convertSol store."""
+    if isinstance(source, tuple):
+        store_dir, g = source
+        return tuple(a[g] for a in load_sample_store(store_dir))
+    _, _, dist, demand = parse_sample_group(source)
+    return dist, demand
+
+
+def evaluate(sample_dirs, methods, Q=1.0, oracle='heuristic', cache=None, workers=None, time_limit=60, batch=16):
+    """{(method, dataset): {instance number: {'distance', 'oracle', 'regret'} (S,) arrays}}.
+
+    ``methods`` is a list of (name, [solution files]); every group some method
+    has a solution for is solved by the oracle once.
+    """
+    if cache is None:
+        cache = OracleCache()
+    records = {name: {(dataset_name(r['instance']), instance_number(r['instance'])): r
+                      for f in files for r in load_solutions(f)}
+               for name, files in methods}
+    groups = []
+    for sample_dir in sample_dirs:
+        dataset = dataset_name(sample_dir)
+        for number, source in group_sources(sample_dir):
+            names = [name for name, _ in methods if (dataset, number) in records[name]]
+            if names:
+                groups.append((dataset, number, names, load_arrays(source)))
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        best = oracle_costs([arrays for _, _, _, arrays in groups], Q, cache, pool, oracle, time_limit, batch, workers)
+    results = dict()
+    for (dataset, number, names, (dist, _)), oracle_cost in zip(groups, best):
+        for name in names:
+            distance = path_costs(dist, records[name][dataset, number]['edges'])
+            results.setdefault((name, dataset), dict())[number] = {
+                'distance': distance, 'oracle': oracle_cost, 'regret': distance - oracle_cost}
+    return results
+
+
+def report(results, methods):
+    lines = ['方法\t数据集\t实例数\t样本数\t平均成本\t平均最优成本\t平均regret\tregret标准差\tq0.95 regret\t最大regret']
+    for name, _ in methods:
+        for (method, dataset), by_instance in sorted(results.items(), key=lambda kv: kv[0][1]):
+            if method != name:
+                continue
+            figures = {k: np.concatenate([v[k] for v in by_instance.values()]) for k in ['distance', 'oracle', 'regret']}
+            # samples without an oracle routing carry no regret
+            regret = figures['regret'][~np.isnan(figures['regret'])]
+            lines.append('{}\t{}\t{}\t{}\t{:.4f}\t{:.4f}\t'.format(
+                name, dataset, len(by_instance), len(regret), figures['distance'].mean(),
+                np.nanmean(figures['oracle']) if len(regret) else float('nan'))
+                + ('{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}'.format(regret.mean(), regret.std(), np.quantile(regret, 0.95),
+                                                           regret.max()) if len(regret) else '-\t-\t-\t-'))
+    return lines
+
+
+def write_per_sample(filename, results):
+    """One JSON line per (method, instance) with its per-sample regrets."""
+    dirname = os.path.dirname(filename)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(filename, 'w') as f:
+        for (name, dataset), by_instance in sorted(results.items()):
+            for number, figures in sorted(by_instance.items()):
+                f.write(json.dumps({'method': name, 'instance': '{}-{}'.format(dataset, number),
+                                    'regret': [None if np.isnan(v) else v for v in figures['regret'].tolist()]})
+                        + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-sample regret of methods against a CVRP oracle.')
+    parser.add_argument('sample_dirs', nargs='+', help='sample datasets, e.g. sample-data/R-20-100-sample')
+    parser.add_argument('--method', nargs='+', action='append', required=True, metavar=('NAME', 'FILE'),
+                        help='method name and its solution files')
+    parser.add_argument('--oracle', choices=ORACLES, default='heuristic', help='optimal cost of each sample')
+    parser.add_argument('--time-limit', type=float, default=60, help='seconds per sample of the exact oracle')
+    parser.add_argument('--Q', type=float, default=1.0, help='vehicle capacity')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch', type=int, default=16, help='most samples sent to a worker at a time')
+    parser.add_argument('--cache', default=None, help='oracle cost table kept across runs (JSON)')
+    parser.add_argument('--per-sample', default=None, help='write the per-sample regrets here (JSON Lines)')
+    parser.add_argument('--output', default=None, help='report file (default: print only)')
+    args = parser.parse_args()
+    methods = [(m[0], m[1:]) for m in args.method]
+    for name, files in methods:
+        if not files:
+            parser.error('--method {} has no solution files'.format(name))
+
+    cache = OracleCache.load(args.cache)
+    results = evaluate(args.sample_dirs, methods, args.Q, args.oracle, cache, args.workers, args.time_limit,
+                       args.batch)
+    if args.cache:
+        cache.save(args.cache)
+    print('oracle:{} solved:{} reused:{} cache_size:{}'.format(args.oracle, cache.misses, cache.hits, len(cache)))
+    lines = report(results, methods)
+    print('\n'.join(lines))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    if args.per_sample:
+        write_per_sample(args.per_sample, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+
+
+class RoutePool:
+    """Feasible route sets of one instance, re-scored under new edge costs in one pass.
+
+    Routing k occupies entries ``indptr[k]:indptr[k + 1]`` of ``cols`` (EdgeIndex
+    ids, an edge travelled twice appearing twice), so the cost of every routing
+    under an edge cost vector d is one segmented sum of ``d[cols]``.  The
+    directed edges (``tails``, ``heads``) are kept to rebuild the cut support.
+    Routings are deduplicated on their edge multiset; beyond ``max_size`` the
+    least recently best ones are dropped.
+    """
+
+    def __init__(self, edges, max_size=5000):
+        self.edges = edges
+        self.max_size = max_size
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.cols = np.zeros(0, dtype=np.intp)
+        self.tails = np.zeros(0, dtype=np.intp)
+        self.heads = np.zeros(0, dtype=np.intp)
+        self.last_used = np.zeros(0, dtype=np.int64)
+        self.clock = 0
+        self._keys = []
+        self._seen = set()
+        self._pending = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, y_sol):
+        """Store the route set ``y_sol`` (iterable of directed edges); False if it is already pooled."""
+        arr = np.asarray(list(y_sol), dtype=np.intp).reshape(-1, 2)
+        if not len(arr):
+            return False
+        ids = self.edges.ids(map(tuple, arr.tolist()))
+        key = np.sort(ids).tobytes()
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._keys.append(key)
+        self._pending.append((ids, arr[:, 0], arr[:, 1]))
+        if len(self._keys) > self.max_size:
+            self._evict()
+        return True
+
+    def _flush(self):
+        if not self._pending:
+            return
+        ids, tails, heads = zip(*self._pending)
+        sizes = np.array([len(c) for c in ids], dtype=np.int64)
+        self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(sizes)])
+        self.cols = np.concatenate([self.cols] + list(ids))
+        self.tails = np.concatenate([self.tails] + list(tails))
+        self.heads = np.concatenate([self.heads] + list(heads))
+        self.last_used = np.concatenate([self.last_used, np.full(len(ids), self.clock, dtype=np.int64)])
+        self._pending = []
+
+    def _evict(self):
+        """Keep the 90% of ``max_size`` routings (at least one) that were best most recently."""
+        self._flush()
+        # most recently best first, newer first among equals
+        order = np.lexsort((np.arange(len(self.last_used)), self.last_used))[::-1]
+        keep = np.sort(order[:max(int(self.max_size * 0.9), 1)])
+        sizes = np.diff(self.indptr)[keep]
+        entries = np.concatenate([np.arange(self.indptr[k], self.indptr[k + 1]) for k in keep])
+        self.indptr = np.concatenate([[0], np.cumsum(sizes)])
+        self.cols, self.tails, self.heads = self.cols[entries], self.tails[entries], self.heads[entries]
+        self.last_used = self.last_used[keep]
+        self._keys = [self._keys[k] for k in keep.tolist()]
+        self._seen = set(self._keys)
+
+    def scores(self, d):
+        """Cost of every pooled routing under the EdgeIndex cost vector ``d``."""
+        self._flush()
+        if len(self.cols) == 0:
+            return np.zeros(0)
+        return np.add.reduceat(d[self.cols], self.indptr[:-1])
+
+    def route_set(self, k):
+        lo, hi = self.indptr[k], self.indptr[k + 1]
+        return list(zip(self.tails[lo:hi].tolist(), self.heads[lo:hi].tolist()))
+
+    def best(self, d):
+        """(cost, y_sol) of the cheapest pooled routing under ``d``, or (None, None) for an empty pool."""
+        costs = self.scores(d)
+        if not len(costs):
+            return None, None
+        k = int(np.argmin(costs))
+        self.clock += 1
+        self.last_used[k] = self.clock
+        return float(costs[k]), self.route_set(k)
+
+    def save(self, filename):
+        dirname = os.path.dirname(filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._flush()
+        # np.savez appends .npz to other names
+        tmp_file = filename + '.tmp.npz'
+        np.savez(tmp_file, n=self.edges.n, max_size=self.max_size, indptr=self.indptr, cols=self.cols,
+                 tails=self.tails, heads=self.heads, last_used=self.last_used)
+        os.replace(tmp_file, filename)
+
+    @classmethod
+    def load(cls, filename, edges, max_size=None):
+        """Read a pool written by ``save`` for the instance of ``edges``; a missing file gives an empty pool."""
+        if not os.path.exists(filename):
+            return cls(edges, max_size or 5000)
+        data = np.load(filename)
+        if int(data['n']) != edges.n:
+            raise ValueError('{}: route pool of an instance with {} customers, not {}'.format(
+                filename, int(data['n']), edges.n))
+        pool = cls(edges, max_size or int(data['max_size']))
+        order = np.argsort(data['last_used'], kind='stable')
+        indptr, tails, heads = data['indptr'], data['tails'], data['heads']
+        for k in order.tolist():
+            pool.add(list(zip(tails[indptr[k]:indptr[k + 1]].tolist(), heads[indptr[k]:indptr[k + 1]].tolist())))
+        return pool
@@ -0,0 +1,177 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from convertSol import numbered_files
+from preprocess import EXACT_RULES, RULES
+from solution_store import instance_id, make_record, read_records, write_legacy, write_records
+
+Q = 1.0
+
+
+def result_path(out_dir, ins_file):
+    return os.path.join(out_dir, os.path.splitext(os.path.basename(ins_file))[0] + '.jsonl')
+
+
+def run_instance(ins_file, out_file, time_limit, threads, formulation='mtz', sub_formulation='mtz', trace_dir=None,
+                 backend=None, reduce=EXACT_RULES, multi_cut=1, checkpoint_dir=None, slice_time=None, sparse_k=None,
+                 price_rounds=3):
+    """Solve one instance and write its solution record as soon as it finishes.
+
+    ``backend`` ('gurobi', 'highs' or 'cbc') runs portable_bc on that solver instead of BC.solve_bc;
+    ``reduce`` lists the preprocess rules applied to both models; ``multi_cut`` is passed to BC.solve_bc.
+    With ``checkpoint_dir`` (BC only) the solve resumes from the instance's
+    checkpoint and runs for at most ``slice_time`` seconds.  No record is
+    written until the instance is solved or has used its whole ``time_limit``.
+    With ``sparse_k`` (BC only) BC.solve_sparse solves it on the k-nearest-neighbour
+    graph with ``price_rounds`` pricing rounds; obj is then the regret of the
+    routing on the complete graph and no bound is recorded.
+    An instance left without an incumbent gets a record with obj, regret and bound None.
+    Returns (ins_file, obj, runtime, finished).
+    """
+    base = os.path.splitext(os.path.basename(ins_file))[0]
+    trace = None
+    if trace_dir is not None:
+        trace = os.path.join(trace_dir, base + '.jsonl')
+
+    t_start = time.time()
+    # solve time over all checkpointed runs, when there are several
+    runtime = None
+    obj = regret = bound = ttb = None
+    sol = []
+    if backend is None:
+        import BC
+
+        n, d_up, d_down, q = BC.get_robust_rcvrp_instance(ins_file)
+        N = [i for i in range(1, n + 1)]
+        checkpoint, limit = None, time_limit
+        if checkpoint_dir is not None:
+            checkpoint = BC.Checkpoint.load(os.path.join(checkpoint_dir, base + '.json'))
+            limit = max(time_limit - checkpoint.elapsed, 0.0)
+            if slice_time is not None:
+                limit = min(limit, slice_time)
+        if sparse_k is not None:
+            res = BC.solve_sparse(n=n, Q=Q, q=q, d_down=d_down, d_up=d_up, time_limit=limit, k=sparse_k,
+                                  price_rounds=price_rounds, threads=threads, formulation=formulation,
+                                  sub_formulation=sub_formulation, trace=trace, reduce=reduce, multi_cut=multi_cut)
+        else:
+            res = BC.solve_bc(n=n, Q=Q, q=q, d_down=d_down, d_up=d_up, time_limit=limit, threads=threads,
+                              formulation=formulation, sub_formulation=sub_formulation, trace=trace, reduce=reduce,
+                              multi_cut=multi_cut, checkpoint=checkpoint)
+        if checkpoint is not None:
+            if checkpoint.status != BC.GRB.OPTIMAL and checkpoint.elapsed < time_limit:
+                return ins_file, res[0], time.time() - t_start, False
+            runtime = checkpoint.elapsed
+        if res[0] is not None:
+            obj, bound, sol, ttb, x_e = res
+            regret = BC.get_regret(N, Q, q, d_down, d_up, x_e, formulation=sub_formulation)[0]
+            if sparse_k is not None:
+                # the objective of the k-nearest-neighbour models does not hold on the complete graph
+                obj = regret
+    else:
+        import portable_bc
+
+        n, q, edges = portable_bc.load_instance(ins_file)
+        N = [i for i in range(1, n + 1)]
+        res = portable_bc.solve_bc_portable(n, Q, q, None, None, time_limit, backend=backend, threads=threads,
+                                            formulation=formulation, sub_formulation=sub_formulation,
+                                            edges=edges, trace=trace, reduce=reduce)
+        if res[0] is not None:
+            obj, bound, sol, ttb, x_e = res
+            sub = portable_bc.PortableSubproblem(backend, N, edges.directed(), Q, q, edges, threads=threads,
+                                                 formulation=sub_formulation)
+            regret = portable_bc.portable_regret(edges, sub, x_e)[0]
+    t_end = time.time()
+
+    # written through a temporary file, so a killed run never leaves a partial record
+    write_records(out_file, [make_record(instance_id(ins_file), obj, regret, sol, bound=bound, ttb=ttb,
+                                         runtime=runtime if runtime is not None else t_end - t_start)])
+    return ins_file, obj, t_end - t_start, True
+
+
+def merge_results(instances, out_dir, solution_file):
+    """Concatenate per-instance records, in instance order, into the dataset's solution files.
+
+    ``solution_file`` is the .jsonl store; the legacy obj/regret/sol text is written next to it.
+    """
+    records = [r for ins_file in instances for r in read_records(result_path(out_dir, ins_file))]
+    write_records(solution_file, records)
+    write_legacy(os.path.splitext(solution_file)[0] + '.txt', records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve every instance of a dataset directory in parallel.')
+    parser.add_argument('data_dir', help='dataset directory, e.g. Data/R-50-1000')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--threads', type=int, default=os.cpu_count(),
+                        help='total thread budget shared by all workers')
+    parser.add_argument('--time-limit', type=float, default=3600)
+    parser.add_argument('--solution-dir', default='solution')
+    parser.add_argument('--formulation', choices=['mtz', 'cut', 'undirected'], default='mtz',
+                        help='capacity constraints of the master model')
+    parser.add_argument('--sub-formulation', choices=['mtz', 'cut', 'undirected'], default='mtz',
+                        help='capacity constraints of the inner CVRP model')
+    parser.add_argument('--trace-dir', default=None, help='write a callback trace per instance here')
+    parser.add_argument('--backend', choices=['gurobi', 'highs', 'cbc'], default=None,
+                        help='run portable_bc on this solver instead of BC (mtz/cut formulations only)')
+    parser.add_argument('--reduce', nargs='*', choices=RULES, default=list(EXACT_RULES),
+                        help='edge reductions applied before the models are built (none: complete edge set)')
+    parser.add_argument('--multi-cut', type=int, default=1,
+                        help='most Benders cuts per exact subproblem solve, from its solution pool (BC only)')
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help='checkpoint and resume every instance here (BC only); --time-limit is then the total')
+    parser.add_argument('--slice', type=float, default=None,
+                        help='with --checkpoint-dir: seconds per run; unfinished instances resume on the next run')
+    parser.add_argument('--sparse-k', type=int, default=None,
+                        help='restrict both models to the k-nearest-neighbour graph, with pricing (BC only)')
+    parser.add_argument('--price-rounds', type=int, default=3,
+                        help='with --sparse-k: most times the graph is extended and the instance solved again')
+    args = parser.parse_args()
+    if args.slice is not None and args.checkpoint_dir is None:
+        parser.error('--slice needs --checkpoint-dir')
+    if args.sparse_k is not None and args.checkpoint_dir is not None:
+        parser.error('--sparse-k cannot be combined with --checkpoint-dir')
+    # --slice is covered by --checkpoint-dir
+    bc_only = [('--checkpoint-dir', args.checkpoint_dir is not None), ('--sparse-k', args.sparse_k is not None),
+               ('--multi-cut', args.multi_cut != 1)]
+    for flag, used in bc_only:
+        if used and args.backend is not None:
+            parser.error('{} is BC only and cannot be combined with --backend'.format(flag))
+
+    name = os.path.basename(os.path.normpath(args.data_dir))
+    out_dir = os.path.join(args.solution_dir, name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    instances = numbered_files(args.data_dir)
+    # resume: instances with a finished record are skipped
+    todo = [f for f in instances if not os.path.exists(result_path(out_dir, f))]
+    print('dataset:{} instances:{} done:{} todo:{}'.format(name, len(instances), len(instances) - len(todo), len(todo)))
+
+    if todo:
+        workers = max(1, min(args.workers, len(todo)))
+        threads = max(1, args.threads // workers)
+        print('workers:{} threads per model:{}'.format(workers, threads))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_instance, f, result_path(out_dir, f), args.time_limit, threads,
+                                   args.formulation, args.sub_formulation, args.trace_dir, args.backend, args.reduce,
+                                   args.multi_cut, args.checkpoint_dir, args.slice, args.sparse_k, args.price_rounds): f
+                       for f in todo}
+            for future in as_completed(futures):
+                # a failed instance writes no record: it is reported, retried on the next run and blocks the merge
+                try:
+                    ins_file, obj, runtime, finished = future.result()
+                except Exception as e:
+                    print('{} failed: {!r}'.format(os.path.basename(futures[future]), e))
+                    continue
+                print('{} obj:{} time:{:.1f}{}'.format(os.path.basename(ins_file), obj, runtime,
+                                                       '' if finished else ' (checkpointed)'))
+
+    if all(os.path.exists(result_path(out_dir, f)) for f in instances):
+        solution_file = os.path.join(args.solution_dir, name + '.jsonl')
+        merge_results(instances, out_dir, solution_file)
+        print('written {}'.format(solution_file))
+
+
+if __name__ == '__main__':
+    main()
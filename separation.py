@@ -0,0 +1,158 @@
+"""Rounded capacity / subtour elimination separation for the CVRP edge models.
+
+For a customer set S the rounded capacity inequality reads
+
+    sum_{i in S, j not in S} x_ij >= ceil(q(S) / Q)
+
+which also eliminates subtours (q(S) > 0 gives a right-hand side of at least 1).
+In the undirected model, where x_e counts traversals of edge e in either
+direction, the same inequality reads x(delta(S)) >= 2 * ceil(q(S) / Q).
+Candidate sets come from connected components of the support graph and from
+depot-to-customer minimum cuts computed with a max-flow on the same graph.
+"""
+import math
+from collections import deque
+
+try:
+    import gurobipy as gp
+    from gurobipy import GRB
+except ImportError:
+    # capacity_cuts and its helpers are solver independent (used by backends.py without Gurobi)
+    gp = GRB = None
+
+TOL = 1e-6
+
+
+def support_graph(x_val):
+    """Undirected adjacency {i: {j: x_ij + x_ji}} of the edges with positive value."""
+    adj = dict()
+    for (i, j), v in x_val.items():
+        if v > TOL:
+            adj.setdefault(i, dict())
+            adj.setdefault(j, dict())
+            adj[i][j] = adj[i].get(j, 0.0) + v
+            adj[j][i] = adj[j].get(i, 0.0) + v
+    return adj
+
+
+def components(N, adj, threshold=TOL):
+    """Customer sets connected by support edges heavier than ``threshold`` once the depot is removed."""
+    seen = set()
+    comps = []
+    for s in N:
+        if s in seen:
+            continue
+        comp = {s}
+        stack = [s]
+        seen.add(s)
+        while stack:
+            i = stack.pop()
+            for j, w in adj.get(i, {}).items():
+                if j != 0 and j not in seen and w > threshold:
+                    seen.add(j)
+                    comp.add(j)
+                    stack.append(j)
+        comps.append(comp)
+    return comps
+
+
+def min_cut_set(adj, sink):
+    """Customer side of a minimum cut between ``sink`` and the depot (Edmonds-Karp)."""
+    flow = dict()
+
+    def residual(i, j):
+        return adj[i][j] - flow.get((i, j), 0.0)
+
+    while True:
+        parent = {sink: None}
+        queue = deque([sink])
+        while queue and 0 not in parent:
+            i = queue.popleft()
+            for j in adj.get(i, {}):
+                if j not in parent and residual(i, j) > TOL:
+                    parent[j] = i
+                    queue.append(j)
+        if 0 not in parent:
+            # nodes still reachable from the sink form the cut set
+            return set(parent)
+        path = []
+        j = 0
+        while parent[j] is not None:
+            path.append((parent[j], j))
+            j = parent[j]
+        push = min(residual(i, j) for i, j in path)
+        for i, j in path:
+            flow[i, j] = flow.get((i, j), 0.0) + push
+            flow[j, i] = flow.get((j, i), 0.0) - push
+
+
+def capacity_rhs(S, Q, q, undirected=False):
+    return (2 if undirected else 1) * math.ceil(sum(q[i] for i in S) / Q - TOL)
+
+
+def outflow(S, x_val, undirected=False):
+    """x(delta+(S)), or x(delta(S)) for an undirected model."""
+    if undirected:
+        return sum(v for (i, j), v in x_val.items() if (i in S) != (j in S))
+    return sum(v for (i, j), v in x_val.items() if i in S and j not in S)
+
+
+def capacity_cuts(N, Q, q, x_val, fractional=False, undirected=False):
+    """Customer sets whose rounded capacity inequality is violated by ``x_val``.
+
+    On integer points the route components are exact; on fractional points the
+    component heuristic is followed by depot min-cuts for uncovered customers.
+    Each cut is returned as (S, rhs).
+    """
+    adj = support_graph(x_val)
+    candidates = components(N, adj, 0.5 if not fractional else TOL)
+    if fractional:
+        candidates += components(N, adj, 0.5)
+        covered = set()
+        for S in candidates:
+            if outflow(S, x_val, undirected) + TOL < capacity_rhs(S, Q, q, undirected):
+                covered |= S
+        for k in N:
+            if k not in covered and k in adj:
+                S = min_cut_set(adj, k) - {0}
+                candidates.append(S)
+                covered |= S
+
+    cuts, seen = [], set()
+    for S in candidates:
+        key = frozenset(S)
+        if not S or key in seen:
+            continue
+        seen.add(key)
+        rhs = capacity_rhs(S, Q, q, undirected)
+        if outflow(S, x_val, undirected) + TOL < rhs:
+            cuts.append((S, rhs))
+    return cuts
+
+
+def capacity_expr(x, S, undirected=False):
+    if undirected:
+        return gp.quicksum(x[i, j] for (i, j) in x if (i in S) != (j in S))
+    return gp.quicksum(x[i, j] for (i, j) in x if i in S and j not in S)
+
+
+def separate(model, where):
+    """Add violated capacity cuts from a callback; returns True if any were added.
+
+    ``model`` must carry ``_x``, ``_N``, ``_Q``, ``_q`` and ``_formulation``.  Integer
+    solutions get lazy constraints, optimal node relaxations get user cuts.
+    """
+    undirected = model._formulation == 'undirected'
+    if where == GRB.Callback.MIPSOL:
+        x_val = model.cbGetSolution(model._x)
+        cuts = capacity_cuts(model._N, model._Q, model._q, x_val, undirected=undirected)
+        for S, rhs in cuts:
+            model.cbLazy(capacity_expr(model._x, S, undirected) >= rhs)
+        return len(cuts) > 0
+    if where == GRB.Callback.MIPNODE and model.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL:
+        x_val = model.cbGetNodeRel(model._x)
+        cuts = capacity_cuts(model._N, model._Q, model._q, x_val, fractional=True, undirected=undirected)
+        for S, rhs in cuts:
+            model.cbCut(capacity_expr(model._x, S, undirected) >= rhs)
+        return len(cuts) > 0
+    return False
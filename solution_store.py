@@ -0,0 +1,153 @@
+"""Structured solution records, one JSON object per line.
+
+    {"instance": "R-20-100-1", "obj": 6.3, "regret": 6.3, "bound": 6.3, "ttb": 12.5,
+     "runtime": 40.1, "edges": [[0, 1], [0, 2], ...]}
+
+``edges`` is the directed solution edge list; readers return it as an (m, 2)
+integer array.  The legacy ``obj:/regret:/sol:`` text of solution/*.txt and of
+captured result*.log files is parsed with a literal parser (no ``eval``) and
+can be imported:
+
+    python solution_store.py solution/R-20-100.txt                  # -> solution/R-20-100.jsonl
+    python solution_store.py result20-1000.log --dataset R-20-1000 --out solution/R-20-1000-log.jsonl
+"""
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+FIELDS = ['instance', 'obj', 'regret', 'bound', 'ttb', 'runtime']
+
+_EDGE_LIST = re.compile(r'\s*\[\s*(\(\s*\d+\s*,\s*\d+\s*\)\s*(,\s*\(\s*\d+\s*,\s*\d+\s*\)\s*)*)?\]\s*')
+_NUMBER = re.compile(r'\d+')
+
+
+def parse_edges(text):
+    """(m, 2) integer array of a literal edge list such as '[(0, 1), (1, 0)]'."""
+    if not _EDGE_LIST.fullmatch(text):
+        raise ValueError('not an edge list literal: {:.60}'.format(text))
+    return np.array(_NUMBER.findall(text), dtype=np.int64).reshape(-1, 2)
+
+
+def dataset_name(filename):
+    """Dataset family of a solution/result file name, e.g. 'R-20-1000' for result20-1000.log."""
+    found = re.findall(r'(\d+)-(\d+)', os.path.basename(filename))
+    return 'R-{}-{}'.format(*found[-1]) if found else None
+
+
+def instance_id(ins_file):
+    """Instance id of a Data/ file, e.g. 'R-20-100-7' for Data/R-20-100/rcvrp-20-100-7.txt."""
+    return 'R-{}-{}-{}'.format(*re.findall(r'(\d+)-(\d+)-(\d+)\.txt$', ins_file)[0])
+
+
+def instance_number(instance):
+    """1-based instance index of an instance id such as 'R-20-100-7'."""
+    return int(re.findall(r'(\d+)$', str(instance))[0])
+
+
+def make_record(instance, obj, regret, edges, bound=None, ttb=None, runtime=None):
+    return {'instance': instance, 'obj': obj, 'regret': regret, 'bound': bound, 'ttb': ttb,
+            'runtime': runtime, 'edges': np.asarray(edges, dtype=np.int64).reshape(-1, 2)}
+
+
+def _number(value):
+    # 'None' is what write_legacy prints for an instance solved without an incumbent
+    return None if value.strip() == 'None' else float(value)
+
+
+def read_legacy(filename, dataset=None):
+    """Records of an obj/regret/sol text file; lines of any other kind (solver logs) are skipped.
+
+    Instance ids are assigned by position, prefixed with ``dataset`` (default:
+    taken from the file name).
+    """
+    dataset = dataset or dataset_name(filename)
+    records, current = [], {}
+    with open(filename, 'r') as f:
+        for line in f:
+            key, _, value = line.strip().partition(':')
+            if key == 'obj':
+                current = {'obj': _number(value)}
+            elif key == 'regret' and 'obj' in current:
+                current['regret'] = _number(value)
+            elif key == 'sol' and 'regret' in current:
+                k = len(records) + 1
+                instance = '{}-{}'.format(dataset, k) if dataset else str(k)
+                records.append(make_record(instance, current['obj'], current['regret'], parse_edges(value)))
+                current = {}
+    return records
+
+
+def read_records(filename):
+    """Records of a JSON Lines solution file."""
+    records = []
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.strip():
+                r = json.loads(line)
+                r['edges'] = np.asarray(r['edges'], dtype=np.int64).reshape(-1, 2)
+                records.append(r)
+    return records
+
+
+def load_solutions(filename, dataset=None):
+    """Solved records of a solution file in either format, chosen by the extension ('.jsonl' or legacy text).
+
+    Records of instances left without an incumbent (obj None) are dropped.
+    """
+    if filename.endswith('.jsonl'):
+        records = read_records(filename)
+    else:
+        records = read_legacy(filename, dataset)
+    return [r for r in records if r['obj'] is not None]
+
+
+def dumps(record):
+    r = {k: record.get(k) for k in FIELDS}
+    r['edges'] = np.asarray(record['edges'], dtype=np.int64).reshape(-1, 2).tolist()
+    return json.dumps(r)
+
+
+def write_records(filename, records):
+    """Write records atomically (through a temporary file)."""
+    tmp_file = filename + '.tmp'
+    with open(tmp_file, 'w') as f:
+        for r in records:
+            f.write(dumps(r) + '\n')
+    os.replace(tmp_file, filename)
+
+
+def append_record(filename, record):
+    with open(filename, 'a') as f:
+        f.write(dumps(record) + '\n')
+
+
+def write_legacy(filename, records):
+    """Write records in the obj/regret/sol text layout of solution/*.txt."""
+    with open(filename, 'w') as f:
+        for r in records:
+            f.write('obj:{}\n'.format(r['obj']))
+            f.write('regret:{}\n'.format(r['regret']))
+            f.write('sol:{}\n'.format([tuple(e) for e in np.asarray(r['edges']).tolist()]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import legacy obj/regret/sol files into JSON Lines records.')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--dataset', default=None, help='instance id prefix (default: from the file name)')
+    parser.add_argument('--out', default=None, help='output file (single input only; default: <input>.jsonl)')
+    args = parser.parse_args()
+    if args.out and len(args.files) > 1:
+        parser.error('--out needs a single input file')
+
+    for filename in args.files:
+        records = read_legacy(filename, args.dataset)
+        out = args.out or os.path.splitext(filename)[0] + '.jsonl'
+        write_records(out, records)
+        print('{} -> {}: {} records'.format(filename, out, len(records)))
+
+
+if __name__ == '__main__':
+    main()
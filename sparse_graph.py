@@ -0,0 +1,126 @@
+"""Sparse candidate graphs for the master and the inner CVRP.
+
+The candidate graph keeps, for every customer, the edges to its ``k`` nearest
+neighbours under d_down and under d_up, plus every depot edge; as with the
+preprocess rules it is a boolean mask over the edges of an EdgeIndex
+(True: keep).  Leaving out edges can cut off the optimum, so ``price_edges``
+solves the LP relaxation of the master over the kept edges and adds back the
+edges whose reduced cost is negative, as column generation does.  BC.solve_sparse
+alternates it with the restricted branch-and-cut.
+
+    python sparse_graph.py Data/R-50-1000 --k 10
+"""
+import argparse
+import os
+
+import numpy as np
+
+from convertSol import numbered_files, read_instance
+from edge_index import EdgeIndex
+from preprocess import dense
+
+EPS = 1e-6
+
+
+def knn_mask(edges, k):
+    """Keep mask of the k-nearest-neighbour graph under d_down and d_up, depot edges included."""
+    size = edges.n + 1
+    keep = np.zeros((size, size), dtype=bool)
+    rows = np.arange(1, size)[:, None]
+    for vec in (edges.d_down, edges.d_up):
+        d = dense(edges, vec)
+        # customers only: depot edges are always kept
+        d[:, 0] = np.inf
+        np.fill_diagonal(d, np.inf)
+        near = np.argsort(d[1:], axis=1, kind='stable')[:, :min(k, edges.n - 1)]
+        keep[rows, near] = True
+    keep |= keep.T
+    i, j = edges.pairs.T
+    return (i == 0) | keep[i, j]
+
+
+def price_edges(edges, keep, q, Q, supports=(), allowed=None, limit=None, max_rounds=50):
+    """Edges to add to the candidate graph ``keep``, by pricing the master's LP relaxation.
+
+    The LP is the undirected relaxation of the master: x_e in [0, 1] ([0, 2] on
+    depot edges) with degree 2 at every customer, the capacity bound
+    sum_e x_e >= 2 ceil(sum q / Q) on the depot edges, and one Benders row
+    r <= sum_{e in y} d_down_e + delta_e x_e per support y of ``supports``.
+    Edges outside ``keep`` (and inside ``allowed``, default: all) with a negative
+    reduced cost c_e - pi_i - pi_j - sum_y pi_y delta_e |y|_e (less the dual of
+    the capacity bound on depot edges) are added, at most ``limit`` per round,
+    and the LP is re-solved until none is left.  Returns a
+    bool mask of the added edges.
+    """
+    import gurobipy as gp
+    from gurobipy import GRB
+
+    keep = keep.copy()
+    added = np.zeros(len(edges), dtype=bool)
+    i, j = edges.pairs.T
+    # |y|_e per Benders row, one dense row per support
+    counts = np.zeros((len(supports), len(edges)))
+    for row, y in enumerate(supports):
+        np.add.at(counts[row], edges.ids(y), 1.0)
+    vehicles = int(np.ceil(sum(q) / Q - EPS))
+
+    lp = gp.Model('pricing')
+    lp.Params.outputFlag = False
+    r = lp.addVar(ub=2 * float(edges.d_up.sum()), name='r')
+    deg = [lp.addConstr(gp.LinExpr() == 2) for _ in range(edges.n)]
+    depot = lp.addConstr(gp.LinExpr() >= 2 * vehicles)
+    cuts = [lp.addConstr(-r >= -float(edges.d_down @ c)) for c in counts]
+    lp.setObjective(-r, GRB.MINIMIZE)
+
+    def add_columns(ids):
+        for e in ids.tolist():
+            col = gp.Column()
+            for k in (i[e], j[e]):
+                if k != 0:
+                    col.addTerms(1.0, deg[k - 1])
+            if i[e] == 0:
+                col.addTerms(1.0, depot)
+            for row in np.flatnonzero(counts[:, e]).tolist():
+                col.addTerms(edges.delta[e] * counts[row, e], cuts[row])
+            lp.addVar(ub=2 if i[e] == 0 else 1, obj=edges.d_up[e], column=col)
+
+    add_columns(np.flatnonzero(keep))
+    for _ in range(max_rounds):
+        lp.optimize()
+        if lp.Status != GRB.OPTIMAL:
+            break
+        pi = np.zeros(edges.n + 1)
+        pi[1:] = lp.getAttr('Pi', deg)
+        rc = edges.d_up - pi[i] - pi[j] - edges.delta * (np.asarray(lp.getAttr('Pi', cuts)) @ counts
+                                                         if len(cuts) else 0.0)
+        rc[i == 0] -= depot.Pi
+        rc[keep] = 0.0
+        if allowed is not None:
+            rc[~allowed] = 0.0
+        ids = np.flatnonzero(rc < -EPS)
+        if len(ids) == 0:
+            break
+        ids = ids[np.argsort(rc[ids], kind='stable')][:limit]
+        keep[ids] = added[ids] = True
+        add_columns(ids)
+    return added
+
+
+def summary(keep):
+    return 'candidates:{}/{}'.format(int(keep.sum()), len(keep))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the candidate graph of every instance of a family.')
+    parser.add_argument('data_dir', help='instance family, e.g. Data/R-50-1000')
+    parser.add_argument('--k', type=int, default=10, help='nearest neighbours per customer')
+    args = parser.parse_args()
+
+    for ins_file in numbered_files(args.data_dir):
+        d_up, d_down, q = read_instance(ins_file)
+        keep = knn_mask(EdgeIndex.from_matrices(d_down, d_up), args.k)
+        print('{} {}'.format(os.path.basename(ins_file), summary(keep)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Bounded-memory evaluation of solutions against (very large) sample files.
+
+Samples are parsed chunk by chunk from a generator and folded into running
+statistics (Welford mean/std, min/max and P^2 quantile sketches), so memory does
+not grow with the number of samples in a group file.
+
+Each sample's ``node_demand`` is checked against the vehicle capacity Q on the
+routes rebuilt from the solution edges: the report adds the probability that
+some route is overloaded, the expected overflow and the expected cost of the
+detour-to-depot recourse, which is also added to the distance cost.
+
+    python stream_evaluate.py solution/R-50-1000.jsonl sample-data/R-50-1000-sample
+"""
+import argparse
+import os
+
+from convertSol import group_instances, read_samples, sample_store
+from eval_engine import RouteIndex, demand_rounding, iter_samples, path_costs
+from evaluation_report import parse_solution_file
+from stream_stats import P2Quantile, RunningStats
+
+QUANTILES = [0.05, 0.5, 0.95]
+CAPACITY = ['overloaded', 'overflow', 'recourse']
+
+
+def evaluate_group(sample_file, edges, chunk=256, Q=1.0):
+    """Running statistics of one solution over a group file, or over its slot of the convertSol store.
+
+    Returns (distance-cost stats, quantile sketches of the distance cost,
+    {name: stats} for the CAPACITY figures and the total cost 'distance + recourse').
+    """
+    stats = RunningStats()
+    sketches = [P2Quantile(p) for p in QUANTILES]
+    capacity = {name: RunningStats() for name in CAPACITY + ['total']}
+    routes = RouteIndex.from_edges(edges)
+    if sample_store(os.path.dirname(sample_file)) is not None:
+        # memory-mapped: slicing reads one chunk at a time
+        dist, demands = read_samples(sample_file)
+        chunks = ((dist[s:s + chunk], demands[s:s + chunk]) for s in range(0, len(dist), chunk))
+    else:
+        chunks = iter_samples(sample_file, chunk, demand=True)
+    for samples, demand in chunks:
+        costs = path_costs(samples, edges)
+        stats.merge(RunningStats.from_array(costs))
+        for cost in costs.tolist():
+            for sketch in sketches:
+                sketch.add(cost)
+        figures = routes.capacity(samples, demand, Q, rounding=demand_rounding(demand))
+        figures['total'] = costs + figures['recourse']
+        for name, values in figures.items():
+            capacity[name].merge(RunningStats.from_array(values))
+    return stats, sketches, capacity
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream sample files and report cost statistics per instance.')
+    parser.add_argument('solution_file')
+    parser.add_argument('sample_dir')
+    parser.add_argument('--output', default=None, help='report file (default: print only)')
+    parser.add_argument('--chunk', type=int, default=256, help='samples parsed per vectorized batch')
+    parser.add_argument('--Q', type=float, default=1.0, help='vehicle capacity')
+    args = parser.parse_args()
+
+    solutions = parse_solution_file(args.solution_file)
+    total = RunningStats()
+    total_capacity = {name: RunningStats() for name in CAPACITY + ['total']}
+    lines = ['实例\tobj值\tregret\t样本数\t平均成本\t标准差\t最小成本\t最大成本\t'
+             + '\t'.join('q{:g}'.format(p) for p in QUANTILES)
+             + '\t超载概率\t期望超载量\t期望补救成本\t期望总成本']
+    # group_k holds the k-th instance in lexicographic file order, checked against its header
+    groups = {number: g for g, number in group_instances(args.sample_dir).items()}
+    for number, solution in sorted(solutions.items()):
+        if number not in groups:
+            continue
+        instance_idx = groups[number]
+        sample_file = os.path.join(args.sample_dir, 'group_{}.txt'.format(instance_idx))
+        stats, sketches, capacity = evaluate_group(sample_file, solution['edges'], args.chunk, args.Q)
+        total.merge(stats)
+        for name, c in capacity.items():
+            total_capacity[name].merge(c)
+        lines.append('{}\t{:.4f}\t{:.4f}\t{}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t'.format(
+            number, solution['obj'], solution['regret'], stats.count, stats.mean, stats.std,
+            stats.min, stats.max) + '\t'.join('{:.4f}'.format(s.value()) for s in sketches)
+            + ''.join('\t{:.4f}'.format(capacity[name].mean) for name in CAPACITY + ['total']))
+
+    lines.append('')
+    lines.append('总样本数: {}'.format(total.count))
+    lines.append('总平均成本: {:.4f}'.format(total.mean))
+    lines.append('总标准差: {:.4f}'.format(total.std))
+    lines.append('超载概率: {:.4f}'.format(total_capacity['overloaded'].mean))
+    lines.append('期望超载量: {:.4f}'.format(total_capacity['overflow'].mean))
+    lines.append('期望补救成本: {:.4f}'.format(total_capacity['recourse'].mean))
+    lines.append('期望总成本: {:.4f}'.format(total_capacity['total'].mean))
+    report = '\n'.join(lines) + '\n'
+    print(report, end='')
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+
+
+if __name__ == '__main__':
+    main()
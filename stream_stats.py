@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+
+
+class RunningStats:
+    """Count, mean, variance (Welford), min and max of a stream in O(1) memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    @classmethod
+    def from_array(cls, values):
+        """Statistics of a whole array at once, to be merged into a running total."""
+        stats = cls()
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size:
+            stats.count = values.size
+            stats.mean = float(values.mean())
+            stats._m2 = float(((values - stats.mean) ** 2).sum())
+            stats.min = float(values.min())
+            stats.max = float(values.max())
+        return stats
+
+    def merge(self, other):
+        """Combine with another RunningStats (Chan et al. parallel update)."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        """Population variance, as calculate_std in evaluation_report.py."""
+        return self._m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P^2 algorithm (Jain & Chlamtac, 1985).
+
+    Keeps five markers regardless of the stream length; exact for the first five values.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._pos = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._incr = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        h = self._heights
+        self.count += 1
+        if len(h) < 5:
+            h.append(x)
+            h.sort()
+            return
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= x < h[i + 1])
+        for i in range(k + 1, 5):
+            self._pos[i] += 1
+        for i in range(5):
+            self._desired[i] += self._incr[i]
+
+        n = self._pos
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                # piecewise-parabolic prediction, linear if it leaves the neighbours' range
+                q = h[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if not h[i - 1] < q < h[i + 1]:
+                    q = h[i] + s * (h[i + s] - h[i]) / (n[i + s] - n[i])
+                h[i] = q
+                n[i] += s
+
+    def value(self):
+        h = self._heights
+        if not h:
+            return 0.0
+        if self.count <= 5:
+            return h[int(round(self.p * (len(h) - 1)))]
+        return h[2]
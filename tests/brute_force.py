@@ -0,0 +1,51 @@
+"""Exact min-max regret of tiny instances by enumerating every routing."""
+import itertools
+import os
+
+import numpy as np
+
+from convertSol import parse_instance
+from edge_index import EdgeIndex
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def partitions(items):
+    if not items:
+        yield []
+        return
+    first, rest = items[0], items[1:]
+    for p in partitions(rest):
+        for k in range(len(p)):
+            yield p[:k] + [[first] + p[k]] + p[k + 1:]
+        yield [[first]] + p
+
+
+def routings(edges, q, Q):
+    """(M, |E|) edge counts of every feasible routing, a route and its reverse counted once."""
+    rows = set()
+    for p in partitions(list(range(1, edges.n + 1))):
+        if any(sum(q[i] for i in block) > Q + 1e-9 for block in p):
+            continue
+        for routes in itertools.product(*[list(itertools.permutations(block)) for block in p]):
+            counts = np.zeros(len(edges), dtype=int)
+            for route in routes:
+                path = [0] + list(route) + [0]
+                np.add.at(counts, edges.ids(list(zip(path, path[1:]))), 1)
+            rows.add(tuple(counts))
+    return np.array(sorted(rows))
+
+
+def min_max_regret(edges, q, Q):
+    """min over routings x of cost_up(x) - min over routings y of y's cost with d_up on x's edges."""
+    counts = routings(edges, q, Q)
+    used = (counts > 0).astype(float)
+    worst = counts @ edges.d_down[:, None] + counts @ (edges.delta[:, None] * used.T)
+    return float((counts @ edges.d_up - worst.min(axis=0)).min())
+
+
+def prefix_instance(idx, n=5, vehicles=1.5):
+    """(edges, q) of the depot and first ``n`` customers of R-20-100-idx, demands scaled to ``vehicles`` loads."""
+    d_up, d_down, q = parse_instance(os.path.join(ROOT, 'Data', 'R-20-100', 'rcvrp-20-100-{}.txt'.format(idx)))
+    q = q[:n + 1] * vehicles / q[1:n + 1].sum()
+    return EdgeIndex.from_matrices(d_down[:n + 1, :n + 1], d_up[:n + 1, :n + 1]), q.tolist()
@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+gp = pytest.importorskip('gurobipy')
+from gurobipy import GRB  # noqa: E402
+
+import BC  # noqa: E402
+from brute_force import min_max_regret, prefix_instance  # noqa: E402
+from heuristics import route_edges  # noqa: E402
+
+N = [1, 2, 3, 4, 5]
+Q = 1.0
+q = [0, 0.3, 0.3, 0.3, 0.3, 0.3]
+ROUTES = [[0, 1, 2, 0], [0, 3, 4, 5, 0]]
+
+
+def undirected(edges):
+    return sorted((min(e), max(e)) for e in edges)
+
+
+def small_instance():
+    d_down, d_up = dict(), dict()
+    for i in range(6):
+        for j in range(6):
+            if i != j:
+                d_down[i, j] = 0.1 + 0.01 * (i + j)
+                d_up[i, j] = 2 * d_down[i, j]
+    return d_down, d_up
+
+
+class NoRouting:
+    """A subproblem that hits its time limit before finding any routing."""
+    status = GRB.TIME_LIMIT
+    bound = 0.0
+    last_setup_time = last_solve_time = 0.0
+
+    def solve(self, d, starts=(), threshold=None):
+        return None, None
+
+
+class Callback:
+    """The master model as seen from a MIPSOL callback at a fixed incumbent."""
+
+    def __init__(self, model, x_sol, r_sol):
+        self._model, self._x_sol, self._r_sol = model, x_sol, r_sol
+        self.lazy = []
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def cbGetSolution(self, var):
+        return self._r_sol if var is self._model._r else self._x_sol
+
+    def cbGet(self, what):
+        return 0.0
+
+    def cbLazy(self, constr):
+        self.lazy.append(constr)
+
+
+def incumbent_callback(r_sol):
+    d_down, d_up = small_instance()
+    model, x, r = BC.set_bd_model(N, list(d_down), Q, q, d_down, d_up)
+    model._oracle = 'exact'
+    model._sub = NoRouting()
+    x_sol = dict.fromkeys(x, 0.0)
+    x_sol.update(dict.fromkeys(route_edges(ROUTES), 1.0))
+    cost = sum(d_up[e] for e in route_edges(ROUTES))
+    return Callback(model, x_sol, r_sol(cost))
+
+
+def test_no_routing_adds_no_cut():
+    # the pooled incumbent does not cut off r_sol, and the bound proves nothing
+    mod = incumbent_callback(lambda cost: cost)
+    BC.gen_cut(mod, GRB.Callback.MIPSOL)
+    assert mod.lazy == []
+    assert mod._undecided == 1
+    assert mod._ttb is None
+
+
+def test_no_routing_cuts_with_a_pooled_routing(monkeypatch):
+    supports = []
+    benders_expr = BC.benders_expr
+
+    def recorded(model, y_sol):
+        supports.append(list(y_sol))
+        return benders_expr(model, y_sol)
+
+    monkeypatch.setattr(BC, 'benders_expr', recorded)
+    mod = incumbent_callback(lambda cost: cost + 1.0)
+    BC.gen_cut(mod, GRB.Callback.MIPSOL)
+    assert len(mod.lazy) == 1
+    # the cut comes from a routing, not the empty support that gives 0 >= r
+    assert undirected(supports[-1]) == undirected(route_edges(ROUTES))
+    assert mod._undecided == 0
+
+
+def test_undecided_incumbent_leaves_the_result_unproven(monkeypatch):
+    d_down, d_up = small_instance()
+    def no_routing(self, d, starts=(), threshold=None):
+        self.status, self.bound = GRB.TIME_LIMIT, 0.0
+        return None, None
+
+    # every exact subproblem solve runs out of time without a routing
+    monkeypatch.setattr(BC.CVRPSubproblem, 'solve', no_routing)
+    checkpoint = BC.Checkpoint(None)
+    obj, bound, sol, _, _ = BC.solve_bc(len(N), Q, q, d_down, d_up, 60, checkpoint=checkpoint, reduce=(),
+                                        oracle='exact', warm=False)
+    assert sol
+    assert bound is None
+    assert checkpoint.status == GRB.SUBOPTIMAL and checkpoint.bound is None
+
+
+def test_checkpoint_counts_wall_clock_time():
+    d_down, d_up = small_instance()
+    checkpoint = BC.Checkpoint(None)
+    t_start = time.time()
+    BC.solve_bc(len(N), Q, q, d_down, d_up, 60, checkpoint=checkpoint, reduce=())
+    wall = time.time() - t_start
+    # warm start and model building included, not only the branch-and-cut
+    assert wall - 0.5 <= checkpoint.elapsed <= wall
+    assert checkpoint.status == GRB.OPTIMAL
+
+
+@pytest.mark.parametrize('idx', [1, 2, 3])
+@pytest.mark.parametrize('options', [dict(), dict(warm=False, reduce=(), early_stop=False),
+                                     dict(formulation='cut', sub_formulation='cut'),
+                                     dict(formulation='undirected', sub_formulation='undirected')],
+                         ids=['default', 'cold', 'cut', 'undirected'])
+def test_regret_matches_brute_force(idx, options):
+    edges, q_small = prefix_instance(idx)
+    d_down, d_up = edges.to_dict(edges.d_down), edges.to_dict(edges.d_up)
+    n = edges.n
+    obj, _, _, _, x_e = BC.solve_bc(n, Q, q_small, d_down, d_up, 60, **options)
+    regret = BC.get_regret(list(range(1, n + 1)), Q, q_small, d_down, d_up, x_e)[0]
+    best = min_max_regret(edges, q_small, Q)
+    assert regret == pytest.approx(best, abs=1e-6)
+    # the master's objective is the regret of its routing once every cut is in
+    assert obj == pytest.approx(best, abs=1e-6)
+
+
+def test_sparse_solve_returns_no_bound():
+    edges, q_small = prefix_instance(1)
+    d_down, d_up = edges.to_dict(edges.d_down), edges.to_dict(edges.d_up)
+    n = edges.n
+    obj, bound, _, _, x_e = BC.solve_sparse(n, Q, q_small, d_down, d_up, 60, k=1, price_rounds=2, edges=edges)
+    # a bound of the k-nearest-neighbour graph is no bound of the complete one
+    assert bound is None
+    regret = BC.get_regret(list(range(1, n + 1)), Q, q_small, d_down, d_up, x_e)[0]
+    assert regret >= min_max_regret(edges, q_small, Q) - 1e-6
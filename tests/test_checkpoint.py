@@ -0,0 +1,16 @@
+from checkpoint import Checkpoint
+
+
+def test_resumed_run_keeps_the_stronger_bound(tmp_path):
+    filename = str(tmp_path / 'ckpt.json')
+    ckpt = Checkpoint(filename)
+    ckpt.update(10.0, bound=2.5)
+    ckpt.save()
+
+    resumed = Checkpoint.load(filename)
+    # the new master starts over from a weak bound
+    resumed.update(1.0, bound=1.0)
+    assert resumed.bound == 2.5
+    assert resumed.elapsed == 11.0
+    resumed.update(5.0, bound=3.0)
+    assert resumed.bound == 3.0
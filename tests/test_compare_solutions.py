@@ -0,0 +1,27 @@
+import os
+import shutil
+
+import pytest
+
+from compare_solutions import compare, group_sources
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = os.path.join(ROOT, 'sample-data', 'R-20-100-sample')
+SOLUTIONS = os.path.join(ROOT, 'solution', 'R-20-100.jsonl')
+
+
+def test_group_sources_follow_the_headers():
+    sources = dict(group_sources(SAMPLES))
+    assert os.path.basename(sources[2]) == 'group_11.txt'
+    assert os.path.basename(sources[10]) == 'group_1.txt'
+
+
+def test_blocks_are_released_when_a_group_fails_to_parse(tmp_path):
+    sample_dir = tmp_path / 'R-20-100-sample'
+    shutil.copytree(SAMPLES, sample_dir)
+    with open(sample_dir / 'group_7.txt', 'a') as f:
+        f.write('\ndist_matrix:\n0.1 0.2\n')
+    before = set(os.listdir('/dev/shm'))
+    with pytest.raises(ValueError):
+        compare([str(sample_dir)], [('bc', [SOLUTIONS])], workers=2)
+    assert set(os.listdir('/dev/shm')) <= before
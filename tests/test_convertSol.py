@@ -0,0 +1,64 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from convertSol import (convert_instances, convert_samples, group_instances, parse_instance, parse_sample_group,
+                        read_instance, read_samples, sample_store)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = os.path.join(ROOT, 'sample-data', 'R-20-100-sample')
+
+
+def test_groups_follow_lexicographic_instance_order():
+    mapping = group_instances(SAMPLES)
+    assert [mapping[g] for g in range(20)] == sorted(range(1, 21), key=str)
+
+
+def test_group_without_matching_instance_fails(tmp_path):
+    data_dir = tmp_path / 'R-20-100'
+    data_dir.mkdir()
+    # instances of another family: no header matches
+    src = os.path.join(ROOT, 'Data', 'R-20-1000')
+    for f in os.listdir(src):
+        shutil.copy(os.path.join(src, f), data_dir / f.replace('-1000-', '-100-'))
+    with pytest.raises(ValueError):
+        group_instances(SAMPLES, str(data_dir))
+
+
+@pytest.fixture
+def converted(tmp_path):
+    """Copies of Data/R-20-100 and its sample dataset, converted into store/ beside them."""
+    for parent, name in [('Data', 'R-20-100'), ('sample-data', 'R-20-100-sample')]:
+        shutil.copytree(os.path.join(ROOT, parent, name), tmp_path / parent / name)
+    convert_instances(str(tmp_path / 'Data' / 'R-20-100'), str(tmp_path / 'store' / 'R-20-100'))
+    convert_samples(str(tmp_path / 'sample-data' / 'R-20-100-sample'), str(tmp_path / 'store' / 'R-20-100-sample'))
+    return tmp_path
+
+
+def test_readers_use_the_store(converted):
+    ins_file = str(converted / 'Data' / 'R-20-100' / 'rcvrp-20-100-7.txt')
+    stored = read_instance(ins_file)
+    assert all(isinstance(a, np.memmap) for a in stored)
+    for a, b in zip(stored, parse_instance(ins_file)):
+        assert np.array_equal(a, b)
+
+    sample_dir = str(converted / 'sample-data' / 'R-20-100-sample')
+    assert sample_store(sample_dir) == str(converted / 'store' / 'R-20-100-sample')
+    group_file = os.path.join(sample_dir, 'group_12.txt')
+    stored = read_samples(group_file)
+    assert all(isinstance(a, np.memmap) for a in stored)
+    for a, b in zip(stored, parse_sample_group(group_file)[2:]):
+        assert np.array_equal(a, b)
+
+
+def test_readers_skip_a_stale_store(converted):
+    ins_file = converted / 'Data' / 'R-20-100' / 'rcvrp-20-100-7.txt'
+    group_file = converted / 'sample-data' / 'R-20-100-sample' / 'group_12.txt'
+    later = os.path.getmtime(converted / 'store' / 'R-20-100' / 'q.npy') + 10
+    for f in (ins_file, group_file):
+        os.utime(f, (later, later))
+    assert not isinstance(read_instance(str(ins_file))[0], np.memmap)
+    assert sample_store(str(group_file.parent)) is None
+    assert not isinstance(read_samples(str(group_file))[0], np.memmap)
@@ -0,0 +1,25 @@
+import numpy as np
+
+from eval_engine import RouteIndex, demand_rounding
+
+
+def capacity(demand, rounding=None):
+    demand = np.array([demand])
+    routes = RouteIndex([[1, 2, 3]])
+    if rounding is None:
+        rounding = demand_rounding(demand)
+    return routes.capacity(np.ones((1, 4, 4)), demand, 1.0, rounding=rounding)
+
+
+def test_rounded_demands_of_a_full_route_fit():
+    # 10/30 + 10/30 + 10/30 written with 4 decimals
+    figures = capacity([0.0, 0.3333, 0.3334, 0.3334])
+    assert not figures['overloaded'][0] and figures['overflow'][0] == 0 and figures['recourse'][0] == 0
+
+
+def test_small_overload_of_exact_demands_counts():
+    figures = capacity([0.0, 1 / 3, 1 / 3, 1 / 3 + 1e-4])
+    assert figures['overloaded'][0]
+    assert np.isclose(figures['overflow'][0], 1e-4)
+    # the vehicle returns to the depot before the last customer
+    assert figures['recourse'][0] == 2.0
@@ -0,0 +1,15 @@
+import numpy as np
+
+from convertSol import parse_instance
+from generate_instances import instance_rng, make_instance, write_instance
+
+
+def test_demands_read_back_exactly(tmp_path):
+    capacity = 30
+    d_up, d_down, q = make_instance(40, 1000, instance_rng(0, 40, 1), capacity)
+    filename = str(tmp_path / 'rcvrp-40-1000-1.txt')
+    write_instance(filename, d_up, d_down, q)
+    _, _, q_read = parse_instance(filename)
+    units = np.round(q_read * capacity)
+    assert np.array_equal(q_read, units / capacity)
+    assert np.array_equal(q_read, q)
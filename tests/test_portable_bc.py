@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import portable_bc
+from brute_force import min_max_regret, prefix_instance
+from convertSol import parse_instance
+from edge_index import EdgeIndex
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the solver package each backend imports
+MODULES = {'highs': 'highspy', 'cbc': 'pulp', 'gurobi': 'gurobipy'}
+
+
+def small_instance(m=7):
+    """The depot and first six customers of R-20-100-1."""
+    d_up, d_down, q = parse_instance(os.path.join(ROOT, 'Data', 'R-20-100', 'rcvrp-20-100-1.txt'))
+    return m - 1, q[:m].tolist(), EdgeIndex.from_matrices(d_down[:m, :m], d_up[:m, :m])
+
+
+@pytest.mark.parametrize('formulation', ['cut', 'mtz'])
+@pytest.mark.parametrize('backend', sorted(MODULES))
+def test_backend_smoke(backend, formulation):
+    pytest.importorskip(MODULES[backend])
+    n, q, edges = small_instance()
+    obj, bound, sol, ttb, x_e = portable_bc.solve_bc_portable(
+        n, 1.0, q, None, None, 120, backend=backend, formulation=formulation, sub_formulation=formulation,
+        edges=edges)
+    assert obj is not None
+    # every customer is left exactly once
+    assert sorted(i for i, _ in sol if i != 0) == list(range(1, n + 1))
+    sub = portable_bc.PortableSubproblem(backend, list(range(1, n + 1)), edges.directed(), 1.0, q, edges,
+                                         formulation=formulation)
+    regret, cost_x, y_val, _ = portable_bc.portable_regret(edges, sub, x_e)
+    assert 0 <= regret <= cost_x
+
+
+class NoRouting:
+    """A subproblem that always runs out of time before finding a routing."""
+    status = None
+    num_solves = 0
+    solve_time = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def solve(self, d, start=None):
+        return None, None
+
+
+def test_subproblem_without_routing(monkeypatch):
+    pytest.importorskip('highspy')
+    monkeypatch.setattr(portable_bc, 'PortableSubproblem', NoRouting)
+    n, q, edges = small_instance()
+    assert portable_bc.portable_regret(edges, NoRouting(), {(0, 1): 1, (1, 0): 1})[0] is None
+    # the callback neither raises nor caches None; the master still returns a routing
+    obj, bound, sol, _, _ = portable_bc.solve_bc_portable(n, 1.0, q, None, None, 60, backend='highs', warm=False,
+                                                           edges=edges)
+    assert obj is not None and sol
+    # nothing certified the accepted point
+    assert bound is None
+
+
+@pytest.mark.parametrize('idx', [1, 2, 3])
+@pytest.mark.parametrize('backend', sorted(MODULES))
+def test_regret_matches_brute_force(backend, idx):
+    pytest.importorskip(MODULES[backend])
+    edges, q = prefix_instance(idx)
+    obj, _, _, _, x_e = portable_bc.solve_bc_portable(edges.n, 1.0, q, None, None, 60, backend=backend,
+                                                      edges=edges)
+    sub = portable_bc.PortableSubproblem(backend, list(range(1, edges.n + 1)), edges.directed(), 1.0, q, edges)
+    best = min_max_regret(edges, q, 1.0)
+    assert portable_bc.portable_regret(edges, sub, x_e)[0] == pytest.approx(best, abs=1e-6)
+    assert obj == pytest.approx(best, abs=1e-6)
@@ -0,0 +1,53 @@
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from regret_evaluate import OracleCache, oracle_costs, solve_sample
+
+
+@pytest.fixture
+def deadline():
+    """Fail instead of hanging when a heuristic does not terminate."""
+    def expired(signum, frame):
+        raise TimeoutError('oracle did not terminate')
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.alarm(30)
+    yield
+    signal.alarm(0)
+    signal.signal(signal.SIGALRM, previous)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_heuristic_oracle_on_asymmetric_costs(deadline, seed):
+    rng = np.random.default_rng(seed)
+    n = 20
+    dist = rng.uniform(0.05, 0.5, size=(n + 1, n + 1))
+    np.fill_diagonal(dist, 0)
+    demand = np.concatenate([[0.0], rng.integers(1, 10, size=n) / 30])
+    cost = solve_sample(dist, demand, 1.0)
+    # each route driven in its cheaper direction costs at most its symmetric cost,
+    # which local search keeps below the out-and-back routing's
+    assert 0 < cost <= dist[0, 1:].sum() + dist[1:, 0].sum() + 1e-9
+
+
+def test_oracle_costs_across_groups():
+    rng = np.random.default_rng(0)
+    n = 8
+    groups = []
+    for size in (1, 3, 2):
+        dist = rng.uniform(0.05, 0.5, size=(size, n + 1, n + 1))
+        dist[:, range(n + 1), range(n + 1)] = 0
+        demand = np.zeros((size, n + 1))
+        demand[:, 1:] = rng.integers(1, 10, size=(size, n)) / 30
+        groups.append((dist, demand))
+    # the same sample in two groups is solved once
+    groups[2][0][1], groups[2][1][1] = groups[1][0][0], groups[1][1][0]
+    cache = OracleCache()
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        costs = oracle_costs(groups, 1.0, cache, pool, batch=2, workers=2)
+    assert (cache.misses, cache.hits) == (5, 1)
+    for (dist, demand), group_costs in zip(groups, costs):
+        assert group_costs.tolist() == [solve_sample(d, q, 1.0) for d, q in zip(dist, demand)]
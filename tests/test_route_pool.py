@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from edge_index import EdgeIndex
+from heuristics import route_edges
+from route_pool import RoutePool
+
+
+def small_edges(n=5):
+    rng = np.random.default_rng(0)
+    d_up = rng.uniform(1, 2, size=(n + 1, n + 1))
+    d_up = (d_up + d_up.T) / 2
+    np.fill_diagonal(d_up, 0)
+    return EdgeIndex.from_matrices(d_up / 2, d_up)
+
+
+A = route_edges([[0, 1, 2, 0], [0, 3, 4, 5, 0]])
+B = route_edges([[0, 1, 0], [0, 2, 3, 4, 5, 0]])
+C = route_edges([[0, 5, 4, 3, 2, 1, 0]])
+D = route_edges([[0, 1, 2, 3, 0], [0, 4, 5, 0]])
+
+
+def test_routings_are_deduplicated_on_their_edge_multiset():
+    pool = RoutePool(small_edges())
+    assert pool.add(A)
+    # the same routes driven the other way round
+    assert not pool.add(route_edges([[0, 2, 1, 0], [0, 5, 4, 3, 0]]))
+    assert pool.add(B)
+    assert not pool.add([])
+    assert len(pool) == 2
+    cost, y_sol = pool.best(pool.edges.d_up)
+    assert cost == pytest.approx(min(pool.edges.d_up[pool.edges.ids(y)].sum() for y in (A, B)))
+
+
+def test_eviction_keeps_the_most_recently_best():
+    edges = small_edges()
+    pool = RoutePool(edges, max_size=3)
+    for y in (A, B, C):
+        pool.add(y)
+    _, best = pool.best(edges.d_up)
+    assert pool.add(D)
+    # 90% of max_size: the last best routing and the newest one
+    assert len(pool) == 2
+    kept = [sorted(pool.route_set(k)) for k in range(len(pool))]
+    assert sorted(best) in kept and sorted(D) in kept
+
+
+def test_eviction_keeps_at_least_one_routing():
+    pool = RoutePool(small_edges(), max_size=1)
+    for y in (A, B, C):
+        assert pool.add(y)
+        assert len(pool) == 1
+    assert sorted(pool.best(pool.edges.d_up)[1]) == sorted(C)
+
+
+def test_save_and_load(tmp_path):
+    edges = small_edges()
+    pool = RoutePool(edges, max_size=10)
+    for y in (A, B, C):
+        pool.add(y)
+    filename = str(tmp_path / 'pool.npz')
+    pool.save(filename)
+    loaded = RoutePool.load(filename, edges)
+    assert len(loaded) == 3 and loaded.max_size == 10
+    assert np.allclose(np.sort(loaded.scores(edges.d_down)), np.sort(pool.scores(edges.d_down)))
+    assert not loaded.add(A)
+    with pytest.raises(ValueError):
+        RoutePool.load(filename, small_edges(4))
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import portable_bc
+import run_batch
+from run_batch import merge_results, result_path, run_instance
+from solution_store import load_solutions, read_legacy, read_records
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INSTANCE = os.path.join(ROOT, 'Data', 'R-20-100', 'rcvrp-20-100-1.txt')
+
+
+def test_instance_without_incumbent_is_recorded_and_merged(tmp_path, monkeypatch):
+    monkeypatch.setattr(portable_bc, 'solve_bc_portable', lambda *args, **kwargs: (None, None, None))
+    out_file = result_path(str(tmp_path), INSTANCE)
+    _, obj, _, finished = run_instance(INSTANCE, out_file, 1.0, 1, backend='highs')
+    assert obj is None and finished
+
+    [record] = read_records(out_file)
+    assert record['instance'] == 'R-20-100-1'
+    assert record['obj'] is None and record['regret'] is None and record['bound'] is None
+    assert len(record['edges']) == 0
+
+    solution_file = str(tmp_path / 'R-20-100.jsonl')
+    merge_results([INSTANCE], str(tmp_path), solution_file)
+    legacy = read_legacy(str(tmp_path / 'R-20-100.txt'))
+    assert len(legacy) == 1 and legacy[0]['obj'] is None
+    # the evaluators only see solved instances
+    assert load_solutions(solution_file) == []
+    assert load_solutions(str(tmp_path / 'R-20-100.txt')) == []
+
+
+def _fail(ins_file, *args):
+    raise RuntimeError('solver crashed on ' + os.path.basename(ins_file))
+
+
+def test_failed_instances_are_reported_and_the_batch_goes_on(tmp_path, monkeypatch, capsys):
+    data_dir = tmp_path / 'R-20-100'
+    data_dir.mkdir()
+    for idx in (1, 2):
+        name = 'rcvrp-20-100-{}.txt'.format(idx)
+        (data_dir / name).write_text(open(os.path.join(ROOT, 'Data', 'R-20-100', name)).read())
+    # the worker processes are forked, so they see the patched function
+    monkeypatch.setattr(run_batch, 'run_instance', _fail)
+    monkeypatch.setattr(sys, 'argv', ['run_batch.py', str(data_dir), '--workers', '2',
+                                      '--solution-dir', str(tmp_path / 'solution')])
+    run_batch.main()
+    out = capsys.readouterr().out
+    assert 'rcvrp-20-100-1.txt failed' in out and 'rcvrp-20-100-2.txt failed' in out
+    assert not os.path.exists(tmp_path / 'solution' / 'R-20-100.jsonl')
@@ -0,0 +1,21 @@
+import os
+
+import numpy as np
+
+from convertSol import group_instances
+from evaluation_report import parse_solution_file
+from stream_evaluate import evaluate_group
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = os.path.join(ROOT, 'sample-data', 'R-20-100-sample')
+
+
+def test_feasible_routings_are_not_overloaded_on_their_own_samples():
+    # the sample demands are the instance demands, and every stored routing respects them
+    solutions = parse_solution_file(os.path.join(ROOT, 'solution', 'R-20-100.jsonl'))
+    for g, number in group_instances(SAMPLES).items():
+        sample_file = os.path.join(SAMPLES, 'group_{}.txt'.format(g))
+        _, _, capacity = evaluate_group(sample_file, solutions[number]['edges'])
+        assert capacity['overloaded'].mean == 0, number
+        assert capacity['overflow'].mean == 0, number
+        assert np.isclose(capacity['recourse'].mean, 0), number
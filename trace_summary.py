@@ -0,0 +1,72 @@
+import argparse
+from collections import OrderedDict
+
+from cb_trace import read_trace
+
+INF = 1e100
+
+
+def gap(incumbent, bound):
+    # no bound: the run left its result unproven
+    if incumbent is None or bound is None or abs(incumbent) >= INF:
+        return None
+    return abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+
+
+def summarize(records, points=10):
+    """Per-instance breakdown of the callback records of one or more runs."""
+    by_instance = OrderedDict()
+    for r in records:
+        by_instance.setdefault(r['instance'], []).append(r)
+
+    out = []
+    for instance, recs in by_instance.items():
+        cbs = [r for r in recs if r['event'] == 'benders']
+        summary = [r for r in recs if r['event'] == 'summary']
+        runtime = summary[-1]['runtime'] if summary else max([r['runtime'] for r in cbs] or [0.0])
+        cb_time = sum(r['wall'] for r in cbs)
+        sub_time = sum(r['sub_setup'] + r['sub_optimize'] for r in cbs)
+        # a multi-cut callback adds pool_cuts cuts besides its own
+        cuts = sum(int(r['cut']) + r.get('pool_cuts', 0) for r in cbs)
+
+        # gap at up to ``points`` evenly spaced callbacks
+        curve = [(r['runtime'], gap(r['incumbent'], r['bound'])) for r in cbs]
+        curve = [c for c in curve if c[1] is not None]
+        step = max(1, len(curve) // points)
+        out.append({
+            'instance': instance,
+            'runtime': runtime,
+            'master_time': runtime - cb_time,
+            'callback_time': cb_time,
+            'sub_time': sub_time,
+            'heur_time': sum(r['heur_time'] for r in cbs),
+            'callbacks': len(cbs),
+            'cuts': cuts,
+            'cuts_per_sec': cuts / runtime if runtime > 0 else 0.0,
+            'final_gap': gap(summary[-1]['obj'], summary[-1]['bound']) if summary else None,
+            'gap_curve': curve[::step],
+        })
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize branch-and-cut callback traces.')
+    parser.add_argument('traces', nargs='+', help='JSONL files written by solve_bc(trace=...)')
+    args = parser.parse_args()
+
+    records = []
+    for filename in args.traces:
+        records += read_trace(filename)
+
+    for s in summarize(records):
+        print('=== {} ==='.format(s['instance']))
+        print('runtime:{:.2f} master:{:.2f} callbacks:{:.2f} (subproblem:{:.2f} heuristic:{:.2f})'.format(
+            s['runtime'], s['master_time'], s['callback_time'], s['sub_time'], s['heur_time']))
+        print('callbacks:{} cuts:{} cuts/s:{:.2f} final_gap:{}'.format(
+            s['callbacks'], s['cuts'], s['cuts_per_sec'],
+            '{:.4f}'.format(s['final_gap']) if s['final_gap'] is not None else '-'))
+        print('gap over time: ' + ' '.join('{:.1f}s:{:.4f}'.format(t, g) for t, g in s['gap_curve']))
+
+
+if __name__ == '__main__':
+    main()